@@ -0,0 +1,24 @@
+-- =========================================================
+-- Keyset pagination for the quotation / invoice / receipt lists
+-- Pages are ordered by (created_at, id) DESC and may be narrowed
+-- by status, owner or customer, so each filter column leads its
+-- own composite index.
+-- =========================================================
+
+-- Receipts had no creation timestamp to page on
+ALTER TABLE "Receipts"
+  ADD COLUMN IF NOT EXISTS created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
+
+CREATE INDEX IF NOT EXISTS idx_quotation_created ON "Quotations" (created_at, q_id);
+CREATE INDEX IF NOT EXISTS idx_quotation_status_created ON "Quotations" (status, created_at, q_id);
+CREATE INDEX IF NOT EXISTS idx_quotation_owner_created ON "Quotations" (u_id, created_at, q_id);
+CREATE INDEX IF NOT EXISTS idx_quotation_customer_created ON "Quotations" (customer_name, created_at, q_id);
+
+CREATE INDEX IF NOT EXISTS idx_invoice_created ON "Invoices" (created_at, i_id);
+CREATE INDEX IF NOT EXISTS idx_invoice_status_created ON "Invoices" (status, created_at, i_id);
+CREATE INDEX IF NOT EXISTS idx_invoice_owner_created ON "Invoices" (u_id, created_at, i_id);
+CREATE INDEX IF NOT EXISTS idx_invoice_customer_created ON "Invoices" (customer_name, created_at, i_id);
+
+CREATE INDEX IF NOT EXISTS idx_receipt_created ON "Receipts" (created_at, r_id);
+CREATE INDEX IF NOT EXISTS idx_receipt_status_created ON "Receipts" (status, created_at, r_id);
+CREATE INDEX IF NOT EXISTS idx_receipt_owner_created ON "Receipts" (u_id, created_at, r_id);
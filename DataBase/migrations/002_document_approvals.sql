@@ -0,0 +1,71 @@
+-- =========================================================
+-- Approver metadata stored on the documents themselves
+-- The API used to look the approver up in Logs on every read;
+-- the approve endpoints now record it on the row instead.
+-- =========================================================
+
+ALTER TABLE "Quotations"
+  ADD COLUMN IF NOT EXISTS approver_id uuid REFERENCES "Users"(u_id) ON DELETE SET NULL,
+  ADD COLUMN IF NOT EXISTS approver_name VARCHAR(100),
+  ADD COLUMN IF NOT EXISTS approved_at TIMESTAMP WITH TIME ZONE;
+
+ALTER TABLE "Invoices"
+  ADD COLUMN IF NOT EXISTS approver_id uuid REFERENCES "Users"(u_id) ON DELETE SET NULL,
+  ADD COLUMN IF NOT EXISTS approver_name VARCHAR(100),
+  ADD COLUMN IF NOT EXISTS approved_at TIMESTAMP WITH TIME ZONE;
+
+ALTER TABLE "Receipts"
+  ADD COLUMN IF NOT EXISTS approver_id uuid REFERENCES "Users"(u_id) ON DELETE SET NULL,
+  ADD COLUMN IF NOT EXISTS approver_name VARCHAR(100),
+  ADD COLUMN IF NOT EXISTS approved_at TIMESTAMP WITH TIME ZONE;
+
+-- ---------------------------------------------------------
+-- One-off backfill from the audit log: approved_at only.
+-- document_id is not namespaced, so only entries written by the
+-- *_log_func_trigger functions are used: their action text starts
+-- with the document type ('Quotation 12 status changed from
+-- Submitted to Approved'). The latest approval per document wins.
+-- Those triggers log the document's owner (NEW.u_id) as actor_id,
+-- not the admin who approved it, so the log cannot tell who the
+-- approver was: approver_id / approver_name stay NULL for
+-- documents approved before this migration.
+-- ---------------------------------------------------------
+
+WITH approvals AS (
+  SELECT DISTINCT ON (l.document_id) l.document_id, l."timestamp"
+  FROM "Logs" l
+  WHERE l.action LIKE 'Quotation % to Approved'
+  ORDER BY l.document_id, l."timestamp" DESC
+)
+UPDATE "Quotations" q
+SET approved_at = a."timestamp"
+FROM approvals a
+WHERE q.q_id = a.document_id
+  AND q.status = 'Approved'
+  AND q.approved_at IS NULL;
+
+WITH approvals AS (
+  SELECT DISTINCT ON (l.document_id) l.document_id, l."timestamp"
+  FROM "Logs" l
+  WHERE l.action LIKE 'Invoice % to Approved'
+  ORDER BY l.document_id, l."timestamp" DESC
+)
+UPDATE "Invoices" i
+SET approved_at = a."timestamp"
+FROM approvals a
+WHERE i.i_id = a.document_id
+  AND i.status = 'Approved'
+  AND i.approved_at IS NULL;
+
+WITH approvals AS (
+  SELECT DISTINCT ON (l.document_id) l.document_id, l."timestamp"
+  FROM "Logs" l
+  WHERE l.action LIKE 'Receipt % to Approved'
+  ORDER BY l.document_id, l."timestamp" DESC
+)
+UPDATE "Receipts" r
+SET approved_at = a."timestamp"
+FROM approvals a
+WHERE r.r_id = a.document_id
+  AND r.status = 'Approved'
+  AND r.approved_at IS NULL;
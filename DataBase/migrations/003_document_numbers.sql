@@ -0,0 +1,51 @@
+-- =========================================================
+-- Server-side document numbers
+-- Numbers are now allocated as PREFIX-YYYYMMDD-NNN from a per-day
+-- counter and looked up through unique indexes.
+-- =========================================================
+
+CREATE TABLE IF NOT EXISTS "DocumentSequences" (
+  prefix VARCHAR(10) NOT NULL,
+  day DATE NOT NULL,
+  last_value INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (prefix, day)
+);
+
+-- The old placeholder defaults ('Q-YYYYMMDD-000', '-YYYYMMDD-000') left
+-- duplicates behind; keep the oldest row's number and suffix the rest
+-- with their id so the unique indexes can be built.
+UPDATE "Quotations" q
+SET quotation_number = q.quotation_number || '-' || q.q_id
+WHERE q.q_id NOT IN (SELECT MIN(q_id) FROM "Quotations" GROUP BY quotation_number);
+
+UPDATE "Invoices" i
+SET invoice_number = i.invoice_number || '-' || i.i_id
+WHERE i.i_id NOT IN (SELECT MIN(i_id) FROM "Invoices" GROUP BY invoice_number);
+
+UPDATE "Receipts" r
+SET receipt_number = r.receipt_number || '-' || r.r_id
+WHERE r.r_id NOT IN (SELECT MIN(r_id) FROM "Receipts" GROUP BY receipt_number);
+
+ALTER TABLE "Quotations" ALTER COLUMN quotation_number DROP DEFAULT;
+ALTER TABLE "Invoices" ALTER COLUMN invoice_number DROP DEFAULT;
+ALTER TABLE "Receipts" ALTER COLUMN receipt_number DROP DEFAULT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_quotation_number ON "Quotations" (quotation_number);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_invoice_number ON "Invoices" (invoice_number);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_receipt_number ON "Receipts" (receipt_number);
+
+-- Start each day's counter after the highest number already issued,
+-- so client-generated numbers from before this change are not reused.
+INSERT INTO "DocumentSequences" (prefix, day, last_value)
+SELECT m[1], to_date(m[2], 'YYYYMMDD'), MAX(m[3]::int)
+FROM (
+  SELECT regexp_match(quotation_number, '^(Q)-(\d{8})-(\d+)$') AS m FROM "Quotations"
+  UNION ALL
+  SELECT regexp_match(invoice_number, '^(INV)-(\d{8})-(\d+)$') FROM "Invoices"
+  UNION ALL
+  SELECT regexp_match(receipt_number, '^(RC)-(\d{8})-(\d+)$') FROM "Receipts"
+) issued
+WHERE m IS NOT NULL
+GROUP BY m[1], m[2]
+ON CONFLICT (prefix, day) DO UPDATE
+SET last_value = GREATEST("DocumentSequences".last_value, EXCLUDED.last_value);
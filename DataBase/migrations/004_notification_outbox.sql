@@ -0,0 +1,25 @@
+-- =========================================================
+-- Notification outbox
+-- Submit / approve handlers queue notifications here in the same
+-- transaction as the status change; app.notification_worker
+-- delivers them and retries failures with exponential backoff.
+-- =========================================================
+
+CREATE TABLE IF NOT EXISTS "NotificationOutbox" (
+  o_id SERIAL PRIMARY KEY,
+  u_id uuid REFERENCES "Users"(u_id) ON DELETE CASCADE,
+  channel VARCHAR(30) NOT NULL CONSTRAINT ck_outbox_channel CHECK (channel IN ('LINE', 'Email')),
+  recipient VARCHAR(255) NOT NULL,
+  subject VARCHAR(255) NOT NULL,
+  message TEXT NOT NULL,
+  status VARCHAR(20) NOT NULL DEFAULT 'Pending' CONSTRAINT ck_outbox_status CHECK (status IN ('Pending', 'Sent', 'Failed')),
+  attempts INT NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+  last_error TEXT,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+  sent_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_outbox_pending_due
+  ON "NotificationOutbox" (next_attempt_at)
+  WHERE status = 'Pending';
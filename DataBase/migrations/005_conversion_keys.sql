@@ -0,0 +1,21 @@
+-- =========================================================
+-- Conversion keys
+-- Approval converts a quotation into its invoice and an invoice
+-- into its receipt with INSERT ... SELECT ... ON CONFLICT DO NOTHING,
+-- which needs these unique indexes to detect an existing conversion.
+-- =========================================================
+
+-- Older rows may hold several invoices for one quotation; keep the
+-- link on the oldest and detach the rest so the index can be built.
+UPDATE "Invoices" i
+SET q_id = NULL
+WHERE i.q_id IS NOT NULL
+  AND i.i_id NOT IN (SELECT MIN(i_id) FROM "Invoices" WHERE q_id IS NOT NULL GROUP BY q_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_invoice_quotation ON "Invoices" (q_id);
+
+-- Receipts created by invoice approval are flagged; receipts entered by
+-- hand (further payments) stay unrestricted.
+ALTER TABLE "Receipts" ADD COLUMN IF NOT EXISTS from_conversion BOOLEAN NOT NULL DEFAULT false;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_receipt_conversion ON "Receipts" (i_id) WHERE from_conversion;
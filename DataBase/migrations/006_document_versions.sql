@@ -0,0 +1,11 @@
+-- =========================================================
+-- Document versions
+-- Quotations, invoices and receipts carry a version number that every
+-- update bumps. Writes are conditional on the version the client last
+-- read (sent back as If-Match), so concurrent edits / approvals of the
+-- same document fail with 409 instead of silently overwriting.
+-- =========================================================
+
+ALTER TABLE "Quotations" ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
+ALTER TABLE "Invoices" ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
+ALTER TABLE "Receipts" ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
@@ -0,0 +1,63 @@
+-- =========================================================
+-- Partitioned audit log
+-- "Logs" becomes range partitioned by month on timestamp
+-- ("Logs_YYYY_MM", UTC months) with a "Logs_default" catch-all,
+-- so time-window queries only scan the months they cover and old
+-- months can be detached and archived (python -m app.log_archive)
+-- instead of deleted row by row.
+-- A partitioned table's primary key must include the partition
+-- key, hence (l_id, timestamp).
+-- =========================================================
+
+DO $$
+DECLARE
+  first_month DATE;
+  month DATE;
+BEGIN
+  -- Only an existing plain table is converted; a table created by
+  -- create_all from db_model is already partitioned.
+  IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('public."Logs"')) = 'r' THEN
+    ALTER TABLE "Logs" RENAME TO "Logs_unpartitioned";
+    ALTER TABLE "Logs_unpartitioned" RENAME CONSTRAINT "Logs_pkey" TO "Logs_unpartitioned_pkey";
+    DROP INDEX IF EXISTS idx_log_actor;
+    DROP INDEX IF EXISTS "ix_Logs_l_id";
+
+    CREATE TABLE "Logs" (
+      l_id SERIAL,
+      action VARCHAR(100) NOT NULL,
+      actor_id uuid REFERENCES "Users"(u_id) ON DELETE SET NULL,
+      document_id INT,
+      timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+      PRIMARY KEY (l_id, timestamp)
+    ) PARTITION BY RANGE (timestamp);
+
+    CREATE TABLE "Logs_default" PARTITION OF "Logs" DEFAULT;
+
+    -- one partition per month from the oldest row up to three months ahead
+    first_month := date_trunc('month', COALESCE((SELECT MIN(timestamp) FROM "Logs_unpartitioned"), NOW()) AT TIME ZONE 'UTC');
+    month := first_month;
+    WHILE month <= date_trunc('month', NOW() AT TIME ZONE 'UTC') + INTERVAL '3 months' LOOP
+      EXECUTE format(
+        'CREATE TABLE %I PARTITION OF "Logs" FOR VALUES FROM (%L) TO (%L)',
+        'Logs_' || to_char(month, 'YYYY_MM'),
+        month::text || ' 00:00:00+00',
+        (month + INTERVAL '1 month')::date::text || ' 00:00:00+00'
+      );
+      month := month + INTERVAL '1 month';
+    END LOOP;
+
+    INSERT INTO "Logs" (l_id, action, actor_id, document_id, timestamp)
+    SELECT l_id, action, actor_id, document_id, timestamp FROM "Logs_unpartitioned";
+
+    PERFORM setval(pg_get_serial_sequence('"Logs"', 'l_id'), COALESCE((SELECT MAX(l_id) FROM "Logs"), 0) + 1, false);
+
+    DROP TABLE "Logs_unpartitioned";
+  END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS "Logs_default" PARTITION OF "Logs" DEFAULT;
+
+-- Created on the parent, these are built on every partition
+CREATE INDEX IF NOT EXISTS idx_log_actor ON "Logs" (actor_id);
+CREATE INDEX IF NOT EXISTS idx_log_document_action ON "Logs" (document_id, action);
+CREATE INDEX IF NOT EXISTS idx_log_timestamp ON "Logs" (timestamp);
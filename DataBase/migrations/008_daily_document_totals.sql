@@ -0,0 +1,115 @@
+-- =========================================================
+-- Daily document totals
+-- Dashboards read counts and amounts per status / month / user /
+-- customer from this rollup instead of scanning the document tables.
+-- Statement-level triggers apply each statement's changes as one
+-- grouped delta (+1 for new rows, -1 for old ones), so creates,
+-- status transitions, edits and deletes keep it current.
+-- rebuild_daily_document_totals() recomputes it from scratch.
+-- Requires PostgreSQL 15 or newer: the bucket key is
+-- UNIQUE NULLS NOT DISTINCT, so rows without an owner or
+-- customer still conflict in the ON CONFLICT upsert.
+-- =========================================================
+
+CREATE TABLE IF NOT EXISTS "DailyDocumentTotals" (
+  dt_id SERIAL PRIMARY KEY,
+  day DATE NOT NULL,
+  doc_type VARCHAR(20) NOT NULL CONSTRAINT ck_daily_totals_doc_type CHECK (doc_type IN ('Quotation', 'Invoice', 'Receipt')),
+  status VARCHAR(30) NOT NULL,
+  u_id uuid,
+  customer_name VARCHAR(100),
+  doc_count INT NOT NULL DEFAULT 0,
+  total NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  tax NUMERIC(14, 2) NOT NULL DEFAULT 0,
+  CONSTRAINT uq_daily_totals_bucket UNIQUE NULLS NOT DISTINCT (day, doc_type, status, u_id, customer_name)
+);
+
+CREATE INDEX IF NOT EXISTS idx_daily_totals_owner ON "DailyDocumentTotals" (u_id, day);
+
+CREATE OR REPLACE FUNCTION public.fn_rollup_document_totals()
+  RETURNS TRIGGER
+AS $$
+DECLARE
+  doc_type TEXT := TG_ARGV[0];
+  amounts TEXT;
+  changed_rows TEXT;
+BEGIN
+  -- customer, amount and tax of a row; receipts only carry an amount
+  IF TG_TABLE_NAME = 'Receipts' THEN
+    amounts := 'NULL::varchar AS customer_name, amount AS total, 0 AS tax';
+  ELSE
+    amounts := 'customer_name, total, COALESCE(tax, 0) AS tax';
+  END IF;
+
+  IF (TG_OP = 'INSERT') THEN
+    changed_rows := format('SELECT created_at, status, u_id, %s, 1 AS sign FROM new_rows', amounts);
+  ELSIF (TG_OP = 'DELETE') THEN
+    changed_rows := format('SELECT created_at, status, u_id, %s, -1 AS sign FROM old_rows', amounts);
+  ELSE
+    changed_rows := format(
+      'SELECT created_at, status, u_id, %1$s, 1 AS sign FROM new_rows
+       UNION ALL
+       SELECT created_at, status, u_id, %1$s, -1 AS sign FROM old_rows', amounts);
+  END IF;
+
+  -- Updates that move nothing between buckets cancel out in the HAVING
+  EXECUTE format($sql$
+    INSERT INTO "DailyDocumentTotals" AS t (day, doc_type, status, u_id, customer_name, doc_count, total, tax)
+    SELECT (created_at AT TIME ZONE 'UTC')::date, %L, status, u_id, customer_name,
+           SUM(sign), SUM(sign * total), SUM(sign * tax)
+    FROM (%s) changed
+    GROUP BY 1, 3, 4, 5
+    HAVING SUM(sign) <> 0 OR SUM(sign * total) <> 0 OR SUM(sign * tax) <> 0
+    ON CONFLICT (day, doc_type, status, u_id, customer_name) DO UPDATE
+    SET doc_count = t.doc_count + EXCLUDED.doc_count,
+        total = t.total + EXCLUDED.total,
+        tax = t.tax + EXCLUDED.tax
+  $sql$, doc_type, changed_rows);
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+  doc RECORD;
+BEGIN
+  FOR doc IN SELECT * FROM (VALUES ('Quotations', 'quotation', 'Quotation'), ('Invoices', 'invoice', 'Invoice'), ('Receipts', 'receipt', 'Receipt')) AS d (tbl, name, label) LOOP
+    EXECUTE format('DROP TRIGGER IF EXISTS tr_%s_totals_insert ON %I', doc.name, doc.tbl);
+    EXECUTE format('DROP TRIGGER IF EXISTS tr_%s_totals_update ON %I', doc.name, doc.tbl);
+    EXECUTE format('DROP TRIGGER IF EXISTS tr_%s_totals_delete ON %I', doc.name, doc.tbl);
+
+    EXECUTE format('CREATE TRIGGER tr_%s_totals_insert AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows
+                    FOR EACH STATEMENT EXECUTE FUNCTION public.fn_rollup_document_totals(%L)', doc.name, doc.tbl, doc.label);
+    EXECUTE format('CREATE TRIGGER tr_%s_totals_update AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                    FOR EACH STATEMENT EXECUTE FUNCTION public.fn_rollup_document_totals(%L)', doc.name, doc.tbl, doc.label);
+    EXECUTE format('CREATE TRIGGER tr_%s_totals_delete AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows
+                    FOR EACH STATEMENT EXECUTE FUNCTION public.fn_rollup_document_totals(%L)', doc.name, doc.tbl, doc.label);
+  END LOOP;
+END $$;
+
+CREATE OR REPLACE FUNCTION public.rebuild_daily_document_totals()
+  RETURNS VOID
+AS $$
+BEGIN
+  -- block document writes until the rebuilt totals are committed
+  LOCK TABLE "Quotations", "Invoices", "Receipts" IN SHARE MODE;
+
+  DELETE FROM "DailyDocumentTotals";
+
+  INSERT INTO "DailyDocumentTotals" (day, doc_type, status, u_id, customer_name, doc_count, total, tax)
+  SELECT (created_at AT TIME ZONE 'UTC')::date, 'Quotation', status, u_id, customer_name,
+         COUNT(*), SUM(total), SUM(COALESCE(tax, 0))
+  FROM "Quotations" GROUP BY 1, 3, 4, 5
+  UNION ALL
+  SELECT (created_at AT TIME ZONE 'UTC')::date, 'Invoice', status, u_id, customer_name,
+         COUNT(*), SUM(total), SUM(COALESCE(tax, 0))
+  FROM "Invoices" GROUP BY 1, 3, 4, 5
+  UNION ALL
+  SELECT (created_at AT TIME ZONE 'UTC')::date, 'Receipt', status, u_id, NULL,
+         COUNT(*), SUM(amount), 0
+  FROM "Receipts" GROUP BY 1, 3, 4;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT public.rebuild_daily_document_totals();
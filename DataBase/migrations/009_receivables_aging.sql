@@ -0,0 +1,15 @@
+-- =========================================================
+-- Receivables aging
+-- GET /summary/aging reads approved invoices by due date and the
+-- approved receipt amounts per invoice. Both indexes are partial,
+-- so they only hold the rows the report looks at, and carry the
+-- columns it needs so they can be read without the table.
+-- =========================================================
+
+CREATE INDEX IF NOT EXISTS idx_invoice_receivable_due
+  ON "Invoices" (due_date) INCLUDE (i_id, total, customer_name, u_id)
+  WHERE status = 'Approved';
+
+CREATE INDEX IF NOT EXISTS idx_receipt_approved_invoice
+  ON "Receipts" (i_id) INCLUDE (amount)
+  WHERE status = 'Approved';
@@ -0,0 +1,9 @@
+-- =========================================================
+-- Item lookups by document
+-- Every quotation / invoice read loads its items by q_id / i_id,
+-- which had no index: with a million invoices each load scanned
+-- all InvoiceItems rows (~250 ms, found by scripts.benchmark).
+-- =========================================================
+
+CREATE INDEX IF NOT EXISTS idx_quotation_item_quotation ON "QuotationItems" (q_id);
+CREATE INDEX IF NOT EXISTS idx_invoice_item_invoice ON "InvoiceItems" (i_id);
@@ -0,0 +1,13 @@
+-- =========================================================
+-- Log action prefix filter
+-- GET /logs?action=... filters with action LIKE 'prefix%'. Under a
+-- non-C collation a plain btree on (document_id, action) cannot
+-- serve LIKE, so only document_id was used from the index and every
+-- log row of the document was rechecked. varchar_pattern_ops
+-- compares byte-wise, so the prefix becomes an index range; equality
+-- on action still uses it.
+-- Rebuilt on the parent, so on every partition.
+-- =========================================================
+
+DROP INDEX IF EXISTS idx_log_document_action;
+CREATE INDEX idx_log_document_action ON "Logs" (document_id, action varchar_pattern_ops);
@@ -14,7 +14,7 @@ BEGIN
     actor_id_from_row := NEW.u_id;
     log_action := 'Invoice ' || doc_id || ' created with status ' || NEW.status;
 
-    INSERT INTO logs (action, actor_id, document_id, timestamp)
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
     VALUES (log_action, actor_id_from_row, doc_id, NOW());
 
     RETURN NEW;
@@ -32,7 +32,7 @@ BEGIN
                     ' status changed from ' || OLD.status ||
                     ' to ' || NEW.status;
 
-      INSERT INTO logs (action, actor_id, document_id, timestamp)
+      INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
       VALUES (log_action, actor_id_from_row, doc_id, NOW());
     END IF;
 
@@ -46,7 +46,7 @@ BEGIN
     actor_id_from_row := OLD.u_id;
     log_action := 'Invoice ' || doc_id || ' deleted.';
 
-    INSERT INTO logs (action, actor_id, document_id, timestamp)
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
     VALUES (log_action, actor_id_from_row, doc_id, NOW());
 
     RETURN OLD;
@@ -56,10 +56,73 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Recreate the trigger
-DROP TRIGGER IF EXISTS tr_invoice_log ON Invoices;
+-- =========================================================
+-- Statement-level variant
+-- fn_log_invoice_changes above runs once per row, so a bulk approval or
+-- an import of N invoices runs N PL/pgSQL calls and N single-row inserts
+-- into "Logs". The function below runs once per statement, reads every
+-- affected row from the transition tables (new_rows / old_rows) and
+-- writes all audit rows with one INSERT ... SELECT.
+-- Transition tables need one trigger per event, hence three triggers.
+-- =========================================================
+CREATE OR REPLACE FUNCTION public.fn_log_invoice_changes_stmt()
+  RETURNS TRIGGER
+AS $$
+BEGIN
+  IF (TG_OP = 'INSERT') THEN
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    SELECT 'Invoice ' || n.i_id || ' created with status ' || n.status, n.u_id, n.i_id, NOW()
+    FROM new_rows n
+    ORDER BY n.i_id;
+
+  ELSIF (TG_OP = 'UPDATE') THEN
+    -- Only log rows whose status actually changed
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    SELECT 'Invoice ' || n.i_id || ' status changed from ' || o.status || ' to ' || n.status,
+           n.u_id, n.i_id, NOW()
+    FROM new_rows n
+    JOIN old_rows o ON o.i_id = n.i_id
+    WHERE n.status IS DISTINCT FROM o.status
+    ORDER BY n.i_id;
+
+  ELSIF (TG_OP = 'DELETE') THEN
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    SELECT 'Invoice ' || o.i_id || ' deleted.', o.u_id, o.i_id, NOW()
+    FROM old_rows o
+    ORDER BY o.i_id;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Replace the per-row trigger with the statement-level ones
+DROP TRIGGER IF EXISTS tr_invoice_log ON "Invoices";
+DROP TRIGGER IF EXISTS tr_invoice_log_insert ON "Invoices";
+DROP TRIGGER IF EXISTS tr_invoice_log_update ON "Invoices";
+DROP TRIGGER IF EXISTS tr_invoice_log_delete ON "Invoices";
+
+CREATE TRIGGER tr_invoice_log_insert
+  AFTER INSERT ON "Invoices"
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.fn_log_invoice_changes_stmt();
+
+CREATE TRIGGER tr_invoice_log_update
+  AFTER UPDATE ON "Invoices"
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.fn_log_invoice_changes_stmt();
+
+CREATE TRIGGER tr_invoice_log_delete
+  AFTER DELETE ON "Invoices"
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.fn_log_invoice_changes_stmt();
 
-CREATE TRIGGER tr_invoice_log
-  AFTER INSERT OR UPDATE OR DELETE ON Invoices
-  FOR EACH ROW
-  EXECUTE FUNCTION public.fn_log_invoice_changes();
+-- To go back to per-row logging:
+--   DROP TRIGGER tr_invoice_log_insert ON "Invoices";
+--   DROP TRIGGER tr_invoice_log_update ON "Invoices";
+--   DROP TRIGGER tr_invoice_log_delete ON "Invoices";
+--   CREATE TRIGGER tr_invoice_log AFTER INSERT OR UPDATE OR DELETE ON "Invoices"
+--     FOR EACH ROW EXECUTE FUNCTION public.fn_log_invoice_changes();
@@ -11,11 +11,11 @@ BEGIN
   --
   IF (TG_OP = 'INSERT') THEN
     doc_id := NEW.q_id;
-    actor_id_from_row := NEW.user_id; -- Get user from the new row
+    actor_id_from_row := NEW.u_id; -- Get user from the new row
     log_action := 'Quotation ' || doc_id || ' created with status ' || NEW.status;
 
-    INSERT INTO logs (action, actor_id, document_id)
-    VALUES (log_action, actor_id_from_row, doc_id);
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    VALUES (log_action, actor_id_from_row, doc_id, NOW());
 
     RETURN NEW;
 
@@ -24,15 +24,15 @@ BEGIN
   --
   ELSIF (TG_OP = 'UPDATE') THEN
     doc_id := NEW.q_id;
-    actor_id_from_row := NEW.user_id; -- Get user from the updated row
+    actor_id_from_row := NEW.u_id; -- Get user from the updated row
 
     -- This is the key part from your spec!
     -- Only log if the status has *actually changed*.
     IF NEW.status <> OLD.status THEN
       log_action := 'Quotation ' || doc_id || ' status changed from ' || OLD.status || ' to ' || NEW.status;
       
-      INSERT INTO logs (action, actor_id, document_id)
-      VALUES (log_action, actor_id_from_row, doc_id);
+      INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+      VALUES (log_action, actor_id_from_row, doc_id, NOW());
     END IF;
 
     RETURN NEW;
@@ -42,11 +42,11 @@ BEGIN
   --
   ELSIF (TG_OP = 'DELETE') THEN
     doc_id := OLD.q_id;
-    actor_id_from_row := OLD.user_id; -- Get user from the old row being deleted
+    actor_id_from_row := OLD.u_id; -- Get user from the old row being deleted
     log_action := 'Quotation ' || doc_id || ' deleted.';
     
-    INSERT INTO logs (action, actor_id, document_id)
-    VALUES (log_action, actor_id_from_row, doc_id);
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    VALUES (log_action, actor_id_from_row, doc_id, NOW());
 
     RETURN OLD;
 
@@ -57,13 +57,73 @@ END;
 $$
 LANGUAGE plpgsql;
 
-DROP TRIGGER IF EXISTS tr_quotation_log ON Quotations;
+-- =========================================================
+-- Statement-level variant
+-- fn_log_quotation_changes above runs once per row, so a bulk approval or
+-- an import of N quotations runs N PL/pgSQL calls and N single-row inserts
+-- into "Logs". The function below runs once per statement, reads every
+-- affected row from the transition tables (new_rows / old_rows) and
+-- writes all audit rows with one INSERT ... SELECT.
+-- Transition tables need one trigger per event, hence three triggers.
+-- =========================================================
+CREATE OR REPLACE FUNCTION public.fn_log_quotation_changes_stmt()
+  RETURNS TRIGGER
+AS $$
+BEGIN
+  IF (TG_OP = 'INSERT') THEN
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    SELECT 'Quotation ' || n.q_id || ' created with status ' || n.status, n.u_id, n.q_id, NOW()
+    FROM new_rows n
+    ORDER BY n.q_id;
+
+  ELSIF (TG_OP = 'UPDATE') THEN
+    -- Only log rows whose status actually changed
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    SELECT 'Quotation ' || n.q_id || ' status changed from ' || o.status || ' to ' || n.status,
+           n.u_id, n.q_id, NOW()
+    FROM new_rows n
+    JOIN old_rows o ON o.q_id = n.q_id
+    WHERE n.status IS DISTINCT FROM o.status
+    ORDER BY n.q_id;
+
+  ELSIF (TG_OP = 'DELETE') THEN
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    SELECT 'Quotation ' || o.q_id || ' deleted.', o.u_id, o.q_id, NOW()
+    FROM old_rows o
+    ORDER BY o.q_id;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Replace the per-row trigger with the statement-level ones
+DROP TRIGGER IF EXISTS tr_quotation_log ON "Quotations";
+DROP TRIGGER IF EXISTS tr_quotation_log_insert ON "Quotations";
+DROP TRIGGER IF EXISTS tr_quotation_log_update ON "Quotations";
+DROP TRIGGER IF EXISTS tr_quotation_log_delete ON "Quotations";
+
+CREATE TRIGGER tr_quotation_log_insert
+  AFTER INSERT ON "Quotations"
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.fn_log_quotation_changes_stmt();
 
+CREATE TRIGGER tr_quotation_log_update
+  AFTER UPDATE ON "Quotations"
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.fn_log_quotation_changes_stmt();
 
-CREATE TRIGGER tr_quotation_log
+CREATE TRIGGER tr_quotation_log_delete
+  AFTER DELETE ON "Quotations"
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.fn_log_quotation_changes_stmt();
 
-  AFTER INSERT OR UPDATE OR DELETE ON Quotations
- 
-  FOR EACH ROW
-  
-  EXECUTE FUNCTION public.fn_log_quotation_changes();
\ No newline at end of file
+-- To go back to per-row logging:
+--   DROP TRIGGER tr_quotation_log_insert ON "Quotations";
+--   DROP TRIGGER tr_quotation_log_update ON "Quotations";
+--   DROP TRIGGER tr_quotation_log_delete ON "Quotations";
+--   CREATE TRIGGER tr_quotation_log AFTER INSERT OR UPDATE OR DELETE ON "Quotations"
+--     FOR EACH ROW EXECUTE FUNCTION public.fn_log_quotation_changes();
@@ -12,7 +12,7 @@ BEGIN
     actor_id_from_row := NEW.u_id;
     log_action := 'Receipt ' || doc_id || ' created with status ' || NEW.status;
 
-    INSERT INTO logs (action, actor_id, document_id, timestamp)
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
     VALUES (log_action, actor_id_from_row, doc_id, NOW());
 
     RETURN NEW;
@@ -31,7 +31,7 @@ BEGIN
           log_action := 'Receipt ' || doc_id || ' was ' || NEW.status || '.';
       END IF;
 
-      INSERT INTO logs (action, actor_id, document_id, timestamp)
+      INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
       VALUES (log_action, actor_id_from_row, doc_id, NOW());
     END IF;
 
@@ -43,7 +43,7 @@ BEGIN
     actor_id_from_row := OLD.u_id;
     log_action := 'Receipt ' || doc_id || ' deleted.';
 
-    INSERT INTO logs (action, actor_id, document_id, timestamp)
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
     VALUES (log_action, actor_id_from_row, doc_id, NOW());
 
     RETURN OLD;
@@ -53,10 +53,76 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE TRIGGER tr_receipt_log
-  -- Run this function AFTER any of these actions
-  AFTER INSERT OR UPDATE OR DELETE ON Receipts
-  -- Run it once for each row that was changed
-  FOR EACH ROW
-  -- Call the function we just created
-  EXECUTE FUNCTION public.fn_log_receipt_changes();
\ No newline at end of file
+-- =========================================================
+-- Statement-level variant
+-- fn_log_receipt_changes above runs once per row, so a bulk approval or
+-- an import of N receipts runs N PL/pgSQL calls and N single-row inserts
+-- into "Logs". The function below runs once per statement, reads every
+-- affected row from the transition tables (new_rows / old_rows) and
+-- writes all audit rows with one INSERT ... SELECT.
+-- Transition tables need one trigger per event, hence three triggers.
+-- =========================================================
+CREATE OR REPLACE FUNCTION public.fn_log_receipt_changes_stmt()
+  RETURNS TRIGGER
+AS $$
+BEGIN
+  IF (TG_OP = 'INSERT') THEN
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    SELECT 'Receipt ' || n.r_id || ' created with status ' || n.status, n.u_id, n.r_id, NOW()
+    FROM new_rows n
+    ORDER BY n.r_id;
+
+  ELSIF (TG_OP = 'UPDATE') THEN
+    -- Only log rows whose status actually changed
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    SELECT CASE WHEN n.status IN ('Confirmed', 'Rejected')
+           THEN 'Receipt ' || n.r_id || ' was ' || n.status || '.'
+           ELSE 'Receipt ' || n.r_id || ' status changed from ' || o.status || ' to ' || n.status
+      END,
+           n.u_id, n.r_id, NOW()
+    FROM new_rows n
+    JOIN old_rows o ON o.r_id = n.r_id
+    WHERE n.status IS DISTINCT FROM o.status
+    ORDER BY n.r_id;
+
+  ELSIF (TG_OP = 'DELETE') THEN
+    INSERT INTO "Logs" (action, actor_id, document_id, timestamp)
+    SELECT 'Receipt ' || o.r_id || ' deleted.', o.u_id, o.r_id, NOW()
+    FROM old_rows o
+    ORDER BY o.r_id;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Replace the per-row trigger with the statement-level ones
+DROP TRIGGER IF EXISTS tr_receipt_log ON "Receipts";
+DROP TRIGGER IF EXISTS tr_receipt_log_insert ON "Receipts";
+DROP TRIGGER IF EXISTS tr_receipt_log_update ON "Receipts";
+DROP TRIGGER IF EXISTS tr_receipt_log_delete ON "Receipts";
+
+CREATE TRIGGER tr_receipt_log_insert
+  AFTER INSERT ON "Receipts"
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.fn_log_receipt_changes_stmt();
+
+CREATE TRIGGER tr_receipt_log_update
+  AFTER UPDATE ON "Receipts"
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.fn_log_receipt_changes_stmt();
+
+CREATE TRIGGER tr_receipt_log_delete
+  AFTER DELETE ON "Receipts"
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.fn_log_receipt_changes_stmt();
+
+-- To go back to per-row logging:
+--   DROP TRIGGER tr_receipt_log_insert ON "Receipts";
+--   DROP TRIGGER tr_receipt_log_update ON "Receipts";
+--   DROP TRIGGER tr_receipt_log_delete ON "Receipts";
+--   CREATE TRIGGER tr_receipt_log AFTER INSERT OR UPDATE OR DELETE ON "Receipts"
+--     FOR EACH ROW EXECUTE FUNCTION public.fn_log_receipt_changes();
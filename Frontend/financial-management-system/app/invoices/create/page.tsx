@@ -17,18 +17,10 @@ const VAT_RATE = 0.07;
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL;
 
-const getFormattedDate = (date: Date): string => {
-  const yyyy = date.getFullYear();
-  const mm = String(date.getMonth() + 1).padStart(2, "0");
-  const dd = String(date.getDate()).padStart(2, "0");
-  return `${yyyy}${mm}${dd}`;
-};
-
 export default function CreateInvoicePage() {
   const router = useRouter();
   const { token } = useAuth();
 
-  const [invoiceNumber, setInvoiceNumber] = React.useState("");
   const [customerName, setCustomerName] = React.useState("");
   const [customerAddress, setCustomerAddress] = React.useState("");
   const [paymentTerm, setPaymentTerm] = React.useState("");
@@ -40,11 +32,6 @@ export default function CreateInvoicePage() {
   const [isLoading, setIsLoading] = React.useState(false);
   const [error, setError] = React.useState<string | null>(null);
 
-  React.useEffect(() => {
-    const suggestedId = `INV-${getFormattedDate(new Date())}-`;
-    setInvoiceNumber(suggestedId);
-  }, []);
-
   const handleLineItemChange = (
     id: number,
     field: keyof LineItem,
@@ -101,7 +88,6 @@ export default function CreateInvoicePage() {
     }));
 
     const payload = {
-      invoice_number: invoiceNumber,
       customer_name: customerName,
       customer_address: customerAddress,
       payment_term: paymentTerm,
@@ -125,7 +111,9 @@ export default function CreateInvoicePage() {
         throw new Error(errorData.detail || "Failed to create invoice.");
       }
 
-      alert(`Invoice saved as ${status}!`);
+      // the number is assigned by the server
+      const created = await response.json();
+      alert(`Invoice ${created.invoice_number} saved as ${status}!`);
       router.push("/invoices");
     } catch (err: any) {
       setError(err.message);
@@ -154,13 +142,6 @@ export default function CreateInvoicePage() {
       <section className="space-y-4">
         <h3 className="text-xl font-semibold">Invoice Information:</h3>
         <div className="grid grid-cols-2 gap-4">
-          <Input
-            placeholder="Invoice Number (e.g. INV-YYYYMMDD-001)"
-            className="bg-white text-black border-primary border-2 rounded-none"
-            value={invoiceNumber}
-            onChange={(e) => setInvoiceNumber(e.target.value)}
-            required
-          />
           <Input
             placeholder="Customer Name"
             className="bg-white text-black border-primary border-2 rounded-none"
@@ -125,7 +125,9 @@ export default function EditInvoicePage() {
       return;
     }
 
-    const formattedItems = lineItems.map(({ description, quantity, unit_price }) => ({
+    // Stored items keep their id so the API only touches rows that changed
+    const formattedItems = lineItems.map(({ id, description, quantity, unit_price }) => ({
+      item_id: typeof id === "number" ? id : undefined,
       description,
       quantity,
       unit_price,
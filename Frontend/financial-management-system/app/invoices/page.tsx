@@ -77,17 +77,16 @@ export default function InvoicesPage() {
   const [invoices, setInvoices] = React.useState<Invoice[]>([]);
   const [isLoading, setIsLoading] = React.useState(true);
   const [error, setError] = React.useState<string | null>(null);
+  // The list endpoints return one page at a time; X-Next-Cursor points at the next one.
+  const [nextCursor, setNextCursor] = React.useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = React.useState(false);
 
-  const fetchInvoices = React.useCallback(async () => {
-    if (!user || !token) return;
-
-    setIsLoading(true);
-    setError(null);
-    try {
+  const fetchPage = React.useCallback(
+    async (cursor: string | null) => {
       const endpoint =
-        user.role === "Admin" ? "/invoice" : "/invoice/me";
-      
-      const response = await fetch(`${API_URL}${endpoint}`, {
+        user?.role === "Admin" ? "/invoice" : "/invoice/me";
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const response = await fetch(`${API_URL}${endpoint}${query}`, {
         headers: {
           Authorization: `Bearer ${token}`,
         },
@@ -95,15 +94,43 @@ export default function InvoicesPage() {
       if (!response.ok) {
         throw new Error("Failed to fetch invoices");
       }
-      const data = await response.json();
-      setInvoices(data);
+      const data: Invoice[] = await response.json();
+      return { data, cursor: response.headers.get("X-Next-Cursor") };
+    },
+    [user, token]
+  );
+
+  const fetchInvoices = React.useCallback(async () => {
+    if (!user || !token) return;
+
+    setIsLoading(true);
+    setError(null);
+    try {
+      const page = await fetchPage(null);
+      setInvoices(page.data);
+      setNextCursor(page.cursor);
     } catch (err: any) {
       console.error("Failed to fetch invoices:", err);
       setError(err.message || "An unknown error occurred");
     } finally {
       setIsLoading(false);
     }
-  }, [user, token]);
+  }, [user, token, fetchPage]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      setInvoices((current) => [...current, ...page.data]);
+      setNextCursor(page.cursor);
+    } catch (err: any) {
+      console.error("Failed to fetch more invoices:", err);
+      setError(err.message || "An unknown error occurred");
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
 
   React.useEffect(() => {
     fetchInvoices();
@@ -163,6 +190,14 @@ export default function InvoicesPage() {
           />
         )}
       </div>
+
+      {nextCursor && (
+        <div className="flex justify-center">
+          <Button variant="secondary" onClick={loadMore} disabled={isLoadingMore}>
+            {isLoadingMore ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
     </div>
   );
 }
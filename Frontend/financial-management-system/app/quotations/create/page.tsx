@@ -18,13 +18,6 @@ const VAT_RATE = 0.07;
 const API_URL = process.env.NEXT_PUBLIC_API_URL;
 
 
-const getFormattedDate = (date: Date): string => {
-  const yyyy = date.getFullYear();
-  const mm = String(date.getMonth() + 1).padStart(2, "0");
-  const dd = String(date.getDate()).padStart(2, "0");
-  return `${yyyy}${mm}${dd}`;
-};
-
 export default function CreateQuotationPage() {
   const router = useRouter();
   const { token } = useAuth();
@@ -33,8 +26,6 @@ export default function CreateQuotationPage() {
     { id: 1, description: "", qty: 1, unitPrice: 0 },
   ]);
 
-  const [quotationId, setQuotationId] = React.useState("");
-
   const [customerName, setCustomerName] = React.useState("");
   const [customerAddress, setCustomerAddress] = React.useState("");
   const [customerEmail, setCustomerEmail] = React.useState("");
@@ -42,11 +33,6 @@ export default function CreateQuotationPage() {
   const [isLoading, setIsLoading] = React.useState(false);
   const [error, setError] = React.useState<string | null>(null);
 
-  React.useEffect(() => {
-    const suggestedId = `Q-${getFormattedDate(new Date())}-`;
-    setQuotationId(suggestedId);
-  }, []);
-
   const handleLineItemChange = (
     id: number,
     field: keyof LineItem,
@@ -104,7 +90,6 @@ export default function CreateQuotationPage() {
     }));
 
     const payload = {
-      quotation_number: quotationId,
       customer_name: customerName,
       customer_address: customerAddress,
       customer_email: customerEmail,
@@ -127,7 +112,9 @@ export default function CreateQuotationPage() {
         throw new Error(errorData.detail || "Failed to create quotation.");
       }
 
-      alert(`Quotation saved as ${status}!`);
+      // the number is assigned by the server
+      const created = await response.json();
+      alert(`Quotation ${created.quotation_number} saved as ${status}!`);
       router.push("/quotations");
     } catch (err: any) {
       setError(err.message);
@@ -156,13 +143,6 @@ export default function CreateQuotationPage() {
       <section className="space-y-4">
         <h3 className="text-xl font-semibold">Quotation Information:</h3>
         <div className="grid grid-cols-2 gap-4">
-          <Input
-            placeholder="Quotation ID (e.g. Q-YYYYMMDD-001)"
-            className="bg-white text-black border-primary border-2 rounded-none"
-            value={quotationId}
-            onChange={(e) => setQuotationId(e.target.value)}
-            required
-          />
           <Input
             placeholder="Customer Name"
             className="bg-white text-black border-primary border-2 rounded-none"
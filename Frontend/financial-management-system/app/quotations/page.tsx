@@ -75,17 +75,16 @@ export default function QuotationsPage() {
   const [quotations, setQuotations] = React.useState<Quotation[]>([]);
   const [isLoading, setIsLoading] = React.useState(true);
   const [error, setError] = React.useState<string | null>(null);
+  // The list endpoints return one page at a time; X-Next-Cursor points at the next one.
+  const [nextCursor, setNextCursor] = React.useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = React.useState(false);
 
-  const fetchQuotations = React.useCallback(async () => {
-    if (!user || !token) return;
-
-    setIsLoading(true);
-    setError(null);
-    try {
+  const fetchPage = React.useCallback(
+    async (cursor: string | null) => {
       const endpoint =
-        user.role === "Admin" ? "/quotation" : "/quotation/me";
-        
-      const response = await fetch(`${API_URL}${endpoint}`, {
+        user?.role === "Admin" ? "/quotation" : "/quotation/me";
+      const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+      const response = await fetch(`${API_URL}${endpoint}${query}`, {
         headers: {
           Authorization: `Bearer ${token}`,
         },
@@ -93,15 +92,43 @@ export default function QuotationsPage() {
       if (!response.ok) {
         throw new Error("Failed to fetch quotations");
       }
-      const data = await response.json();
-      setQuotations(data);
+      const data: Quotation[] = await response.json();
+      return { data, cursor: response.headers.get("X-Next-Cursor") };
+    },
+    [user, token]
+  );
+
+  const fetchQuotations = React.useCallback(async () => {
+    if (!user || !token) return;
+
+    setIsLoading(true);
+    setError(null);
+    try {
+      const page = await fetchPage(null);
+      setQuotations(page.data);
+      setNextCursor(page.cursor);
     } catch (err: any) {
       console.error("Failed to fetch quotations:", err);
       setError(err.message || "An unknown error occurred");
     } finally {
       setIsLoading(false);
     }
-  }, [user, token]);
+  }, [user, token, fetchPage]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      setQuotations((current) => [...current, ...page.data]);
+      setNextCursor(page.cursor);
+    } catch (err: any) {
+      console.error("Failed to fetch more quotations:", err);
+      setError(err.message || "An unknown error occurred");
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
 
   React.useEffect(() => {
     fetchQuotations();
@@ -161,6 +188,14 @@ export default function QuotationsPage() {
           />
         )}
       </div>
+
+      {nextCursor && (
+        <div className="flex justify-center">
+          <Button variant="secondary" onClick={loadMore} disabled={isLoadingMore}>
+            {isLoadingMore ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
     </div>
   );
 }
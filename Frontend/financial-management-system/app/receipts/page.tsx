@@ -139,14 +139,26 @@ export default function ReceiptsPage() {
   const router = useRouter();
   const [receipts, setReceipts] = React.useState<Receipt[]>([]);
   const [isLoading, setIsLoading] = React.useState(true);
+  // The list endpoints return one page at a time; X-Next-Cursor points at the next one.
+  const [nextCursor, setNextCursor] = React.useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = React.useState(false);
+
+  const fetchPage = async (cursor: string | null) => {
+    const endpoint = user?.role === "Admin" ? "/receipt/" : "/receipt/me/";
+    const response = await api.get(endpoint, { params: cursor ? { cursor } : {} });
+    return {
+      data: response.data as Receipt[],
+      cursor: (response.headers["x-next-cursor"] as string | undefined) ?? null,
+    };
+  };
 
   const fetchReceipts = async () => {
     if (!user) return;
     setIsLoading(true);
     try {
-      const endpoint = user.role === "Admin" ? "/receipt/" : "/receipt/me/";
-      const response = await api.get(endpoint);
-      setReceipts(response.data);
+      const page = await fetchPage(null);
+      setReceipts(page.data);
+      setNextCursor(page.cursor);
     } catch (err) {
       console.error("Failed to fetch receipts:", err);
     } finally {
@@ -154,6 +166,20 @@ export default function ReceiptsPage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      setReceipts((current) => [...current, ...page.data]);
+      setNextCursor(page.cursor);
+    } catch (err) {
+      console.error("Failed to fetch more receipts:", err);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   React.useEffect(() => {
     if (user) {
       fetchReceipts();
@@ -205,6 +231,14 @@ export default function ReceiptsPage() {
           />
         )}
       </div>
+
+      {nextCursor && (
+        <div className="flex justify-center">
+          <Button variant="secondary" onClick={loadMore} disabled={isLoadingMore}>
+            {isLoadingMore ? "Loading..." : "Load more"}
+          </Button>
+        </div>
+      )}
     </div>
   );
 }
@@ -82,6 +82,9 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
       const data = await response.json();
       
       localStorage.setItem("access_token", data.access_token);
+      if (data.refresh_token) {
+        localStorage.setItem("refresh_token", data.refresh_token);
+      }
       setToken(data.access_token);
       
       await fetchUser(data.access_token);
@@ -95,6 +98,7 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
 
   const logout = () => {
     localStorage.removeItem("access_token");
+    localStorage.removeItem("refresh_token");
     setUser(null);
     setToken(null);
     router.push("/login");
@@ -17,4 +17,30 @@ api.interceptors.request.use(
   }
 );
 
+// When the access token expires, trade the refresh token for a new pair once
+// and replay the request instead of sending the user back to the login page.
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    const refreshToken = localStorage.getItem("refresh_token");
+    if (error.response?.status !== 401 || !refreshToken || original._retried) {
+      return Promise.reject(error);
+    }
+    original._retried = true;
+    try {
+      const { data } = await axios.post(`${api.defaults.baseURL}/auth/refresh`, {
+        refresh_token: refreshToken,
+      });
+      localStorage.setItem("access_token", data.access_token);
+      localStorage.setItem("refresh_token", data.refresh_token);
+      return api(original);
+    } catch (refreshError) {
+      localStorage.removeItem("access_token");
+      localStorage.removeItem("refresh_token");
+      return Promise.reject(error);
+    }
+  }
+);
+
 export default api;
\ No newline at end of file
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends
+from starlette import status
+from pydantic import BaseModel
+from typing import Annotated
+from .database import pool_stats, async_engine
+from .auth import UserPrincipal, check_user_role, user_cache
+from .company import company_cache, invalidate_company_cache
+
+router = APIRouter(prefix='/admin', tags=['admin'])
+
+AdminUser = Annotated[UserPrincipal, Depends(check_user_role('Admin'))]
+
+class PoolStatsResponse(BaseModel):
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    timeouts: int
+    wait_avg_ms: float
+    wait_max_ms: float
+
+class CacheStatsResponse(BaseModel):
+    size: int
+    maxsize: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: float
+
+@router.get("/db-pool", response_model=PoolStatsResponse)
+def get_db_pool_stats(current_user: AdminUser):
+    return pool_stats()
+
+@router.get("/db-pool/async", response_model=PoolStatsResponse)
+def get_async_db_pool_stats(current_user: AdminUser):
+    return pool_stats(async_engine.pool)
+
+@router.get("/user-cache", response_model=CacheStatsResponse)
+def get_user_cache_stats(current_user: AdminUser):
+    return user_cache.stats()
+
+@router.get("/company-cache", response_model=CacheStatsResponse)
+def get_company_cache_stats(current_user: AdminUser):
+    return company_cache.stats()
+
+@router.delete("/company-cache", status_code=status.HTTP_204_NO_CONTENT)
+def clear_company_cache(current_user: AdminUser):
+    """Reloads the company profile and bank account on next use (this worker only)."""
+    invalidate_company_cache()
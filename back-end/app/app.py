@@ -1,24 +1,49 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, Depends, Request
 from pydantic import BaseModel
 from typing import List, Annotated, Optional
-from fastapi.security import OAuth2PasswordRequestForm
 from . import quotation
 from . import invoice
 from . import receipt
 from . import logs
+from . import export
+from . import summary
+from . import company
+from . import metrics
 from . import auth
-from . import db_model 
-from . import notification_service
+from . import notification_worker
 from . import line_webhook
-from .auth import get_current_user,check_user_role
-from .database import engine, SessionLocal, get_db
+from . import admin
+from .auth import CurrentUser
+from .database import get_db, count_queries, warmup_pool, warmup_async_pool, async_engine, DB_POOL_WARMUP, DB_QUERY_TIMING, server_timing, log_slow_request
+from .pagination import NEXT_CURSOR_HEADER
 from sqlalchemy.orm import Session
-from decimal import Decimal
-from datetime import timedelta, date
+from datetime import timedelta
 import uuid 
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import os
+import time
 
-app = FastAPI()
+# Outbox delivery threads run inside the API process unless a dedicated
+# `python -m app.notification_worker` process is used (then set this to 0).
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", "1"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_POOL_WARMUP > 0:
+        warmup_pool(DB_POOL_WARMUP)
+        await warmup_async_pool(DB_POOL_WARMUP)
+    workers = None
+    if NOTIFICATION_WORKERS > 0:
+        workers = notification_worker.start_workers(NOTIFICATION_WORKERS)
+    yield
+    if workers:
+        pool, stop = workers
+        stop.set()
+        pool.shutdown(wait=False)
+    await async_engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -31,19 +56,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+app.add_middleware(metrics.MetricsMiddleware)
+
+@app.middleware("http")
+async def query_counter(request: Request, call_next):
+    start = time.perf_counter()
+    with count_queries() as stats:
+        response = await call_next(request)
+    response.headers["X-Query-Count"] = str(stats.count)
+    if DB_QUERY_TIMING:
+        elapsed = time.perf_counter() - start
+        # the route template groups /invoices/1 and /invoices/2 together
+        route = getattr(request.scope.get("route"), "path", request.url.path)
+        response.headers["Server-Timing"] = server_timing(stats, elapsed)
+        log_slow_request(stats, request.method, route, response.status_code, elapsed)
+    return response
+
 app.include_router(quotation.router) 
 app.include_router(invoice.router) 
 app.include_router(receipt.router)
 app.include_router(logs.router)
+app.include_router(export.router)
+app.include_router(summary.router)
+app.include_router(company.router)
 app.include_router(auth.router) 
 app.include_router(line_webhook.router) 
+app.include_router(admin.router)
+app.include_router(metrics.router)
 
-db_model.Base.metadata.create_all(bind=engine, checkfirst=True)
+# Tables and migrations are applied by `python -m app.migrate` at deploy time,
+# not here: importing the app must not touch the database.
 
 DBDependency = Annotated[Session, Depends(get_db)]
-CurrentUser = Annotated[db_model.User, Depends(get_current_user)]
 
 class UserBase(BaseModel):
     u_id: uuid.UUID
@@ -53,54 +100,6 @@ class UserBase(BaseModel):
     class Config:
         from_attributes = True
 
-class CompanyProfileResponse(BaseModel):
-    company_id: int
-    company_name: str
-    company_address: str
-    tax_id: str
-    phone: str
-    email: str
-
-    class Config:
-        from_attributes = True
-
-class CompanyBankAccountResponse(BaseModel):
-    bank_name: str
-    account_name: str
-    account_number: str
-    swift_code: str
-
-    class Config:
-        from_attributes = True
-
-@app.get("/company-profile", response_model=CompanyProfileResponse)
-def get_company_profile(db: DBDependency):
-    profile = db.query(db_model.CompanyProfile).first() 
-    
-    if not profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Company profile has not been set up."
-        )
-    return profile
-
-@app.get("/company-bank-account", response_model=CompanyBankAccountResponse)
-def get_company_bank_account(db: DBDependency):
-    """
-    Retrieve the default company bank account information.
-    """
-    # Fetch the bank account marked as default
-    account = db.query(db_model.CompanyBankAccount).filter(
-        db_model.CompanyBankAccount.is_default == True
-    ).first() 
-    
-    if not account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
-            detail="Default company bank account has not been set up."
-        )
-    return account
-
 # test
 @app.get("/hi")
 def hi():
@@ -1,12 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta, datetime, timezone
 from typing import Annotated
+import asyncio
 import uuid
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from . import db_model
-from .database import get_db
+from .database import get_db, get_async_db
+from .cache import TTLCache
 from pwdlib import PasswordHash
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
@@ -20,13 +25,29 @@ router = APIRouter(prefix='/auth', tags=['auth'])
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 AlGORITHM = 'HS256'
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "20"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+
+# Argon2 takes tens of milliseconds of CPU per hash. It runs on this small
+# dedicated pool so it neither blocks the event loop nor lets a burst of
+# logins take over the threadpool that serves sync endpoints.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
 
 bcrypt_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 ouath2_bearer = OAuth2PasswordBearer(tokenUrl='auth/login')
 password_hash = PasswordHash.recommended()
+hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 
 db_dependency = Annotated[Session, Depends(get_db)]
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
+
+# Authenticated principals by u_id, so a request with a valid token usually
+# needs no Users lookup at all.
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
 
 class CreateUser(BaseModel):
     name: str
@@ -38,6 +59,10 @@ class CreateUser(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str | None = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     id: uuid.UUID
@@ -45,15 +70,39 @@ class TokenData(BaseModel):
     class Config:
         extra = "ignore"
 
+class UserPrincipal(BaseModel):
+    """The cached subset of a Users row that handlers read from current_user."""
+    u_id: uuid.UUID
+    name: str
+    email: str
+    role: str
+    line_user_id: str | None = None
+
+    class Config:
+        from_attributes = True
+        frozen = True
+
+def invalidate_user(u_id: uuid.UUID):
+    """Drops a cached principal; call after committing a change to the user row."""
+    user_cache.invalidate(u_id)
+
 def get_password_hash(password):
     return password_hash.hash(password)
 
 def verify_password(plain_password, hashed_password):
     return password_hash.verify(plain_password, hashed_password)
 
+async def get_password_hash_async(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, get_password_hash, password)
+
+async def verify_password_async(plain_password, hashed_password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, verify_password, plain_password, hashed_password)
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
-async def create_user(db: db_dependency, user_request:CreateUser):
-    hashed_password = get_password_hash(user_request.password)
+async def create_user(db: async_db_dependency, user_request:CreateUser):
+    hashed_password = await get_password_hash_async(user_request.password)
 
     db_user = db_model.User(
         name = user_request.name,
@@ -65,10 +114,10 @@ async def create_user(db: db_dependency, user_request:CreateUser):
     
     try:
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error inserting user: {e}")
         raise HTTPException(status_code=500, detail="Database error.")
 
@@ -76,36 +125,61 @@ async def create_user(db: db_dependency, user_request:CreateUser):
 
 
 @router.post("/login", response_model=Token)
-async def login_for_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: db_dependency):
-    user = authenticate_user(form_data.username, form_data.password, db)
+async def login_for_token(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: async_db_dependency):
+    user = await authenticate_user(form_data.username, form_data.password, db)
 
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f'Could not validate user.')
     
-    token = create_access_token(user.email, user.u_id, timedelta(minutes=20))
+    return issue_tokens(user)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(refresh_request: RefreshRequest, db: async_db_dependency):
+    """
+    Trades a valid refresh token for a new access token (and a new refresh
+    token), so clients stay signed in without sending the password again.
+    """
+    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate refresh token.')
+    try:
+        payload = jwt.decode(refresh_request.refresh_token, SECRET_KEY, algorithms=[AlGORITHM])
+        if payload.get('type') != 'refresh':
+            raise credentials_exception
+        token_data = TokenData(**payload)
+    except (JWTError, Exception):
+        raise credentials_exception
 
-    return{'access_token': token, 'token_type': 'bearer'}
-    
-def authenticate_user(email: str, password: str, db):
+    user = await db.get(db_model.User, token_data.id)
+    if user is None:
+        raise credentials_exception
+
+    return issue_tokens(user)
+
+async def authenticate_user(email: str, password: str, db: AsyncSession):
     
-    user = db.query(db_model.User).filter(db_model.User.email == email).first()
+    user = (await db.execute(select(db_model.User).filter(db_model.User.email == email))).scalars().first()
     if not user:
         return False
 
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return False
     
     return user
 
-def create_access_token(email: str, u_id: uuid.UUID, expires_delta: timedelta):
-    encode = {'id': str(u_id)}
+def issue_tokens(user: db_model.User) -> dict:
+    access_token = create_access_token(user.email, user.u_id, timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    refresh_token = create_access_token(user.email, user.u_id, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS), token_type='refresh')
+
+    return {'access_token': access_token, 'token_type': 'bearer', 'refresh_token': refresh_token}
+
+def create_access_token(email: str, u_id: uuid.UUID, expires_delta: timedelta, token_type: str = 'access'):
+    encode = {'id': str(u_id), 'type': token_type}
 
     expires = datetime.now(timezone.utc) + expires_delta
     encode.update({'exp': expires})
 
     return jwt.encode(encode, SECRET_KEY, algorithm=AlGORITHM)
 
-def get_current_user(token: Annotated[str, Depends(ouath2_bearer)], db: db_dependency):
+async def get_current_user(token: Annotated[str, Depends(ouath2_bearer)], db: async_db_dependency) -> UserPrincipal:
     
     credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                                           detail="Could not validate credentials",
@@ -113,21 +187,33 @@ def get_current_user(token: Annotated[str, Depends(ouath2_bearer)], db: db_depen
                                           )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[AlGORITHM])
+        # refresh tokens are only accepted by /auth/refresh
+        if payload.get('type') == 'refresh':
+            raise credentials_exception
         
         token_data = TokenData(**payload)
 
     except (JWTError, Exception):
         raise credentials_exception
         
-    user = db.query(db_model.User).filter(db_model.User.u_id == token_data.id).first()
+    principal = user_cache.get(token_data.id)
+    if principal is not None:
+        return principal
+
+    user = await db.get(db_model.User, token_data.id)
     
     if user is None:
         raise credentials_exception
     
-    return user
+    principal = UserPrincipal.model_validate(user)
+    user_cache.set(token_data.id, principal)
+    
+    return principal
+
+CurrentUser = Annotated[UserPrincipal, Depends(get_current_user)]
 
 def check_user_role(required_role: str):
-    def role_checker(current_user: Annotated[db_model.User, Depends(get_current_user)]):
+    async def role_checker(current_user: CurrentUser):
         if current_user.role != required_role:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Not authorized. User must have the role '{required_role}'.",)
         
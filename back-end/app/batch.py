@@ -0,0 +1,36 @@
+from decimal import Decimal
+from typing import List
+from pydantic import BaseModel
+
+# Documents accepted per batch call
+MAX_BATCH_SIZE = 500
+
+class BatchError(BaseModel):
+    index: int # position of the document in the request
+    detail: str
+
+class BatchCreated(BaseModel):
+    index: int
+    id: int
+    number: str
+
+class BatchCreateResponse(BaseModel):
+    created: List[BatchCreated] = []
+    errors: List[BatchError] = []
+
+def document_totals(itemlist: list, vat: Decimal) -> tuple[Decimal, Decimal]:
+    """
+    Returns (grand_total, tax) for a document's items, or raises ValueError
+    with the same messages the single-document endpoints answer with.
+    """
+    if not itemlist:
+        raise ValueError("Document must contain at least one item.")
+
+    subtotal = Decimal('0.00')
+    for item in itemlist:
+        if item.quantity <= 0:
+            raise ValueError("Item quantity must be greater than zero.")
+        subtotal += Decimal(str(item.quantity)) * Decimal(str(item.unit_price))
+
+    tax_amount = subtotal * vat
+    return subtotal + tax_amount, tax_amount
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Thread-safe in-process cache with a per-entry time to live and LRU
+    eviction once `maxsize` entries are held.
+
+    Each worker process has its own copy, so invalidate() only reaches the
+    current process; the TTL bounds how stale the other workers can get.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        # caller holds self._lock
+        entry = self._data.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, expires = entry
+            if expires > time.monotonic():
+                self._data.move_to_end(key)
+                return value
+            del self._data[key]
+        return _MISSING
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def get_or_load(self, key, loader):
+        """
+        Read-through lookup: returns the cached value or stores and returns
+        `loader()`. Concurrent misses on one key wait for the single load in
+        flight instead of each running it. None results are not cached, and a
+        load that raced an invalidate() is returned but not stored.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                with self._lock:
+                    value = self._lookup(key)
+                    generation = self._generation
+                if value is not _MISSING:
+                    return value # loaded by the request we waited for
+
+                value = loader()
+                if value is not None:
+                    with self._lock:
+                        if generation == self._generation:
+                            self._store(key, value)
+                return value
+        finally:
+            with self._lock:
+                if self._loading.get(key) is key_lock:
+                    del self._loading[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        # caller holds self._lock
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
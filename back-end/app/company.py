@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from starlette import status
+
+from . import db_model
+from .cache import TTLCache
+from .database import get_db
+
+router = APIRouter(tags=['company'])
+
+DBDependency = Annotated[Session, Depends(get_db)]
+
+# The company profile and bank account are printed on every document but
+# change maybe once a year, so they are served from memory. invalidate()
+# only reaches this process; other workers pick up a change within the TTL.
+COMPANY_CACHE_TTL_SECONDS = float(os.getenv("COMPANY_CACHE_TTL_SECONDS", "300"))
+
+company_cache = TTLCache(maxsize=8, ttl=COMPANY_CACHE_TTL_SECONDS)
+
+PROFILE_KEY = "profile"
+BANK_ACCOUNT_KEY = "bank_account"
+
+class CompanyProfileResponse(BaseModel):
+    company_id: int
+    company_name: str
+    company_address: str
+    tax_id: str
+    phone: str
+    email: str
+
+    class Config:
+        from_attributes = True
+
+class CompanyBankAccountResponse(BaseModel):
+    bank_name: str
+    account_name: str
+    account_number: str
+    swift_code: str
+
+    class Config:
+        from_attributes = True
+
+class CachedBody:
+    """A serialized response and its ETag, derived from the content so every worker agrees on it."""
+    def __init__(self, model: BaseModel):
+        self.body = json.dumps(model.model_dump(mode="json"), separators=(",", ":")).encode()
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+
+def invalidate_company_cache():
+    """Drops the cached profile and bank account; call after committing a change to either."""
+    company_cache.clear()
+
+def _not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+def _cached_response(cached: CachedBody, if_none_match: Optional[str]) -> Response:
+    # no-cache: clients keep the body but revalidate, which costs a 304
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if _not_modified(if_none_match, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+@router.get("/company-profile", response_model=CompanyProfileResponse)
+def get_company_profile(db: DBDependency, if_none_match: Annotated[Optional[str], Header()] = None):
+    def load():
+        profile = db.query(db_model.CompanyProfile).first()
+        return CachedBody(CompanyProfileResponse.model_validate(profile)) if profile else None
+
+    cached = company_cache.get_or_load(PROFILE_KEY, load)
+    if cached is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Company profile has not been set up."
+        )
+    return _cached_response(cached, if_none_match)
+
+@router.get("/company-bank-account", response_model=CompanyBankAccountResponse)
+def get_company_bank_account(db: DBDependency, if_none_match: Annotated[Optional[str], Header()] = None):
+    """
+    Retrieve the default company bank account information.
+    """
+    def load():
+        # Fetch the bank account marked as default
+        account = db.query(db_model.CompanyBankAccount).filter(
+            db_model.CompanyBankAccount.is_default == True
+        ).first()
+        return CachedBody(CompanyBankAccountResponse.model_validate(account)) if account else None
+
+    cached = company_cache.get_or_load(BANK_ACCOUNT_KEY, load)
+    if cached is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Default company bank account has not been set up."
+        )
+    return _cached_response(cached, if_none_match)
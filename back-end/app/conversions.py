@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+from sqlalchemy import select, literal, values, column, Integer, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import db_model
+from . import numbering
+
+# --- Set-based document conversions ---
+# Each conversion is a fixed number of INSERT ... SELECT statements no matter
+# how many documents or items are involved. ON CONFLICT DO NOTHING on the
+# unique conversion keys makes a repeated or concurrent approval a no-op
+# instead of a duplicate.
+
+def _numbered(ids: list[int], numbers: list[str], id_name: str):
+    """A VALUES list pairing each source document id with its new number."""
+    return values(
+        column(id_name, Integer), column("number", String), name="numbered"
+    ).data(list(zip(ids, numbers)))
+
+async def quotations_to_invoices(db: AsyncSession, q_ids: list[int]) -> list[int]:
+    """Creates the invoice (and its items) for each quotation; returns the new i_ids."""
+    if not q_ids:
+        return []
+
+    numbers = await db.run_sync(numbering.next_numbers, numbering.INVOICE_PREFIX, len(q_ids))
+    numbered = _numbered(q_ids, numbers, "q_id")
+    Quotation = db_model.Quotation
+
+    new_invoices = (await db.execute(
+        insert(db_model.Invoice).from_select(
+            ["q_id", "u_id", "invoice_number", "customer_name", "customer_address", "payment_term", "status", "total", "tax"],
+            select(
+                Quotation.q_id, Quotation.u_id, numbered.c.number, Quotation.customer_name, Quotation.customer_address,
+                literal("Net 30 Days"), literal("Submitted"), Quotation.total, Quotation.tax
+            ).join(numbered, numbered.c.q_id == Quotation.q_id)
+        ).on_conflict_do_nothing(
+            index_elements=["q_id"]
+        ).returning(db_model.Invoice.i_id, db_model.Invoice.invoice_number)
+    )).all()
+
+    i_ids = [row.i_id for row in new_invoices]
+    if not i_ids:
+        print(f"Invoices for Quotation IDs {q_ids} already exist. No Worry")
+        return []
+
+    Invoice, QuotationItem = db_model.Invoice, db_model.QuotationItem
+    await db.execute(
+        insert(db_model.InvoiceItem).from_select(
+            ["i_id", "description", "quantity", "unit_price"],
+            select(Invoice.i_id, QuotationItem.description, QuotationItem.quantity, QuotationItem.unit_price)
+            .join(QuotationItem, QuotationItem.q_id == Invoice.q_id)
+            .filter(Invoice.i_id.in_(i_ids))
+            .order_by(Invoice.i_id, QuotationItem.item_id)
+        )
+    )
+
+    print(f"Successfully created Invoice NUm {', '.join(row.invoice_number for row in new_invoices)}!!!")
+    return i_ids
+
+async def invoices_to_receipts(db: AsyncSession, i_ids: list[int]) -> list[int]:
+    """Creates the pending receipt for each invoice; returns the new r_ids."""
+    if not i_ids:
+        return []
+
+    numbers = await db.run_sync(numbering.next_numbers, numbering.RECEIPT_PREFIX, len(i_ids))
+    numbered = _numbered(i_ids, numbers, "i_id")
+    Invoice = db_model.Invoice
+
+    new_receipts = (await db.execute(
+        insert(db_model.Receipt).from_select(
+            ["i_id", "u_id", "receipt_number", "payment_date", "payment_method", "status", "amount", "from_conversion"],
+            select(
+                Invoice.i_id, Invoice.u_id, numbered.c.number, literal(datetime.now(timezone.utc).date()),
+                literal("Bank Transfer"), literal("Pending"), Invoice.total, literal(True)
+            ).join(numbered, numbered.c.i_id == Invoice.i_id)
+        ).on_conflict_do_nothing(
+            index_elements=["i_id"], index_where=db_model.Receipt.from_conversion
+        ).returning(db_model.Receipt.r_id, db_model.Receipt.receipt_number)
+    )).all()
+
+    if not new_receipts:
+        print(f"Receipts for Invoice IDs {i_ids} already exist. No Worry")
+        return []
+
+    print(f"Successfully created Receipt Number:{', '.join(row.receipt_number for row in new_receipts)}!!!")
+    return [row.r_id for row in new_receipts]
@@ -1,5 +1,14 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import json
+import threading
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 import psycopg2
 from dotenv import load_dotenv
@@ -13,17 +22,231 @@ HOST = os.getenv("host")
 PORT = os.getenv("port")
 DBNAME = os.getenv("dbname")
 
-db_URL = f"postgresql+psycopg2://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}?sslmode=require"
+DB_SSLMODE = os.getenv("DB_SSLMODE", "require")
 
-engine = create_engine(db_URL)
+# --- Connection pool settings ---
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))     # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))     # seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "0"))          # connections opened at startup
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10")) # seconds for TCP + TLS handshake
+
+# --- Query timing ---
+# Off by default. The timing hooks are only registered when it is on, so a
+# disabled process pays for nothing beyond the statement counter.
+DB_QUERY_TIMING = os.getenv("DB_QUERY_TIMING", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))             # one statement
+SLOW_REQUEST_DB_MS = float(os.getenv("SLOW_REQUEST_DB_MS", "500"))   # all statements of a request
+SLOW_REQUEST_QUERIES = int(os.getenv("SLOW_REQUEST_QUERIES", "50"))  # statements per request
+SLOW_QUERY_LOG_CHARS = 2000
+
+db_URL = f"postgresql+psycopg2://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}?sslmode={DB_SSLMODE}"
+async_db_URL = f"postgresql+asyncpg://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}"
+
+class PoolWaitStats:
+  """Pool mixin that also records how long callers wait to get a connection."""
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self._stats_lock = threading.Lock()
+    self.checkouts = 0
+    self.timeouts = 0
+    self.wait_total = 0.0
+    self.wait_max = 0.0
+
+  def connect(self):
+    start = time.perf_counter()
+    try:
+      return super().connect()
+    except PoolTimeoutError:
+      with self._stats_lock:
+        self.timeouts += 1
+      raise
+    finally:
+      waited = time.perf_counter() - start
+      with self._stats_lock:
+        self.checkouts += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+
+class InstrumentedQueuePool(PoolWaitStats, QueuePool):
+  pass
+
+class InstrumentedAsyncQueuePool(PoolWaitStats, AsyncAdaptedQueuePool):
+  pass
+
+engine = create_engine(
+  db_URL,
+  poolclass=InstrumentedQueuePool,
+  pool_size=DB_POOL_SIZE,
+  max_overflow=DB_MAX_OVERFLOW,
+  pool_timeout=DB_POOL_TIMEOUT,
+  pool_recycle=DB_POOL_RECYCLE,
+  pool_pre_ping=DB_POOL_PRE_PING,
+  connect_args={"connect_timeout": DB_CONNECT_TIMEOUT},
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# asyncpg engine for the async routers. It has its own pool with the same
+# limits, so a worker process holds up to twice DB_POOL_SIZE + DB_MAX_OVERFLOW
+# connections while both stacks are in use.
+async_engine = create_async_engine(
+  async_db_URL,
+  poolclass=InstrumentedAsyncQueuePool,
+  pool_size=DB_POOL_SIZE,
+  max_overflow=DB_MAX_OVERFLOW,
+  pool_timeout=DB_POOL_TIMEOUT,
+  pool_recycle=DB_POOL_RECYCLE,
+  pool_pre_ping=DB_POOL_PRE_PING,
+  connect_args={"ssl": DB_SSLMODE, "timeout": DB_CONNECT_TIMEOUT},
+)
+
+# expire_on_commit=False: attributes stay readable after commit, since an
+# AsyncSession can't lazily reload them while the response is serialized.
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
 Base = declarative_base()
 
+class QueryStats:
+  """
+  SQL statements sent to the database within one scope. With DB_QUERY_TIMING
+  on, also the time spent in them and the slowest one.
+  """
+  def __init__(self):
+    self.count = 0
+    self.db_time = 0.0
+    self.slowest = 0.0
+    self.slowest_statement = None
+
+  def record(self, statement: str, elapsed: float):
+    self.db_time += elapsed
+    if elapsed > self.slowest:
+      self.slowest = elapsed
+      self.slowest_statement = statement
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+@contextmanager
+def count_queries():
+  """
+  Counts the statements executed by the current request (or test block).
+  The stats object is shared with threadpool workers through the copied context.
+  """
+  stats = QueryStats()
+  token = _query_stats.set(stats)
+  try:
+    yield stats
+  finally:
+    _query_stats.reset(token)
+
+@event.listens_for(engine, "before_cursor_execute")
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+  stats = _query_stats.get()
+  if stats is not None:
+    stats.count += 1
+
+def _ms(seconds: float) -> float:
+  return round(seconds * 1000, 3)
+
+def _one_line(statement: Optional[str]) -> Optional[str]:
+  if statement is None:
+    return None
+  return " ".join(statement.split())[:SLOW_QUERY_LOG_CHARS]
+
+def log_slow_query(statement: str, elapsed: float, executemany: bool = False):
+  """Writes one JSON line per slow statement. Parameters are left out, they may hold personal data."""
+  print(json.dumps({
+    "event": "slow_query",
+    "duration_ms": _ms(elapsed),
+    "executemany": executemany,
+    "statement": _one_line(statement),
+  }), flush=True)
+
+def log_slow_request(stats: QueryStats, method: str, route: str, status_code: int, elapsed: float):
+  """Writes one JSON line for a request over SLOW_REQUEST_DB_MS of DB time or SLOW_REQUEST_QUERIES statements."""
+  if stats.db_time * 1000 < SLOW_REQUEST_DB_MS and stats.count <= SLOW_REQUEST_QUERIES:
+    return
+  print(json.dumps({
+    "event": "slow_request_db",
+    "method": method,
+    "route": route,
+    "status": status_code,
+    "duration_ms": _ms(elapsed),
+    "queries": stats.count,
+    "db_ms": _ms(stats.db_time),
+    "slowest_ms": _ms(stats.slowest),
+    "slowest_statement": _one_line(stats.slowest_statement),
+  }), flush=True)
+
+def server_timing(stats: QueryStats, elapsed: float) -> str:
+  """Server-Timing header value: DB time with the statement count, slowest statement, whole request."""
+  return ", ".join([
+    f'db;dur={_ms(stats.db_time)};desc="{stats.count} queries"',
+    f"db-slowest;dur={_ms(stats.slowest)}",
+    f"app;dur={_ms(elapsed)}",
+  ])
+
+# Start times are kept per connection: a statement that fails never reaches
+# after_cursor_execute, so handle_error drops its entry.
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+  conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+  elapsed = time.perf_counter() - conn.info["query_start"].pop()
+  stats = _query_stats.get()
+  if stats is not None:
+    stats.record(statement, elapsed)
+  if elapsed * 1000 >= SLOW_QUERY_MS:
+    log_slow_query(statement, elapsed, executemany)
+
+def _drop_query_timer(exception_context):
+  conn = exception_context.connection
+  if conn is not None and conn.info.get("query_start"):
+    conn.info["query_start"].pop()
+
+if DB_QUERY_TIMING:
+  for _target in (engine, async_engine.sync_engine):
+    event.listen(_target, "before_cursor_execute", _start_query_timer)
+    event.listen(_target, "after_cursor_execute", _stop_query_timer)
+    event.listen(_target, "handle_error", _drop_query_timer)
+
+def warmup_pool(connections: int = DB_POOL_WARMUP):
+  """Opens connections up front so the first requests don't pay the TLS handshakes."""
+  connections = min(connections, DB_POOL_SIZE)
+  opened = [engine.connect() for _ in range(connections)]
+  for conn in opened:
+    conn.close()
+
+async def warmup_async_pool(connections: int = DB_POOL_WARMUP):
+  connections = min(connections, DB_POOL_SIZE)
+  opened = [await async_engine.connect() for _ in range(connections)]
+  for conn in opened:
+    await conn.close()
+
+def pool_stats(pool=None) -> dict:
+  if pool is None:
+    pool = engine.pool
+  return {
+    "size": pool.size(),
+    "checked_out": pool.checkedout(),
+    "idle": pool.checkedin(),
+    "overflow": max(pool.overflow(), 0),
+    "max_overflow": DB_MAX_OVERFLOW,
+    "checkouts": pool.checkouts,
+    "timeouts": pool.timeouts,
+    "wait_avg_ms": round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+    "wait_max_ms": round(pool.wait_max * 1000, 3),
+  }
+
 def get_db():
   db = SessionLocal()
   try:
     yield db
   finally:
-    db.close()
\ No newline at end of file
+    db.close()
+async def get_async_db():
+  async with AsyncSessionLocal() as db:
+    yield db
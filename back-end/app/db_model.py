@@ -1,9 +1,9 @@
 import uuid
-from sqlalchemy import Boolean, Column, Integer, String, Text, Date, DateTime, Numeric, ForeignKey, CheckConstraint, Index
+from sqlalchemy import Boolean, Column, Integer, String, Text, Date, DateTime, Numeric, ForeignKey, CheckConstraint, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, expression, text
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Computed
+from sqlalchemy import Computed, DDL, event
 from .database import Base
 
 class User(Base):
@@ -21,17 +21,17 @@ class User(Base):
         Index('idx_user_role', 'role'),
     )
     
-    quotations = relationship("Quotation", back_populates="user")
+    quotations = relationship("Quotation", back_populates="user", foreign_keys="Quotation.u_id")
     notifications = relationship("Notification", back_populates="user")
     logs = relationship("Log", back_populates="actor")
 
-    invoices = relationship("Invoice", back_populates="user")
-    receipts = relationship("Receipt", back_populates="user")
+    invoices = relationship("Invoice", back_populates="user", foreign_keys="Invoice.u_id")
+    receipts = relationship("Receipt", back_populates="user", foreign_keys="Receipt.u_id")
 
 class Quotation(Base):
     __tablename__ = "Quotations"
     q_id = Column(Integer, primary_key=True, index=True, name="q_id")
-    quotation_number = Column(String(50), nullable=False, default="Q-YYYYMMDD-000")
+    quotation_number = Column(String(50), nullable=False)
     customer_name = Column(String(100), nullable=False)
     customer_address = Column(Text, nullable=False)
     customer_email = Column(String(150), nullable=False)
@@ -41,22 +41,39 @@ class Quotation(Base):
     tax = Column(Numeric(12, 2), default=0.00)
     created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, default=func.now(), onupdate=func.now())
+    approver_id = Column(UUID(as_uuid=True), ForeignKey("Users.u_id", ondelete="SET NULL"), nullable=True)
+    approver_name = Column(String(100), nullable=True)
+    approved_at = Column(DateTime(timezone=True), nullable=True)
+    # optimistic concurrency: bumped by every UPDATE, exposed as the ETag
+    version = Column(Integer, nullable=False, default=1, server_default=text('1'))
     
     __table_args__ = (
         CheckConstraint(status.in_(['Draft', 'Submitted', 'Approved', 'Rejected']), name='ck_quotation_status'),
         Index('idx_quotation_status', 'status'),
+        Index('uq_quotation_number', 'quotation_number', unique=True),
+        # keyset pagination on (created_at, q_id), optionally narrowed by a filter column
+        Index('idx_quotation_created', 'created_at', 'q_id'),
+        Index('idx_quotation_status_created', 'status', 'created_at', 'q_id'),
+        Index('idx_quotation_owner_created', 'u_id', 'created_at', 'q_id'),
+        Index('idx_quotation_customer_created', 'customer_name', 'created_at', 'q_id'),
     )
 
-    user = relationship("User", back_populates="quotations")
+    __mapper_args__ = {"version_id_col": version}
+
+    user = relationship("User", back_populates="quotations", foreign_keys=[u_id])
     invoices = relationship("Invoice", back_populates="quotation")
 
     items = relationship("QuotationItem", back_populates="quotation", cascade="all, delete-orphan")
 
+    @property
+    def preparer_name(self):
+        return self.user.name if self.user else None
+
 class Invoice(Base):
     __tablename__ = "Invoices"
     i_id = Column(Integer, primary_key=True, index=True, name="i_id")
     q_id = Column(Integer, ForeignKey("Quotations.q_id", ondelete="SET NULL"), nullable=True)
-    invoice_number = Column(String(50), nullable=False, default="-YYYYMMDD-000")
+    invoice_number = Column(String(50), nullable=False)
     customer_name = Column(String(100), nullable=False)
     customer_address = Column(Text, nullable=False)
     payment_term = Column(String(150), nullable=False)
@@ -67,23 +84,44 @@ class Invoice(Base):
     created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
     updated_at = Column(DateTime(timezone=True), nullable=False, default=func.now(), onupdate=func.now())
     u_id = Column(UUID(as_uuid=True), ForeignKey("Users.u_id", ondelete="SET NULL"), nullable=True)
+    approver_id = Column(UUID(as_uuid=True), ForeignKey("Users.u_id", ondelete="SET NULL"), nullable=True)
+    approver_name = Column(String(100), nullable=True)
+    approved_at = Column(DateTime(timezone=True), nullable=True)
+    # optimistic concurrency: bumped by every UPDATE, exposed as the ETag
+    version = Column(Integer, nullable=False, default=1, server_default=text('1'))
     
     __table_args__ = (
         CheckConstraint(status.in_(['Draft', 'Submitted', 'Approved', 'Rejected', 'Paid']), name='ck_invoice_status'),
         Index('idx_invoice_status', 'status'),
+        Index('uq_invoice_number', 'invoice_number', unique=True),
+        Index('idx_invoice_created', 'created_at', 'i_id'),
+        Index('idx_invoice_status_created', 'status', 'created_at', 'i_id'),
+        Index('idx_invoice_owner_created', 'u_id', 'created_at', 'i_id'),
+        Index('idx_invoice_customer_created', 'customer_name', 'created_at', 'i_id'),
+        # at most one invoice per quotation; conversion relies on it for ON CONFLICT
+        Index('uq_invoice_quotation', 'q_id', unique=True),
+        # receivables aging: approved (unpaid) invoices by due date
+        Index('idx_invoice_receivable_due', 'due_date', postgresql_where=status == 'Approved',
+              postgresql_include=['i_id', 'total', 'customer_name', 'u_id']),
     )
+
+    __mapper_args__ = {"version_id_col": version}
     
     quotation = relationship("Quotation", back_populates="invoices")
     receipts = relationship("Receipt", back_populates="invoice")
-    user = relationship("User", back_populates="invoices")# relationship for triggers
+    user = relationship("User", back_populates="invoices", foreign_keys=[u_id])# relationship for triggers
 
     items = relationship("InvoiceItem", back_populates="invoice", cascade="all, delete-orphan") 
 
+    @property
+    def preparer_name(self):
+        return self.user.name if self.user else None
+
 class Receipt(Base):
     __tablename__ = "Receipts"
     r_id = Column(Integer, primary_key=True, index=True, name="r_id")
     i_id = Column(Integer, ForeignKey("Invoices.i_id", ondelete="SET NULL"), nullable=True)
-    receipt_number = Column(String(50), nullable=False, default="-YYYYMMDD-000")
+    receipt_number = Column(String(50), nullable=False)
     payment_date = Column(Date, nullable=False)
     amount = Column(Numeric(12, 2), nullable=False)
     status = Column(String(20), nullable=False, default='Pending')
@@ -91,14 +129,32 @@ class Receipt(Base):
     u_id = Column(UUID(as_uuid=True), ForeignKey("Users.u_id", ondelete="SET NULL"), nullable=True)
 
     payment_method = Column(String(20), )
+    created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    approver_id = Column(UUID(as_uuid=True), ForeignKey("Users.u_id", ondelete="SET NULL"), nullable=True)
+    approver_name = Column(String(100), nullable=True)
+    approved_at = Column(DateTime(timezone=True), nullable=True)
+    # optimistic concurrency: bumped by every UPDATE, exposed as the ETag
+    version = Column(Integer, nullable=False, default=1, server_default=text('1'))
+    # True for the receipt generated when the invoice was approved
+    from_conversion = Column(Boolean, nullable=False, default=False, server_default=expression.false())
     
     __table_args__ = (
         CheckConstraint(status.in_(['Pending', 'Approved', 'Rejected', 'Submitted']), name='ck_receipt_status'),
-        CheckConstraint(payment_method.in_(['Bank Transfer', 'Cash', 'Credit Card']))
+        CheckConstraint(payment_method.in_(['Bank Transfer', 'Cash', 'Credit Card'])),
+        Index('uq_receipt_number', 'receipt_number', unique=True),
+        Index('idx_receipt_created', 'created_at', 'r_id'),
+        Index('idx_receipt_status_created', 'status', 'created_at', 'r_id'),
+        Index('idx_receipt_owner_created', 'u_id', 'created_at', 'r_id'),
+        # one generated receipt per invoice; manual receipts are not limited
+        Index('uq_receipt_conversion', 'i_id', unique=True, postgresql_where=from_conversion),
+        # amounts paid per invoice for receivables aging
+        Index('idx_receipt_approved_invoice', 'i_id', postgresql_where=status == 'Approved', postgresql_include=['amount']),
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
     invoice = relationship("Invoice", back_populates="receipts")
-    user = relationship("User", back_populates="receipts")# Add relationship for triggers
+    user = relationship("User", back_populates="receipts", foreign_keys=[u_id])# Add relationship for triggers
 
 class Notification(Base):
     __tablename__ = "Notifications"
@@ -114,20 +170,54 @@ class Notification(Base):
     
     user = relationship("User", back_populates="notifications")
 
+class NotificationOutbox(Base):
+    __tablename__ = "NotificationOutbox"
+    o_id = Column(Integer, primary_key=True, index=True, name="o_id")
+    u_id = Column(UUID(as_uuid=True), ForeignKey("Users.u_id", ondelete="CASCADE"))
+    channel = Column(String(30), nullable=False)
+    recipient = Column(String(255), nullable=False) # line_user_id or email address
+    subject = Column(String(255), nullable=False)
+    message = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default='Pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        CheckConstraint(channel.in_(['LINE', 'Email']), name='ck_outbox_channel'),
+        CheckConstraint(status.in_(['Pending', 'Sent', 'Failed']), name='ck_outbox_status'),
+        # the worker only ever scans due, pending entries
+        Index('idx_outbox_pending_due', 'next_attempt_at', postgresql_where=(status == 'Pending')),
+    )
+
 class Log(Base):
     __tablename__ = "Logs"
-    l_id = Column(Integer, primary_key=True, index=True, name="l_id")
+    # range partitioned by month on timestamp, so the partition key is part of the primary key
+    l_id = Column(Integer, primary_key=True, autoincrement=True, name="l_id")
     action = Column(String(100), nullable=False)
     actor_id = Column(UUID(as_uuid=True), ForeignKey("Users.u_id", ondelete="SET NULL"), nullable=True)
     document_id = Column(Integer)
-    timestamp = Column(DateTime(timezone=True), nullable=False, default=func.now())
+    timestamp = Column(DateTime(timezone=True), primary_key=True, nullable=False, default=func.now(), server_default=func.now())
     
     __table_args__ = (
         Index('idx_log_actor', 'actor_id'),
+        # pattern ops so the action prefix filter (LIKE 'prefix%') can use it
+        Index('idx_log_document_action', 'document_id', 'action', postgresql_ops={'action': 'varchar_pattern_ops'}),
+        Index('idx_log_timestamp', 'timestamp'),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
   
     actor = relationship("User", back_populates="logs")
 
+# Rows outside every monthly partition land here; app.log_archive creates the
+# monthly partitions ahead of time and moves stray rows out of it.
+event.listen(
+    Log.__table__, "after_create",
+    DDL('CREATE TABLE IF NOT EXISTS "Logs_default" PARTITION OF "Logs" DEFAULT')
+)
+
 class CompanyProfile(Base):
     __tablename__ = "CompanyProfile"
     company_id = Column(Integer, primary_key=True, index=True)
@@ -146,6 +236,36 @@ class CompanyBankAccount(Base):
     swift_code = Column(String(20))
     is_default = Column(Boolean, default=True)
 
+class DocumentSequence(Base):
+    __tablename__ = "DocumentSequences"
+    prefix = Column(String(10), primary_key=True)
+    day = Column(Date, primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
+
+class DailyDocumentTotal(Base):
+    """
+    Per-day rollup of document counts and amounts, kept up to date by the
+    statement-level triggers of DataBase/migrations/008_daily_document_totals.sql.
+    Receipts are rolled up without a customer (it belongs to their invoice).
+    """
+    __tablename__ = "DailyDocumentTotals"
+    dt_id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    doc_type = Column(String(20), nullable=False)
+    status = Column(String(30), nullable=False)
+    u_id = Column(UUID(as_uuid=True), nullable=True)
+    customer_name = Column(String(100), nullable=True)
+    doc_count = Column(Integer, nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
+    tax = Column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        CheckConstraint(doc_type.in_(['Quotation', 'Invoice', 'Receipt']), name='ck_daily_totals_doc_type'),
+        # NULLS NOT DISTINCT (PostgreSQL 15+): buckets without an owner or customer still collide
+        UniqueConstraint('day', 'doc_type', 'status', 'u_id', 'customer_name', name='uq_daily_totals_bucket', postgresql_nulls_not_distinct=True),
+        Index('idx_daily_totals_owner', 'u_id', 'day'),
+    )
+
 class QuotationItem(Base):
     __tablename__ = "QuotationItems"
     item_id = Column(Integer, primary_key=True, index=True)
@@ -155,6 +275,11 @@ class QuotationItem(Base):
     unit_price = Column(Numeric(12, 2), nullable=False)
     total = Column(Numeric(12, 2), Computed("quantity * unit_price", persisted=True))
 
+    __table_args__ = (
+        # items are always loaded per document
+        Index('idx_quotation_item_quotation', 'q_id'),
+    )
+
     quotation = relationship("Quotation", back_populates="items")
 
 class InvoiceItem(Base):
@@ -165,5 +290,9 @@ class InvoiceItem(Base):
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Numeric(12, 2), nullable=False)
     total = Column(Numeric(12, 2), Computed("quantity * unit_price", persisted=True))
+
+    __table_args__ = (
+        Index('idx_invoice_item_invoice', 'i_id'),
+    )
     
     invoice = relationship("Invoice", back_populates="items")
@@ -0,0 +1,178 @@
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import Annotated, AsyncIterator
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from . import db_model
+from .auth import UserPrincipal, check_user_role
+from .database import async_engine
+from .logs import LogFilters, apply_log_filters
+from .pagination import DocumentFilters, apply_document_filters
+
+router = APIRouter(prefix='/export', tags=['export'])
+
+AdminUser = Annotated[UserPrincipal, Depends(check_user_role('Admin'))]
+
+# rows fetched per server-side cursor round trip, and encoded per chunk
+EXPORT_CHUNK_ROWS = 1000
+
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+def _jsonable(value):
+    if isinstance(value, Decimal):
+        return str(value) # amounts stay exact
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+async def _row_batches(stmt) -> AsyncIterator[list]:
+    """
+    Streams a query's rows in batches of EXPORT_CHUNK_ROWS over a server-side
+    cursor. The connection is opened here rather than taken from the request's
+    session, since the body is produced after the endpoint has returned.
+    """
+    async with async_engine.connect() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        async for batch in result.mappings().partitions():
+            yield batch
+
+async def _nest_items(batches, key: str, item_columns: list[str]) -> AsyncIterator[list]:
+    """
+    Folds header + item rows (ordered by `key`) into one record per document
+    with an `items` list. Only the document being assembled is held in memory.
+    """
+    current = None
+    async for batch in batches:
+        finished = []
+        for row in batch:
+            if current is None or current[key] != row[key]:
+                if current is not None:
+                    finished.append(current)
+                current = {column: value for column, value in row.items() if column not in item_columns}
+                current["items"] = []
+            if row[item_columns[0]] is not None:
+                current["items"].append({column: row[column] for column in item_columns})
+        if finished:
+            yield finished
+    if current is not None:
+        yield [current]
+
+async def _csv_chunks(columns: list[str], batches) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in batches:
+        for row in batch:
+            writer.writerow(["" if row[column] is None else _jsonable(row[column]) for column in columns])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+async def _ndjson_chunks(records) -> AsyncIterator[bytes]:
+    async for batch in records:
+        yield "".join(json.dumps(dict(record), default=_jsonable) + "\n" for record in batch).encode()
+
+async def _gzip_chunks(chunks) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) # gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def _export_response(name: str, fmt: ExportFormat, gzip: bool, chunks) -> StreamingResponse:
+    filename = f"{name}-{datetime.now(timezone.utc):%Y%m%d}.{fmt.value}"
+    media_type = "text/csv" if fmt == ExportFormat.csv else "application/x-ndjson"
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+INVOICE_ITEM_COLUMNS = ["item_id", "description", "quantity", "unit_price", "line_total"]
+
+@router.get("/invoices")
+async def export_invoices(current_user: AdminUser, filters: Annotated[DocumentFilters, Depends()], fmt: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.csv, gzip: bool = False):
+    """
+    Invoices with their items. CSV has one line per item (header fields
+    repeated); NDJSON has one invoice per line with an `items` array.
+    """
+    Invoice, Item = db_model.Invoice, db_model.InvoiceItem
+    preparer = aliased(db_model.User)
+
+    stmt = select(
+        Invoice.i_id, Invoice.invoice_number, Invoice.q_id, Invoice.status,
+        Invoice.customer_name, Invoice.customer_address, Invoice.payment_term,
+        Invoice.due_date, Invoice.created_at, preparer.name.label("preparer_name"),
+        Invoice.approver_name, Invoice.approved_at, Invoice.tax, Invoice.total,
+        Item.inv_item_id.label("item_id"), Item.description, Item.quantity,
+        Item.unit_price, Item.total.label("line_total"),
+    ).outerjoin(
+        Item, Item.i_id == Invoice.i_id
+    ).outerjoin(
+        preparer, preparer.u_id == Invoice.u_id
+    )
+    stmt = apply_document_filters(stmt, Invoice, filters).order_by(Invoice.created_at, Invoice.i_id, Item.inv_item_id)
+
+    batches = _row_batches(stmt)
+    if fmt == ExportFormat.csv:
+        chunks = _csv_chunks([column.name for column in stmt.selected_columns], batches)
+    else:
+        chunks = _ndjson_chunks(_nest_items(batches, "i_id", INVOICE_ITEM_COLUMNS))
+
+    return _export_response("invoices", fmt, gzip, chunks)
+
+@router.get("/receipts")
+async def export_receipts(current_user: AdminUser, filters: Annotated[DocumentFilters, Depends()], fmt: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.csv, gzip: bool = False):
+    Receipt, Invoice = db_model.Receipt, db_model.Invoice
+
+    stmt = select(
+        Receipt.r_id, Receipt.receipt_number, Receipt.status, Receipt.amount,
+        Receipt.payment_date, Receipt.payment_method, Receipt.created_at,
+        Receipt.approver_name, Receipt.approved_at, Receipt.i_id,
+        Invoice.invoice_number, Invoice.customer_name,
+    ).outerjoin(Invoice, Invoice.i_id == Receipt.i_id)
+    stmt = apply_document_filters(stmt, Receipt, filters, customer_col=Invoice.customer_name).order_by(Receipt.created_at, Receipt.r_id)
+
+    batches = _row_batches(stmt)
+    if fmt == ExportFormat.csv:
+        chunks = _csv_chunks([column.name for column in stmt.selected_columns], batches)
+    else:
+        chunks = _ndjson_chunks(batches)
+
+    return _export_response("receipts", fmt, gzip, chunks)
+
+@router.get("/logs")
+async def export_logs(current_user: AdminUser, filters: Annotated[LogFilters, Depends()], fmt: Annotated[ExportFormat, Query(alias="format")] = ExportFormat.csv, gzip: bool = False):
+    Log = db_model.Log
+
+    stmt = select(Log.l_id, Log.timestamp, Log.actor_id, Log.document_id, Log.action)
+    stmt = apply_log_filters(stmt, filters).order_by(Log.timestamp, Log.l_id)
+
+    batches = _row_batches(stmt)
+    if fmt == ExportFormat.csv:
+        chunks = _csv_chunks([column.name for column in stmt.selected_columns], batches)
+    else:
+        chunks = _ndjson_chunks(batches)
+
+    return _export_response("logs", fmt, gzip, chunks)
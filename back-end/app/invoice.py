@@ -2,20 +2,31 @@ from datetime import timedelta, datetime, timezone
 from decimal import Decimal
 from typing import Annotated, List, Optional
 import uuid
-from .auth import check_user_role, get_current_user
-from .database import get_db
+from .auth import CurrentUser, UserPrincipal, check_user_role
+from .database import get_async_db
 from . import notification_service
-from fastapi import APIRouter, Depends, HTTPException 
+from . import metrics
+from . import loaders
+from . import numbering
+from . import items
+from . import conversions
+from . import transitions
+from . import versioning
+from .transitions import BulkTransitionRequest, BulkTransitionResponse
+from .versioning import IfMatch
+from .batch import MAX_BATCH_SIZE, BatchCreateResponse, BatchCreated, BatchError, document_totals
+from .pagination import PageParams, DocumentFilters, apply_document_filters, keyset, finish_page
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from starlette import status
 from . import db_model
 
 router = APIRouter(prefix='/invoice', tags=['invoice'])
 
-DBDependency = Annotated[Session, Depends(get_db)]
-CurrentUser = Annotated[db_model.User, Depends(get_current_user)]
+DBDependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 class UserBase(BaseModel):
   u_id: uuid.UUID
@@ -32,7 +43,6 @@ class InvoiceItemBase(BaseModel):
   unit_price: float
 
 class InvoiceCreate(BaseModel):
-  invoice_number: str
   customer_name: str
   customer_address: str
   payment_term: str
@@ -43,21 +53,28 @@ class InvoiceCreate(BaseModel):
   class Config:
     from_attributes = True
 
+class InvoiceBatchCreate(BaseModel):
+  documents: List[InvoiceCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class InvoiceItemUpdate(InvoiceItemBase):
+  item_id: Optional[int] = None # inv_item_id of a stored item, omit for new items
+
 class InvoiceUpdate(BaseModel):
   customer_name: str
   customer_address: str 
   payment_term: str
-  itemlist: List[InvoiceItemBase]
+  itemlist: List[InvoiceItemUpdate]
 
   class Config:
     from_attributes = True
 
 class InvoiceItemResponse(InvoiceItemBase):
-  item_id: int = Field(..., alias='inv_item_id') # Use the alias for 'inv_item_id'
+  # read from inv_item_id, sent as item_id like quotation items, so edit
+  # pages can hand it back in InvoiceItemUpdate.item_id
+  item_id: int = Field(..., validation_alias='inv_item_id')
   total: float
   class Config:
     from_attributes = True
-    populate_by_name = True # Add this to enable the alias
 
 class InvoiceBase(BaseModel):
   i_id: int
@@ -72,7 +89,8 @@ class InvoiceBase(BaseModel):
   u_id: uuid.UUID | None = None
   preparer_name: Optional[str] = None
   approver_name: Optional[str] = None
-  approved_date: Optional[datetime] = None
+  approved_date: Optional[datetime] = Field(None, validation_alias='approved_at')
+  version: int
   class Config:
     from_attributes = True
 
@@ -85,34 +103,8 @@ class InvoiceNumberResponse(BaseModel):
 
 vat = Decimal('0.07')
 
-def invoice2receipt(invoice: db_model.Invoice, db: Session):
-
-    check_receipt = db.query(db_model.Receipt).filter(db_model.Receipt.i_id == invoice.i_id).first()
-    
-    if check_receipt:
-        print(f"Receipt for Invoice num {invoice.invoice_number} already exists. No Worry")
-        return check_receipt
-    
-    invoice_num_suffix = invoice.invoice_number.replace("INV-", "")
-
-    db_receipt = db_model.Receipt(
-      i_id = invoice.i_id,
-      u_id = invoice.u_id,
-      receipt_number = f"RC-{invoice_num_suffix}",
-      payment_date = datetime.now(timezone.utc),
-      payment_method = 'Bank Transfer',
-      status = 'Pending',
-      amount = invoice.total,
-      )
-    
-    db.add(db_receipt)
-    db.flush()
-            
-    print(f"Successfully created Receipt Number:{db_receipt.receipt_number}!!!")
-    return db_receipt
-
 @router.post("/", response_model=InvoiceResponse, status_code=status.HTTP_201_CREATED)
-def create_invoice(invoice_data: InvoiceCreate, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]): 
+async def create_invoice(invoice_data: InvoiceCreate, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))]): 
   
   subtotal = Decimal('0.00')
     
@@ -139,7 +131,6 @@ def create_invoice(invoice_data: InvoiceCreate, db: DBDependency, current_user:
   db_invoice = db_model.Invoice(
     q_id = invoice_data.q_id, 
     u_id = current_user.u_id, 
-    invoice_number = invoice_data.invoice_number,
     customer_name = invoice_data.customer_name,
     customer_address = invoice_data.customer_address,
     payment_term = invoice_data.payment_term,
@@ -149,8 +140,9 @@ def create_invoice(invoice_data: InvoiceCreate, db: DBDependency, current_user:
     )
  
   try:
+    db_invoice.invoice_number = await db.run_sync(numbering.next_number, numbering.INVOICE_PREFIX)
     db.add(db_invoice)
-    db.flush()
+    await db.flush()
     
     for item_data in invoice_data.itemlist:
       db_item = db_model.InvoiceItem(
@@ -161,55 +153,147 @@ def create_invoice(invoice_data: InvoiceCreate, db: DBDependency, current_user:
         )
       db.add(db_item)
 
-    db.commit() 
-    db.refresh(db_invoice)
+    await db.commit() 
  
-  except IntegrityError: 
-    db.rollback()
+  except IntegrityError as e: 
+    await db.rollback()
+    print(f"Integrity error inserting invoice: {e}")
     raise HTTPException(
         status_code=400, 
-        detail=f"An invoice with ID '{invoice_data.invoice_number}' already exists."
+        detail="Invoice violates a database constraint (check the referenced quotation)."
     )
   except Exception as e:
-    db.rollback()
+    await db.rollback()
     print(f"Error inserting invoice and items: {e}") 
     raise HTTPException(status_code=500, detail="Could not create invoice due to a database error.")
 
+  db_invoice = await loaders.get_invoice(db, db_model.Invoice.i_id == db_invoice.i_id)
+
   db_invoice.total = float(db_invoice.total)
   db_invoice.tax = float(db_invoice.tax) if db_invoice.tax is not None else 0.0
     
   return db_invoice
 
+@router.post("/batch", response_model=BatchCreateResponse)
+async def create_invoices_batch(batch: InvoiceBatchCreate, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))]):
+    """
+    Creates many invoices in one transaction with one multi-row INSERT for the
+    headers and one for the items. Invalid documents (bad items, unknown
+    quotation) are reported by index and skipped; the rest are still created.
+    """
+    result = BatchCreateResponse()
+    headers, itemlists = [], []
+
+    referenced = {invoice_data.q_id for invoice_data in batch.documents if invoice_data.q_id is not None}
+    known_quotations, invoiced = set(), set()
+    if referenced:
+        known_quotations = set((await db.execute(
+            select(db_model.Quotation.q_id).filter(db_model.Quotation.q_id.in_(referenced))
+        )).scalars().all())
+        # a quotation can have only one invoice
+        invoiced = set((await db.execute(
+            select(db_model.Invoice.q_id).filter(db_model.Invoice.q_id.in_(referenced))
+        )).scalars().all())
+
+    for index, invoice_data in enumerate(batch.documents):
+        try:
+            grand_total, tax_amount = document_totals(invoice_data.itemlist, vat)
+        except ValueError as e:
+            result.errors.append(BatchError(index=index, detail=str(e)))
+            continue
+
+        if invoice_data.q_id is not None and invoice_data.q_id not in known_quotations:
+            result.errors.append(BatchError(index=index, detail=f"Quotation ID:{invoice_data.q_id} not found."))
+            continue
+
+        if invoice_data.q_id in invoiced:
+            result.errors.append(BatchError(index=index, detail=f"Quotation ID:{invoice_data.q_id} already has an invoice."))
+            continue
+        if invoice_data.q_id is not None:
+            invoiced.add(invoice_data.q_id)
+
+        headers.append(dict(
+            q_id = invoice_data.q_id,
+            u_id = current_user.u_id,
+            customer_name = invoice_data.customer_name,
+            customer_address = invoice_data.customer_address,
+            payment_term = invoice_data.payment_term,
+            status = 'Submitted' if invoice_data.status == 'Submitted' else 'Draft',
+            total = grand_total,
+            tax = tax_amount
+        ))
+        itemlists.append((index, invoice_data.itemlist))
+
+    if not headers:
+        return result
+
+    try:
+        numbers = await db.run_sync(numbering.next_numbers, numbering.INVOICE_PREFIX, len(headers))
+        for header, number in zip(headers, numbers):
+            header['invoice_number'] = number
+
+        i_ids = (await db.execute(
+            insert(db_model.Invoice).returning(db_model.Invoice.i_id, sort_by_parameter_order=True),
+            headers
+        )).scalars().all()
+
+        await db.execute(insert(db_model.InvoiceItem), [
+            dict(
+                i_id = i_id,
+                description = item_data.description,
+                quantity = item_data.quantity,
+                unit_price = Decimal(str(item_data.unit_price))
+            )
+            for i_id, (_, itemlist) in zip(i_ids, itemlists)
+            for item_data in itemlist
+        ])
+
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"Error inserting invoice batch: {e}")
+        raise HTTPException(status_code=500, detail="Could not create invoices due to a database error.")
+
+    result.created = [
+        BatchCreated(index=index, id=i_id, number=number)
+        for (index, _), i_id, number in zip(itemlists, i_ids, numbers)
+    ]
+
+    return result
+
 @router.get("/me", response_model=List[InvoiceResponse])
-def get_user_invoices(db: DBDependency, current_user: CurrentUser):
-    invoices = db.query(db_model.Invoice).options(
-        joinedload(db_model.Invoice.items)
-    ).filter(
-        db_model.Invoice.u_id == current_user.u_id
-    ).all()
+async def get_user_invoices(response: Response, db: DBDependency, current_user: CurrentUser, page: Annotated[PageParams, Depends()], filters: Annotated[DocumentFilters, Depends()]):
+    filters.owner_id = current_user.u_id
+    query = apply_document_filters(select(db_model.Invoice), db_model.Invoice, filters)
+    invoices = (await db.execute(
+        keyset(query, page, db_model.Invoice.created_at, db_model.Invoice.i_id).options(*loaders.invoice_options())
+    )).scalars().all()
+    invoices = finish_page(invoices, page, 'i_id', response)
     
     return invoices
 
 @router.get("/", response_model=List[InvoiceResponse])
-def get_all_invoices(db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('Admin'))]):
-    invoices = db.query(db_model.Invoice).options(
-        joinedload(db_model.Invoice.items)
-    ).all()
+async def get_all_invoices(response: Response, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('Admin'))], page: Annotated[PageParams, Depends()], filters: Annotated[DocumentFilters, Depends()]):
+    query = apply_document_filters(select(db_model.Invoice), db_model.Invoice, filters)
+    invoices = (await db.execute(
+        keyset(query, page, db_model.Invoice.created_at, db_model.Invoice.i_id).options(*loaders.invoice_options())
+    )).scalars().all()
+    invoices = finish_page(invoices, page, 'i_id', response)
     
     return invoices
 
 @router.put("/{invoice_id}", response_model=InvoiceResponse, status_code=status.HTTP_200_OK)
-def invoice_edit(invoice_id: int, invoice_update: InvoiceUpdate, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]):
+async def invoice_edit(invoice_id: int, invoice_update: InvoiceUpdate, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))], response: Response, if_match: IfMatch = None):
     
-    invoice = db.query(db_model.Invoice).options(
-        joinedload(db_model.Invoice.items)
-    ).filter(db_model.Invoice.i_id == invoice_id).first()
+    invoice = await db.get(db_model.Invoice, invoice_id)
     
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
-    
+
     if invoice.u_id != current_user.u_id:
         raise HTTPException(status_code=403, detail="You do not have permission to edit this invoice.")
+
+    versioning.check_if_match(if_match, invoice, "Invoice")
     
     if invoice.status != 'Draft':
         raise HTTPException(
@@ -236,121 +320,132 @@ def invoice_edit(invoice_id: int, invoice_update: InvoiceUpdate, db: DBDependenc
 
     invoice.total = grand_total
     invoice.tax = tax_amount
+    # touch the header so the versioned UPDATE runs even for item-only edits
+    invoice.updated_at = func.now()
     
     try:
-      db.query(db_model.InvoiceItem).filter(db_model.InvoiceItem.i_id == invoice.i_id).delete(synchronize_session=False)
-      db.flush()
-
-      for item_data in invoice_update.itemlist:
-          db_item = db_model.InvoiceItem(
-              i_id = invoice.i_id,
-              description = item_data.description,
-              quantity = item_data.quantity,
-              unit_price = Decimal(str(item_data.unit_price))
-          )
-          db.add(db_item)
-
-      db.commit()
-      db.refresh(invoice)
+      await items.sync_items(db, db_model.InvoiceItem, 'inv_item_id', 'i_id', invoice.i_id, invoice_update.itemlist)
+
+      await versioning.commit(db, "Invoice")
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error updating invoice items: {e}")
         raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
     
+    invoice = await loaders.get_invoice(db, db_model.Invoice.i_id == invoice.i_id)
     invoice.total = float(invoice.total)
     invoice.tax = float(invoice.tax) if invoice.tax is not None else 0.0
 
+    versioning.set_etag(response, invoice)
     return invoice
 
 @router.put("/{invoice_id}/submit", response_model=InvoiceResponse, status_code=status.HTTP_200_OK)
-def invoice_submit(invoice_id: int, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]):
+async def invoice_submit(invoice_id: int, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))], response: Response, if_match: IfMatch = None):
     
-    invoice = db.query(db_model.Invoice).options(
-        joinedload(db_model.Invoice.items)
-    ).filter(db_model.Invoice.i_id == invoice_id).first()
+    invoice = await loaders.get_invoice(db, db_model.Invoice.i_id == invoice_id)
     
     if not invoice:
       raise HTTPException(status_code=404, detail="Invoice not found")
+
+    if invoice.u_id != current_user.u_id:
+      raise HTTPException(status_code=403, detail="You do not have permission to submit this invoice.")
+
+    versioning.check_if_match(if_match, invoice, "Invoice")
     
     if invoice.status != 'Draft':
       raise HTTPException(status_code=400, detail=f"Invoice cannot be submitted. Current status is '{invoice.status}'.")
         
+    message = f"Invoice {invoice.invoice_number} (Total: {invoice.total}) has been submitted for approval by {current_user.name}."
+    subject = f"Approval Required: Invoice {invoice.invoice_number}"
+    
     try:
       invoice.status = 'Submitted'
-      db.commit()
-      db.refresh(invoice)
+      
+      admins = (await db.execute(select(db_model.User).filter(db_model.User.role == 'Admin'))).scalars().all()
+      await db.run_sync(notification_service.enqueue_bulk_notification, admins, message, subject)
+      
+      await versioning.commit(db, "Invoice")
+    except HTTPException:
+      raise
     except Exception as e:
-      db.rollback()
+      await db.rollback()
       raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
     
-    message = f"Invoice {invoice.invoice_number} (Total: {invoice.total}) has been submitted for approval by {current_user.name}."
-    subject = f"Approval Required: Invoice {invoice.invoice_number}"
-    
-    admins = db.query(db_model.User).filter(db_model.User.role == 'Admin').all()
-    for admin in admins:
-      notification_service.dispatch_notification(
-        db=db,
-        user=admin,
-        message=message,
-        subject=subject
-        )
-    
+    metrics.record_transition('Invoice', 'Draft', 'Submitted')
+    versioning.set_etag(response, invoice)
     return invoice
 
+@router.post("/bulk-approve", response_model=BulkTransitionResponse)
+async def invoices_bulk_approve(request: BulkTransitionRequest, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('Admin'))]):
+    return await transitions.bulk_transition(
+        db, db_model.Invoice, 'i_id', 'invoice_number', 'total', 'Invoice', 'Submitted',
+        request, current_user, on_approved=conversions.invoices_to_receipts
+    )
+
 @router.put("/{invoice_id}/approve", response_model=InvoiceResponse)
-def invoice_approve(invoice_id: int, status: str, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('Admin'))]):
+async def invoice_approve(invoice_id: int, status: str, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('Admin'))], response: Response, if_match: IfMatch = None):
  
-  invoice = db.query(db_model.Invoice).options(
-        joinedload(db_model.Invoice.items)
-  ).filter(db_model.Invoice.i_id == invoice_id).first()
+  invoice = await loaders.get_invoice(db, db_model.Invoice.i_id == invoice_id)
  
   if not invoice:
     raise HTTPException(status_code=404, detail="Invoice not found")
 
+  versioning.check_if_match(if_match, invoice, "Invoice")
+
   if invoice.status != 'Submitted':
     raise HTTPException(status_code=400, detail=f"Invoice cannot be Approved. Current status is '{invoice.status}'.")
  
-  target_user = db.query(db_model.User).filter(db_model.User.u_id == invoice.u_id).first()
+  target_user = invoice.user
 
   if status == 'Approved':
     try:
-      invoice2receipt(invoice, db)
+      await conversions.invoices_to_receipts(db, [invoice.i_id])
       invoice.status = 'Approved'
-      db.commit()
-      db.refresh(invoice)
+      invoice.approver_id = current_user.u_id
+      invoice.approver_name = current_user.name
+      invoice.approved_at = datetime.now(timezone.utc)
+      if target_user:
+        message = f"Good news! Your Invoice {invoice.invoice_number} (Total: {invoice.total}) has been APPROVED by admin."
+        subject = f"Your Invoice {invoice.invoice_number} was Approved"
+        await db.run_sync(notification_service.enqueue_notification, target_user, message, subject)
+      await versioning.commit(db, "Invoice")
+    except HTTPException:
+      raise
     except Exception as e:
-      db.rollback()
+      await db.rollback()
       raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
     
-    if target_user:
-      message = f"Good news! Your Invoice {invoice.invoice_number} (Total: {invoice.total}) has been APPROVED by admin."
-      subject = f"Your Invoice {invoice.invoice_number} was Approved"
-      notification_service.dispatch_notification(db, target_user, message, subject)
+    metrics.record_transition('Invoice', 'Submitted', 'Approved')
+    versioning.set_etag(response, invoice)
     return invoice
         
   if status == 'Rejected':
     try:
       invoice.status = 'Rejected'
-      db.commit()
-      db.refresh(invoice)
+      if target_user:
+        message = f"Update: Your Invoice {invoice.invoice_number} (Total: {invoice.total}) has been REJECTED by admin."
+        subject = f"Your Invoice {invoice.invoice_number} was Rejected"
+        await db.run_sync(notification_service.enqueue_notification, target_user, message, subject)
+      await versioning.commit(db, "Invoice")
+    except HTTPException:
+      raise
     except Exception as e:
-      db.rollback()
+      await db.rollback()
       raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
       
-    if target_user:
-      message = f"Update: Your Invoice {invoice.invoice_number} (Total: {invoice.total}) has been REJECTED by admin."
-      subject = f"Your Invoice {invoice.invoice_number} was Rejected"
-      notification_service.dispatch_notification(db, target_user, message, subject)
+    metrics.record_transition('Invoice', 'Submitted', 'Rejected')
+    versioning.set_etag(response, invoice)
     return invoice
   
   raise HTTPException(status_code=400, detail="Invalid status provided. Must be 'Approved' or 'Rejected'.")
     
 @router.get("/{invoice_id}", response_model=InvoiceResponse, status_code=status.HTTP_200_OK)
-def get_invoice(invoice_id: int, db: DBDependency, current_user: CurrentUser):
+async def get_invoice(invoice_id: int, db: DBDependency, current_user: CurrentUser, response: Response):
 
-    invoice = db.query(db_model.Invoice).options(
-        joinedload(db_model.Invoice.items)
-    ).filter(db_model.Invoice.i_id == invoice_id).first()
+    invoice = await loaders.get_invoice(db, db_model.Invoice.i_id == invoice_id)
 
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
@@ -361,14 +456,13 @@ def get_invoice(invoice_id: int, db: DBDependency, current_user: CurrentUser):
     invoice.total = float(invoice.total)
     invoice.tax = float(invoice.tax) if invoice.tax is not None else 0.0
     
+    versioning.set_etag(response, invoice)
     return invoice
 
 @router.get("/number/{invoice_number}", response_model=InvoiceResponse, status_code=status.HTTP_200_OK)
-def get_invoice_by_number(invoice_number: str, db: DBDependency, current_user: CurrentUser):
+async def get_invoice_by_number(invoice_number: str, db: DBDependency, current_user: CurrentUser, response: Response):
 
-    invoice = db.query(db_model.Invoice).options(
-        joinedload(db_model.Invoice.items)
-    ).filter(db_model.Invoice.invoice_number == invoice_number).first()
+    invoice = await loaders.get_invoice(db, db_model.Invoice.invoice_number == invoice_number)
 
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
@@ -376,42 +470,27 @@ def get_invoice_by_number(invoice_number: str, db: DBDependency, current_user: C
     if current_user.role != 'Admin' and invoice.u_id != current_user.u_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this invoice")
     
-    preparer_name = invoice.user.name if invoice.user else None
-    
-    approver_name = None
-    approved_date = None
-    if invoice.status == 'Approved':
-        log_entry = db.query(db_model.Log)\
-            .filter(db_model.Log.document_id == invoice.i_id, db_model.Log.action == 'Approved')\
-            .order_by(db_model.Log.timestamp.desc())\
-            .first()
-        
-        if log_entry and log_entry.actor:
-            approver_name = log_entry.actor.name
-            approved_date = log_entry.timestamp
     
     invoice.total = float(invoice.total)
     invoice.tax = float(invoice.tax) if invoice.tax is not None else 0.0
-
-    response_data = invoice.__dict__
-    response_data['preparer_name'] = preparer_name
-    response_data['approver_name'] = approver_name
-    response_data['approved_date'] = approved_date
     
-    return InvoiceResponse(**response_data)
+    versioning.set_etag(response, invoice)
+    return invoice
 
 @router.put("/number/{invoice_number}", response_model=InvoiceResponse, status_code=status.HTTP_200_OK)
-def invoice_edit_by_number(invoice_number: str, invoice_update: InvoiceUpdate, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]):
+async def invoice_edit_by_number(invoice_number: str, invoice_update: InvoiceUpdate, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))], response: Response, if_match: IfMatch = None):
     
-    invoice = db.query(db_model.Invoice).options(
-        joinedload(db_model.Invoice.items)
-    ).filter(db_model.Invoice.invoice_number == invoice_number).first()
+    invoice = (await db.execute(
+        select(db_model.Invoice).filter(db_model.Invoice.invoice_number == invoice_number)
+    )).scalars().first()
     
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
-    
+
     if invoice.u_id != current_user.u_id:
         raise HTTPException(status_code=403, detail="You do not have permission to edit this invoice.")
+
+    versioning.check_if_match(if_match, invoice, "Invoice")
     
     if invoice.status != 'Draft':
         raise HTTPException(
@@ -436,42 +515,40 @@ def invoice_edit_by_number(invoice_number: str, invoice_update: InvoiceUpdate, d
 
     invoice.total = grand_total
     invoice.tax = tax_amount
+    # touch the header so the versioned UPDATE runs even for item-only edits
+    invoice.updated_at = func.now()
     
     try:
-      db.query(db_model.InvoiceItem).filter(db_model.InvoiceItem.i_id == invoice.i_id).delete(synchronize_session=False)
-      db.flush() 
-
-      for item_data in invoice_update.itemlist:
-          db_item = db_model.InvoiceItem(
-              i_id = invoice.i_id,
-              description = item_data.description,
-              quantity = item_data.quantity,
-              unit_price = Decimal(str(item_data.unit_price))
-          )
-          db.add(db_item)
-
-      db.commit()
-      db.refresh(invoice)
+      await items.sync_items(db, db_model.InvoiceItem, 'inv_item_id', 'i_id', invoice.i_id, invoice_update.itemlist)
+
+      await versioning.commit(db, "Invoice")
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error updating invoice items: {e}")
         raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
     
+    invoice = await loaders.get_invoice(db, db_model.Invoice.i_id == invoice.i_id)
     invoice.total = float(invoice.total)
     invoice.tax = float(invoice.tax) if invoice.tax is not None else 0.0
 
+    versioning.set_etag(response, invoice)
     return invoice
 
 @router.delete("/{invoice_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_invoice(invoice_id: int, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]):
+async def delete_invoice(invoice_id: int, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))], if_match: IfMatch = None):
     
-    invoice = db.query(db_model.Invoice).filter(db_model.Invoice.i_id == invoice_id).first()
+    invoice = await db.get(db_model.Invoice, invoice_id)
     
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
- 
+
     if invoice.u_id != current_user.u_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this invoice.")
+
+    versioning.check_if_match(if_match, invoice, "Invoice")
     
     if invoice.status not in ['Draft', 'Submitted', 'Rejected']:
         raise HTTPException(
@@ -479,18 +556,28 @@ def delete_invoice(invoice_id: int, db: DBDependency, current_user: Annotated[db
         )
 
     try:
-        db.delete(invoice)
-        db.commit()
+        # items cascade and receipts are detached by the foreign keys themselves
+        deleted = await db.execute(
+            delete(db_model.Invoice).filter(db_model.Invoice.i_id == invoice_id, db_model.Invoice.version == invoice.version)
+        )
+        if deleted.rowcount == 0:
+            await db.rollback()
+            raise versioning.conflict("Invoice")
+        await db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error during deletion: {e}")
 
     return
 
 @router.get("/by_quotation/{quotation_id}", response_model=InvoiceNumberResponse)
-def get_invoice_by_quotation_id(quotation_id: int, db: DBDependency, current_user: CurrentUser):
+async def get_invoice_by_quotation_id(quotation_id: int, db: DBDependency, current_user: CurrentUser):
     
-    invoice = db.query(db_model.Invoice).filter(db_model.Invoice.q_id == quotation_id).first()
+    invoice = (await db.execute(
+        select(db_model.Invoice).filter(db_model.Invoice.q_id == quotation_id)
+    )).scalars().first()
 
     if not invoice:
         raise HTTPException(status_code=404, detail="No invoice found for this quotation ID.")
@@ -0,0 +1,58 @@
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+async def sync_items(db: AsyncSession, model, id_attr: str, parent_attr: str, parent_id: int, itemlist: list):
+    """
+    Brings a document's item rows in line with an edit payload.
+
+    Payload items that carry an `item_id` update that stored row (only when a
+    field actually changed), items without one are inserted, and stored rows
+    missing from the payload are deleted. Each kind of change goes out as one
+    bulk statement, so unchanged rows are never rewritten.
+    """
+    id_col = getattr(model, id_attr)
+    parent_col = getattr(model, parent_attr)
+
+    stored = {
+        row.item_id: row
+        for row in (await db.execute(
+            select(id_col.label("item_id"), model.description, model.quantity, model.unit_price)
+            .filter(parent_col == parent_id)
+        )).all()
+    }
+
+    inserts, updates, seen = [], [], set()
+    for item in itemlist:
+        values = dict(
+            description = item.description,
+            quantity = item.quantity,
+            unit_price = Decimal(str(item.unit_price))
+        )
+
+        if item.item_id is None:
+            inserts.append({parent_attr: parent_id, **values})
+            continue
+
+        if item.item_id not in stored or item.item_id in seen:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Item {item.item_id} does not belong to this document or is listed twice."
+            )
+        seen.add(item.item_id)
+
+        row = stored[item.item_id]
+        if (row.description, row.quantity, row.unit_price) != (values['description'], values['quantity'], values['unit_price']):
+            updates.append({id_attr: item.item_id, **values})
+
+    removed = [item_id for item_id in stored if item_id not in seen]
+
+    if removed:
+        await db.execute(delete(model).filter(id_col.in_(removed)))
+    if updates:
+        # ORM bulk UPDATE by primary key: one executemany
+        await db.execute(update(model), updates)
+    if inserts:
+        await db.execute(insert(model), inserts)
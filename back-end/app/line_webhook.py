@@ -1,25 +1,43 @@
 import os
+import threading
 from fastapi import APIRouter, Request, HTTPException, status
 from sqlalchemy.orm import Session
-from linebot import LineBotApi, WebhookHandler
-from linebot.exceptions import InvalidSignatureError
-from linebot.models import (
-    MessageEvent, TextMessage, TextSendMessage, FollowEvent
-)
 
 from . import db_model
+from . import auth
+from . import notification_service
 from .database import SessionLocal # Import the session creator
 
-# Load credentials from .env
-try:
-    LINE_CHANNEL_ACCESS_TOKEN = os.environ["LINE_CHANNEL_ACCESS_TOKEN"]
-    LINE_CHANNEL_SECRET = os.environ["LINE_CHANNEL_SECRET"]
-except KeyError:
-    raise RuntimeError("LINE_CHANNEL_ACCESS_TOKEN or LINE_CHANNEL_SECRET not found in .env")
+# SDK components are created on the first webhook call, not at import, and
+# LINE_CHANNEL_SECRET is only required then; the LINE client is the one
+# notification_service sends with.
+_handler = None
+_handler_lock = threading.Lock()
+
+def get_webhook_handler():
+    global _handler
+    if _handler is None:
+        with _handler_lock:
+            if _handler is None:
+                # Load credentials from .env
+                try:
+                    channel_secret = os.environ["LINE_CHANNEL_SECRET"]
+                except KeyError:
+                    raise RuntimeError("LINE_CHANNEL_SECRET not found in .env")
+
+                from linebot import WebhookHandler
+                from linebot.models import MessageEvent, TextMessage, FollowEvent
+
+                handler = WebhookHandler(channel_secret)
+                handler.add(FollowEvent)(handle_follow)
+                handler.add(MessageEvent, message=TextMessage)(handle_message)
+                _handler = handler
+    return _handler
+
+def _reply(reply_token: str, text: str):
+    from linebot.models import TextSendMessage
+    notification_service.get_line_bot_api().reply_message(reply_token, TextSendMessage(text=text))
 
-# Initialize SDK components
-line_bot_api = LineBotApi(LINE_CHANNEL_ACCESS_TOKEN)
-handler = WebhookHandler(LINE_CHANNEL_SECRET)
 router = APIRouter(prefix='/line', tags=['line'])
 
 # --- Webhook Endpoint ---
@@ -35,6 +53,8 @@ async def line_webhook(request: Request):
     body = await request.body()
     
     # Handle webhook body
+    handler = get_webhook_handler()
+    from linebot.exceptions import InvalidSignatureError
     try:
         handler.handle(body.decode(), signature)
     except InvalidSignatureError:
@@ -45,7 +65,7 @@ async def line_webhook(request: Request):
 
 # --- Event Handler: Follow Event ---
 # This is triggered when a user adds your bot as a friend.
-@handler.add(FollowEvent)
+# (registered on the handler in get_webhook_handler)
 def handle_follow(event):
     line_user_id = event.source.user_id
     print(f"User {line_user_id} followed the bot.")
@@ -58,16 +78,13 @@ def handle_follow(event):
     )
     
     try:
-        line_bot_api.reply_message(
-            event.reply_token,
-            TextSendMessage(text=reply_message)
-        )
+        _reply(event.reply_token, reply_message)
     except Exception as e:
         print(f"Error replying to follow event: {e}")
 
 # --- Event Handler: Message Event (for Registration) ---
 # This is triggered when a user sends a message to your bot.
-@handler.add(MessageEvent, message=TextMessage)
+# (registered on the handler in get_webhook_handler)
 def handle_message(event):
     text = event.message.text.strip()
     line_user_id = event.source.user_id
@@ -97,6 +114,7 @@ def handle_message(event):
                         # Link new account
                         user.line_user_id = line_user_id
                         db.commit()
+                        auth.invalidate_user(user.u_id)
                         reply = f"Success! Your LINE account is now linked to {user.name}."
                 else:
                     reply = f"Error: No account found with the email '{email}'."
@@ -108,10 +126,7 @@ def handle_message(event):
             reply = "I am a notification bot. To link your account, please reply with: /register your-email@example.com"
         
         # Send the reply message
-        line_bot_api.reply_message(
-            event.reply_token,
-            TextSendMessage(text=reply)
-        )
+        _reply(event.reply_token, reply)
             
     except Exception as e:
         print(f"Error in handle_message: {e}")
@@ -0,0 +1,40 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from . import db_model
+
+# --- Eager-loading options ---
+# selectinload issues one "WHERE ... IN (...)" query per relationship for the
+# whole result set, so serializing N documents costs a fixed number of queries.
+
+def quotation_options():
+    return (
+        selectinload(db_model.Quotation.items),
+        selectinload(db_model.Quotation.user),
+    )
+
+def invoice_options():
+    return (
+        selectinload(db_model.Invoice.items),
+        selectinload(db_model.Invoice.user),
+    )
+
+# --- Async single-document loads ---
+# populate_existing refreshes an instance that is already in the session, so
+# handlers can re-read a document after committing without lazy loads (which
+# an AsyncSession cannot do implicitly).
+
+async def get_quotation(db: AsyncSession, *criteria) -> Optional[db_model.Quotation]:
+    result = await db.execute(
+        select(db_model.Quotation).options(*quotation_options()).filter(*criteria)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+async def get_invoice(db: AsyncSession, *criteria) -> Optional[db_model.Invoice]:
+    result = await db.execute(
+        select(db_model.Invoice).options(*invoice_options()).filter(*criteria)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
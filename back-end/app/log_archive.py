@@ -0,0 +1,175 @@
+import argparse
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .database import engine
+
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "log_archive")
+LOG_RETENTION_MONTHS = int(os.getenv("LOG_RETENTION_MONTHS", "12"))
+LOG_PARTITIONS_AHEAD = int(os.getenv("LOG_PARTITIONS_AHEAD", "3"))
+EXPORT_BATCH_SIZE = 5000
+
+# "Logs" is range partitioned by month (UTC) into "Logs_YYYY_MM" tables,
+# plus "Logs_default" for rows outside every monthly partition.
+PARTITION_NAME = re.compile(r"^Logs_(\d{4})_(\d{2})$")
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"Logs_{month:%Y_%m}"
+
+def _bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+def monthly_partitions(conn: Connection) -> dict[date, bool]:
+    """Maps the month of every "Logs_YYYY_MM" table to whether it is still attached."""
+    rows = conn.execute(text("""
+        SELECT c.relname, EXISTS (
+            SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid AND i.inhparent = '"Logs"'::regclass
+        ) AS attached
+        FROM pg_class c
+        WHERE c.relnamespace = current_schema()::regnamespace
+          AND c.relkind = 'r'
+          AND c.relname ~ '^Logs_[0-9]{4}_[0-9]{2}$'
+    """)).all()
+
+    partitions = {}
+    for name, attached in rows:
+        year, month = PARTITION_NAME.match(name).groups()
+        partitions[date(int(year), int(month), 1)] = attached
+    return partitions
+
+def create_partition(conn: Connection, month: date):
+    """
+    Creates the partition for `month`. Rows of that month already sitting in
+    the default partition would block the CREATE, so they are moved into the
+    new partition in the same transaction.
+    """
+    name = partition_name(month)
+    bounds = {"start": _bound(month), "end": _bound(add_months(month, 1))}
+
+    stray = conn.execute(text(
+        'SELECT EXISTS (SELECT 1 FROM "Logs_default" WHERE timestamp >= :start AND timestamp < :end)'
+    ), bounds).scalar()
+
+    if stray:
+        conn.execute(text('ALTER TABLE "Logs" DETACH PARTITION "Logs_default"'))
+
+    conn.execute(text(
+        f'CREATE TABLE "{name}" PARTITION OF "Logs" '
+        f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    ))
+
+    if stray:
+        conn.execute(text(
+            'INSERT INTO "Logs" SELECT * FROM "Logs_default" WHERE timestamp >= :start AND timestamp < :end'
+        ), bounds)
+        conn.execute(text('DELETE FROM "Logs_default" WHERE timestamp >= :start AND timestamp < :end'), bounds)
+        conn.execute(text('ALTER TABLE "Logs" ATTACH PARTITION "Logs_default" DEFAULT'))
+
+    conn.commit()
+    print(f"Created log partition {name}.")
+
+def export_partition(conn: Connection, name: str, directory: str) -> tuple[str, int]:
+    """Streams a (detached) partition into <directory>/<name>.jsonl.gz and returns the path and row count."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}.jsonl.gz")
+    partial = path + ".partial"
+
+    result = conn.execute(text(
+        f'SELECT l_id, action, actor_id, document_id, timestamp FROM "{name}" ORDER BY timestamp, l_id'
+    ).execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+    written = 0
+    with open(partial, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+            for row in result:
+                record = {
+                    "l_id": row.l_id,
+                    "action": row.action,
+                    "actor_id": str(row.actor_id) if row.actor_id else None,
+                    "document_id": row.document_id,
+                    "timestamp": row.timestamp.isoformat(),
+                }
+                archive.write((json.dumps(record) + "\n").encode())
+                written += 1
+        raw.flush()
+        os.fsync(raw.fileno())
+
+    os.replace(partial, path)
+    return path, written
+
+def archive_partition(conn: Connection, month: date, attached: bool, directory: str):
+    """
+    Detaches a monthly partition, exports it to compressed JSONL and drops it.
+    The table is only dropped once the file holds every row, so a failed run
+    leaves a detached table that the next run exports again.
+    """
+    name = partition_name(month)
+    if attached:
+        conn.execute(text(f'ALTER TABLE "Logs" DETACH PARTITION "{name}"'))
+        conn.commit()
+
+    path, written = export_partition(conn, name, directory)
+    total = conn.execute(text(f'SELECT count(*) FROM "{name}"')).scalar()
+    if written != total:
+        conn.rollback()
+        raise RuntimeError(f"Archive of {name} holds {written} of {total} rows; table kept.")
+
+    conn.execute(text(f'DROP TABLE "{name}"'))
+    conn.commit()
+    print(f"Archived log partition {name}: {written} rows -> {path}")
+
+def run(
+    directory: str = LOG_ARCHIVE_DIR,
+    retention_months: int = LOG_RETENTION_MONTHS,
+    months_ahead: int = LOG_PARTITIONS_AHEAD
+):
+    """
+    Creates the partitions for this month and the next `months_ahead` (and for
+    months stranded in the default partition), then archives every partition
+    older than `retention_months` full months.
+    """
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    cutoff = add_months(current, -retention_months)
+
+    with engine.connect() as conn:
+        partitions = monthly_partitions(conn)
+
+        # upcoming months, plus any month whose rows fell into the default partition
+        months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+        months.update(row[0] for row in conn.execute(text(
+            'SELECT DISTINCT date_trunc(\'month\', timestamp AT TIME ZONE \'UTC\')::date FROM "Logs_default"'
+        )))
+
+        for month in sorted(months):
+            if month not in partitions:
+                create_partition(conn, month)
+                partitions[month] = True
+
+        for month, attached in sorted(partitions.items()):
+            if month < cutoff:
+                archive_partition(conn, month, attached, directory)
+
+def main():
+    parser = argparse.ArgumentParser(description="Create upcoming Logs partitions and archive old ones.")
+    parser.add_argument("--dir", default=LOG_ARCHIVE_DIR, help="where the .jsonl.gz archives are written")
+    parser.add_argument("--retention-months", type=int, default=LOG_RETENTION_MONTHS)
+    parser.add_argument("--months-ahead", type=int, default=LOG_PARTITIONS_AHEAD)
+    args = parser.parse_args()
+
+    if args.retention_months < 1:
+        parser.error("--retention-months must be at least 1")
+
+    run(args.dir, args.retention_months, args.months_ahead)
+
+# python -m app.log_archive --dir /var/backups/fms-logs   (daily from cron)
+if __name__ == "__main__":
+    main()
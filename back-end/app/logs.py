@@ -1,31 +1,70 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Response
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List, Annotated
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Annotated, Optional
 import uuid
 from datetime import datetime
 from . import db_model
-from .database import get_db
-from .auth import check_user_role, get_current_user
+from .database import get_async_db
+from .auth import UserPrincipal, check_user_role
+from .pagination import PageParams, keyset, finish_page
 
 router = APIRouter(prefix='/logs', tags=['logs'])
 
-DBDependency = Annotated[Session, Depends(get_db)]
-AdminUser = Annotated[db_model.User, Depends(check_user_role('Admin'))]
+DBDependency = Annotated[AsyncSession, Depends(get_async_db)]
+AdminUser = Annotated[UserPrincipal, Depends(check_user_role('Admin'))]
 
 class LogResponse(BaseModel):
     l_id: int
-    actor_id: uuid.UUID
+    actor_id: Optional[uuid.UUID] = None
     action: str
-    document_id: int
+    document_id: Optional[int] = None
     timestamp: datetime
 
     class Config:
         from_attributes = True
 
+class LogFilters:
+    """Server-side filters for the audit log listing."""
+    def __init__(
+        self,
+        actor_id: Optional[uuid.UUID] = None,
+        document_id: Optional[int] = None,
+        action: Optional[str] = None, # prefix, e.g. "Invoice 12 " or "Quotation"
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ):
+        self.actor_id = actor_id
+        self.document_id = document_id
+        self.action = action
+        self.since = since
+        self.until = until
+
+def apply_log_filters(query, filters: LogFilters):
+    """
+    The time window prunes the monthly partitions of "Logs"; document / action
+    use idx_log_document_action (varchar_pattern_ops on action, so the prefix
+    LIKE is an index range under any collation) and actor uses idx_log_actor.
+    """
+    if filters.actor_id:
+        query = query.filter(db_model.Log.actor_id == filters.actor_id)
+    if filters.document_id is not None:
+        query = query.filter(db_model.Log.document_id == filters.document_id)
+    if filters.action:
+        query = query.filter(db_model.Log.action.startswith(filters.action, autoescape=True))
+    if filters.since:
+        query = query.filter(db_model.Log.timestamp >= filters.since)
+    if filters.until:
+        query = query.filter(db_model.Log.timestamp < filters.until)
+
+    return query
+
 @router.get("/", response_model=List[LogResponse])
-def get_all_logs(db: DBDependency, current_user: AdminUser):
-    logs = db.query(db_model.Log).order_by(desc(db_model.Log.timestamp)).all()
-    
-    return logs
\ No newline at end of file
+async def get_all_logs(response: Response, db: DBDependency, current_user: AdminUser, page: Annotated[PageParams, Depends()], filters: Annotated[LogFilters, Depends()]):
+    query = apply_log_filters(select(db_model.Log), filters)
+    logs = (await db.execute(
+        keyset(query, page, db_model.Log.timestamp, db_model.Log.l_id)
+    )).scalars().all()
+
+    return finish_page(logs, page, 'l_id', response, created_attr='timestamp')
@@ -0,0 +1,127 @@
+import os
+import secrets
+import time
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from sqlalchemy import event
+from starlette import status
+
+from .database import DB_MAX_OVERFLOW, DB_POOL_SIZE, async_engine, engine
+
+# --- Prometheus metrics ---
+# With several gunicorn workers set PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py
+# does): every process then writes its samples to memory-mapped files in that
+# directory and /metrics, whichever worker serves it, adds them all up.
+# It must be set before this module is imported.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN") # when set, scrapers send "Authorization: Bearer <token>"
+
+router = APIRouter(tags=['metrics'])
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time from request start to the last body chunk sent.",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being served right now.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_checked_out", "Pooled connections in use.",
+    ["pool"], multiprocess_mode="livesum",
+)
+DB_POOL_OPEN = Gauge(
+    "db_pool_connections_open", "Connections the pool holds open, in use or idle.",
+    ["pool"], multiprocess_mode="livesum",
+)
+DB_POOL_CAPACITY = Gauge(
+    "db_pool_connections_max", "Most connections the pool may open (DB_POOL_SIZE + DB_MAX_OVERFLOW).",
+    ["pool"], multiprocess_mode="livesum",
+)
+NOTIFICATION_SEND_DURATION = Histogram(
+    "notification_send_duration_seconds", "Time of one LINE / SendGrid API call.",
+    ["channel"], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+NOTIFICATION_RECIPIENTS = Counter(
+    "notification_recipients_total", "Recipients of delivered notifications.",
+    ["channel"],
+)
+NOTIFICATION_FAILURES = Counter(
+    "notification_send_failures_total", "LINE / SendGrid API calls that raised.",
+    ["channel"],
+)
+DOCUMENT_TRANSITIONS = Counter(
+    "document_transitions_total", "Committed document status changes.",
+    ["doc_type", "from_status", "to_status"],
+)
+
+def record_transition(doc_type: str, from_status: str, to_status: str, count: int = 1):
+    """Call once the status change is committed."""
+    if count:
+        DOCUMENT_TRANSITIONS.labels(doc_type, from_status, to_status).inc(count)
+
+def record_notification(channel: str, recipients: int, elapsed: float, failed: bool):
+    NOTIFICATION_SEND_DURATION.labels(channel).observe(elapsed)
+    if failed:
+        NOTIFICATION_FAILURES.labels(channel).inc()
+    else:
+        NOTIFICATION_RECIPIENTS.labels(channel).inc(recipients)
+
+def _watch_pool(name: str, target):
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    open_connections = DB_POOL_OPEN.labels(name)
+    DB_POOL_CAPACITY.labels(name).set(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+    event.listen(target, "checkout", lambda *args: checked_out.inc())
+    event.listen(target, "checkin", lambda *args: checked_out.dec())
+    event.listen(target, "connect", lambda *args: open_connections.inc())
+    event.listen(target, "close", lambda *args: open_connections.dec())
+    event.listen(target, "close_detached", lambda *args: open_connections.dec())
+
+_watch_pool("sync", engine)
+_watch_pool("async", async_engine.sync_engine)
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (no per-request task or body buffering) that times
+    each request until its last body chunk, so streamed exports count in full.
+    Requests are labelled with the route template; unmatched paths share one
+    label so scanners can't blow up the series count.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(scope["method"], route, str(status_code)).observe(time.perf_counter() - start)
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics(authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN and not secrets.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
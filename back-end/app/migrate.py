@@ -0,0 +1,135 @@
+import argparse
+import glob
+import hashlib
+import os
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from . import db_model
+from .database import engine
+
+# The schema is managed here, once per deploy, rather than by every worker on
+# import. It creates missing tables from db_model, then applies
+# DataBase/migrations/*.sql in file name order, each once, recording it in
+# "SchemaMigrations". The audit trigger files (DataBase/user_*_log_func_trigger.sql)
+# are idempotent and are re-applied whenever their content changes.
+#   python -m app.migrate             before the new version starts serving
+#   python -m app.migrate --baseline  once, on a database whose migrations were
+#                                     applied by hand: records them without running
+DATABASE_DIR = os.getenv(
+    "DATABASE_DIR", os.path.join(os.path.dirname(__file__), "..", "..", "DataBase")
+)
+
+# any constant works, it only has to be the same for every migrate process
+MIGRATION_LOCK_ID = 7405219
+
+def migration_files(database_dir: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(database_dir, "migrations", "*.sql")))
+
+def trigger_files(database_dir: str) -> list[str]:
+    return sorted(glob.glob(os.path.join(database_dir, "user_*_log_func_trigger.sql")))
+
+def _checksum(sql: str) -> str:
+    return hashlib.sha256(sql.encode()).hexdigest()
+
+def _ensure_history(conn: Connection):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS "SchemaMigrations" (
+            name TEXT PRIMARY KEY,
+            checksum TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+
+def applied_migrations(conn: Connection) -> dict[str, str]:
+    """Maps the file name of every applied script to the checksum it had."""
+    return dict(conn.execute(text('SELECT name, checksum FROM "SchemaMigrations"')).all())
+
+def _record(conn: Connection, path: str, sql: str):
+    conn.execute(text("""
+        INSERT INTO "SchemaMigrations" (name, checksum) VALUES (:name, :checksum)
+        ON CONFLICT (name) DO UPDATE SET checksum = EXCLUDED.checksum, applied_at = now()
+    """), {"name": os.path.basename(path), "checksum": _checksum(sql)})
+
+def _apply(conn: Connection, path: str, sql: str):
+    # through the DBAPI cursor without parameters, so the "%" in format()
+    # calls and DO blocks reach the server untouched
+    conn.connection.cursor().execute(sql)
+    _record(conn, path, sql)
+
+def pending(conn: Connection, database_dir: str) -> list[tuple[str, str]]:
+    """The (path, sql) of every script migrate would run, in order."""
+    applied = applied_migrations(conn)
+    scripts = []
+    for path in migration_files(database_dir):
+        with open(path) as f:
+            sql = f.read()
+        name = os.path.basename(path)
+        if name not in applied:
+            scripts.append((path, sql))
+        elif applied[name] != _checksum(sql):
+            print(f"Warning: {name} changed after it was applied; write a new migration instead.")
+    for path in trigger_files(database_dir):
+        with open(path) as f:
+            sql = f.read()
+        if applied.get(os.path.basename(path)) != _checksum(sql):
+            scripts.append((path, sql))
+    return scripts
+
+def run(database_dir: str = DATABASE_DIR, dry_run: bool = False, baseline: bool = False) -> list[str]:
+    """
+    Brings the database up to date; returns the names of the scripts applied
+    (with dry_run: due). With baseline the pending migrations are only
+    recorded as applied; the trigger files still run.
+    """
+    if not os.path.isdir(os.path.join(database_dir, "migrations")):
+        raise RuntimeError(f"No migrations directory in {database_dir}; set DATABASE_DIR.")
+
+    with engine.connect() as conn:
+        # concurrent deploys wait here instead of applying the same scripts twice
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            _ensure_history(conn)
+            conn.commit()
+            if dry_run:
+                names = [os.path.basename(path) for path, _ in pending(conn, database_dir)]
+                conn.rollback()
+                return names
+
+            db_model.Base.metadata.create_all(bind=conn, checkfirst=True)
+            conn.commit()
+
+            migrations = set(migration_files(database_dir))
+            names = []
+            for path, sql in pending(conn, database_dir):
+                name = os.path.basename(path)
+                if baseline and path in migrations:
+                    print(f"Recording {name} as applied")
+                    _record(conn, path, sql)
+                else:
+                    print(f"Applying {name}")
+                    _apply(conn, path, sql)
+                conn.commit()
+                names.append(name)
+            return names
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            conn.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description="Create missing tables and apply pending SQL migrations.")
+    parser.add_argument("--dir", default=DATABASE_DIR, help="the DataBase directory holding migrations/")
+    parser.add_argument("--dry-run", action="store_true", help="list the scripts that would be applied")
+    parser.add_argument("--baseline", action="store_true", help="record pending migrations as applied without running them")
+    args = parser.parse_args()
+
+    names = run(args.dir, args.dry_run, args.baseline)
+    if args.dry_run:
+        print("\n".join(names) if names else "Nothing to apply.")
+    elif not names:
+        print("Database is up to date.")
+
+# python -m app.migrate   (once per deploy, before the app starts)
+if __name__ == "__main__":
+    main()
@@ -1,100 +1,206 @@
-import os
-from sqlalchemy.orm import Session
-from linebot import LineBotApi
-from linebot.models import TextSendMessage
-from linebot.exceptions import LineBotApiError
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-
-from . import db_model
-
-# --- Load Config from .env ---
-try:
-    LINE_CHANNEL_ACCESS_TOKEN = os.environ["LINE_CHANNEL_ACCESS_TOKEN"]
-    SENDER_EMAIL = os.environ["SENDER_EMAIL"]
-    SENDGRID_API_KEY = os.environ["SENDGRID_API_KEY"]
-    
-    line_bot_api = LineBotApi(LINE_CHANNEL_ACCESS_TOKEN)
-    sg = SendGridAPIClient(SENDGRID_API_KEY)
-    
-except KeyError:
-    raise RuntimeError("API keys (LINE/SendGrid) not found in environment variables.")
-
-# --- Internal Functions ---
-def _send_line_notification(line_user_id: str, message_text: str):
-    """Internal function to send a LINE push message."""
-    if not line_user_id:
-        print(f"Skipping LINE notification: user has no line_user_id.")
-        return False
-    try:
-        line_bot_api.push_message(
-            line_user_id,
-            TextSendMessage(text=message_text)
-        )
-        print(f"Successfully sent LINE message to {line_user_id}")
-        return True
-    except LineBotApiError as e:
-        print(f"Error sending LINE message: {e.error.message}")
-        # Handle error (e.g., user blocked bot, invalid ID)
-        return False
-    except Exception as e:
-        print(f"An unexpected error occurred with LINE API: {e}")
-        return False
-
-def _send_email_notification(to_email: str, subject: str, message_text: str):
-    """Internal function to send an Email via SendGrid."""
-    html_message = message_text.replace('\n', '<br>') # Move expression out
-    message = Mail(
-        from_email=SENDER_EMAIL,
-        to_emails=to_email,
-        subject=subject,
-        html_content=f"<p>{html_message}</p>" # Use the pre-computed value
-    )
-    try:
-        response = sg.send(message)
-        print(f"Successfully sent email to {to_email} (Status: {response.status_code})")
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
-
-# --- Public Dispatch Function ---
-
-def dispatch_notification(
-    db: Session, 
-    user: db_model.User, 
-    message: str, 
-    subject: str = "Notification from FMS"
-):
-    """
-    Dispatches a notification to a user via Email and/or LINE
-    and logs it to the database.
-    """
-    
-    # 1. Try to send via LINE
-    if user.line_user_id:
-        if _send_line_notification(user.line_user_id, message):
-            # Log to DB as 'LINE' type
-            db_notification = db_model.Notification(
-                u_id=user.u_id,
-                message=message,
-                type='LINE'
-            )
-            db.add(db_notification)
-
-    # 2. Always send via Email (as a reliable fallback)
-    if _send_email_notification(user.email, subject, message):
-        # Log to DB as 'Email' type
-        db_notification = db_model.Notification(
-            u_id=user.u_id,
-            message=message,
-            type='Email'
-        )
-        db.add(db_notification)
-
-    try:
-        db.commit()
-    except Exception as e:
-        db.rollback()
-
-        print(f"Error logging notification to database: {e}")
+import os
+import threading
+import time
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import db_model
+from . import metrics
+
+# --- Local stand-ins ---
+# Used when NOTIFICATION_BACKEND=local (development, tests, load tests) so no
+# request ever leaves the machine. They record what would have been sent.
+
+class LocalLineClient:
+    def __init__(self):
+        self.sent = []
+
+    def push_message(self, to, messages):
+        self.sent.append(([to], messages))
+
+    def multicast(self, to, messages):
+        self.sent.append((list(to), messages))
+
+    def reply_message(self, reply_token, messages):
+        self.sent.append(([reply_token], messages))
+
+class LocalEmailResponse:
+    status_code = 202
+
+class LocalEmailClient:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(message.get())
+        return LocalEmailResponse()
+
+# --- Load Config from .env ---
+# Only the settings are checked at import. The SDK clients (and the SDKs
+# themselves, a noticeable part of worker start-up) are created on first use
+# and shared by the whole process, line_webhook included.
+NOTIFICATION_BACKEND = os.getenv("NOTIFICATION_BACKEND", "live")
+
+if NOTIFICATION_BACKEND == "local":
+    SENDER_EMAIL = os.getenv("SENDER_EMAIL", "noreply@localhost")
+else:
+    try:
+        LINE_CHANNEL_ACCESS_TOKEN = os.environ["LINE_CHANNEL_ACCESS_TOKEN"]
+        SENDER_EMAIL = os.environ["SENDER_EMAIL"]
+        SENDGRID_API_KEY = os.environ["SENDGRID_API_KEY"]
+
+    except KeyError:
+        raise RuntimeError("API keys (LINE/SendGrid) not found in environment variables.")
+
+line_bot_api = None
+sg = None
+_clients_lock = threading.Lock()
+
+def get_line_bot_api():
+    """The process-wide LINE client."""
+    global line_bot_api
+    if line_bot_api is None:
+        with _clients_lock:
+            if line_bot_api is None:
+                if NOTIFICATION_BACKEND == "local":
+                    line_bot_api = LocalLineClient()
+                else:
+                    from linebot import LineBotApi
+                    line_bot_api = LineBotApi(LINE_CHANNEL_ACCESS_TOKEN)
+    return line_bot_api
+
+def get_email_client():
+    """The process-wide SendGrid client."""
+    global sg
+    if sg is None:
+        with _clients_lock:
+            if sg is None:
+                if NOTIFICATION_BACKEND == "local":
+                    sg = LocalEmailClient()
+                else:
+                    from sendgrid import SendGridAPIClient
+                    sg = SendGridAPIClient(SENDGRID_API_KEY)
+    return sg
+
+def set_clients(line_client=None, email_client=None):
+    """Swaps the LINE / SendGrid clients, e.g. for local stand-ins in tests."""
+    global line_bot_api, sg
+    with _clients_lock:
+        if line_client is not None:
+            line_bot_api = line_client
+        if email_client is not None:
+            sg = email_client
+
+# Upper bounds on recipients per API call
+LINE_MULTICAST_LIMIT = 500
+SENDGRID_PERSONALIZATION_LIMIT = 1000
+BATCH_LIMITS = {'LINE': LINE_MULTICAST_LIMIT, 'Email': SENDGRID_PERSONALIZATION_LIMIT}
+
+# --- Internal Functions ---
+# These raise on failure so the outbox worker can record the error and retry.
+
+def _send_line_notification(line_user_ids: list[str], message_text: str):
+    """Internal function to send one LINE push (one recipient) or multicast."""
+    client = get_line_bot_api()
+    from linebot.models import TextSendMessage
+    from linebot.exceptions import LineBotApiError
+    try:
+        if len(line_user_ids) == 1:
+            client.push_message(line_user_ids[0], TextSendMessage(text=message_text))
+        else:
+            client.multicast(line_user_ids, TextSendMessage(text=message_text))
+    except LineBotApiError as e:
+        # e.g. user blocked the bot, invalid ID
+        raise RuntimeError(f"LINE API error: {e.error.message}") from e
+    print(f"Successfully sent LINE message to {len(line_user_ids)} recipient(s)")
+
+def _send_email_notification(to_emails: list[str], subject: str, message_text: str):
+    """
+    Internal function to send an Email via SendGrid. Every recipient gets its
+    own personalization, so one request reaches them all without exposing
+    the other addresses.
+    """
+    client = get_email_client()
+    from sendgrid.helpers.mail import Mail, Personalization, To
+    html_message = message_text.replace('\n', '<br>') # Move expression out
+    message = Mail(
+        from_email=SENDER_EMAIL,
+        subject=subject,
+        html_content=f"<p>{html_message}</p>" # Use the pre-computed value
+    )
+    for to_email in to_emails:
+        personalization = Personalization()
+        personalization.add_to(To(to_email))
+        message.add_personalization(personalization)
+
+    response = client.send(message)
+    print(f"Successfully sent email to {len(to_emails)} recipient(s) (Status: {response.status_code})")
+
+def deliver_batch(channel: str, subject: str, message: str, recipients: list[str]):
+    """
+    Sends one message to up to BATCH_LIMITS[channel] recipients with a single
+    API call. Raises if delivery failed.
+    """
+    start = time.perf_counter()
+    try:
+        if channel == 'LINE':
+            _send_line_notification(recipients, message)
+        else:
+            _send_email_notification(recipients, subject, message)
+    except Exception:
+        metrics.record_notification(channel, len(recipients), time.perf_counter() - start, failed=True)
+        raise
+    metrics.record_notification(channel, len(recipients), time.perf_counter() - start, failed=False)
+
+# --- Public Enqueue Functions ---
+
+def _outbox_rows(user: db_model.User, message: str, subject: str) -> list[dict]:
+    rows = []
+    if user.line_user_id:
+        rows.append(dict(u_id=user.u_id, channel='LINE', recipient=user.line_user_id, subject=subject, message=message))
+    # Always send via Email (as a reliable fallback)
+    rows.append(dict(u_id=user.u_id, channel='Email', recipient=user.email, subject=subject, message=message))
+    return rows
+
+def enqueue_bulk_notification(
+    db: Session,
+    users: list[db_model.User],
+    message: str,
+    subject: str = "Notification from FMS"
+):
+    """
+    Queues the same notification for many users via LINE (if linked) and Email
+    with one multi-row insert.
+
+    Nothing is sent here and nothing is committed: the outbox rows become
+    visible together with the caller's own changes when it commits, and the
+    notification worker delivers them afterwards, grouping identical messages
+    into LINE multicasts and SendGrid personalizations.
+    """
+    rows = []
+    for user in users:
+        rows.extend(_outbox_rows(user, message, subject))
+
+    if rows:
+        db.execute(insert(db_model.NotificationOutbox), rows)
+
+def enqueue_notifications(
+    db: Session,
+    notifications: list[tuple[db_model.User, str, str]]
+):
+    """Queues a different (user, message, subject) each with one multi-row insert."""
+    rows = []
+    for user, message, subject in notifications:
+        rows.extend(_outbox_rows(user, message, subject))
+
+    if rows:
+        db.execute(insert(db_model.NotificationOutbox), rows)
+
+def enqueue_notification(
+    db: Session,
+    user: db_model.User,
+    message: str,
+    subject: str = "Notification from FMS"
+):
+    """Queues a notification to a single user; see enqueue_bulk_notification."""
+    enqueue_bulk_notification(db, [user], message, subject)
@@ -0,0 +1,153 @@
+import argparse
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+from . import db_model
+from . import notification_service
+from .database import SessionLocal
+
+BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "500"))
+MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "6"))
+RETRY_BASE_SECONDS = float(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", "5"))
+POLL_INTERVAL_SECONDS = float(os.getenv("NOTIFICATION_POLL_INTERVAL_SECONDS", "2"))
+# how long a claimed batch is reserved for its worker; must outlast sending it
+CLAIM_SECONDS = float(os.getenv("NOTIFICATION_CLAIM_SECONDS", "300"))
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff: 5s, 10s, 20s, ... after the 1st, 2nd, 3rd failure."""
+    return timedelta(seconds=RETRY_BASE_SECONDS * (2 ** (attempts - 1)))
+
+def _failure(entry: dict, error: Exception) -> dict:
+    print(f"Notification {entry['o_id']} ({entry['channel']}) failed, attempt {entry['attempts']}: {error}")
+    result = dict(o_id=entry['o_id'], last_error=str(error))
+    if entry['attempts'] >= MAX_ATTEMPTS:
+        result['status'] = 'Failed'
+    else:
+        result['next_attempt_at'] = datetime.now(timezone.utc) + retry_delay(entry['attempts'])
+    return result
+
+def claim_batch(db: Session, batch_size: int = BATCH_SIZE) -> list[dict]:
+    """
+    Claims up to batch_size due entries and commits, so no row lock or
+    transaction is held while the providers are called. A claim counts as
+    an attempt and moves next_attempt_at CLAIM_SECONDS ahead: other workers
+    skip the entry meanwhile, and if this one dies before recording the
+    result the entry becomes due again once the claim runs out.
+    """
+    entries = db.query(db_model.NotificationOutbox).filter(
+        db_model.NotificationOutbox.status == 'Pending',
+        db_model.NotificationOutbox.next_attempt_at <= func.now()
+    ).order_by(
+        db_model.NotificationOutbox.next_attempt_at
+    ).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    claimed_until = datetime.now(timezone.utc) + timedelta(seconds=CLAIM_SECONDS)
+    claimed = []
+    for entry in entries:
+        entry.attempts += 1
+        entry.next_attempt_at = claimed_until
+        claimed.append(dict(
+            o_id=entry.o_id, u_id=entry.u_id, channel=entry.channel, recipient=entry.recipient,
+            subject=entry.subject, message=entry.message, attempts=entry.attempts,
+        ))
+
+    db.commit()
+    return claimed
+
+def drain_once(db: Session, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Delivers one batch of due outbox entries and returns how many were claimed.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED in a short transaction of
+    their own (see claim_batch), so any number of workers (threads or
+    processes) can drain the same table without double sending, and a slow
+    provider holds neither locks nor a pooled connection. Entries carrying
+    the same message over the same channel are sent with one LINE multicast /
+    SendGrid request per BATCH_LIMITS recipients; the results and all
+    Notification log rows are then written in a second short transaction.
+    """
+    entries = claim_batch(db, batch_size)
+
+    groups = {}
+    for entry in entries:
+        groups.setdefault((entry['channel'], entry['subject'], entry['message']), []).append(entry)
+
+    delivered = []
+    results = []
+    for (channel, subject, message), group in groups.items():
+        limit = notification_service.BATCH_LIMITS[channel]
+        for start in range(0, len(group), limit):
+            chunk = group[start:start + limit]
+            try:
+                notification_service.deliver_batch(channel, subject, message, [entry['recipient'] for entry in chunk])
+            except Exception as e:
+                results.extend(_failure(entry, e) for entry in chunk)
+                continue
+            delivered.extend(chunk)
+
+    sent_at = datetime.now(timezone.utc)
+    results.extend(dict(o_id=entry['o_id'], status='Sent', sent_at=sent_at) for entry in delivered)
+
+    if results:
+        # bulk UPDATE by primary key, one statement per distinct set of columns
+        db.execute(update(db_model.NotificationOutbox), results)
+    if delivered:
+        db.execute(insert(db_model.Notification), [
+            dict(u_id=entry['u_id'], message=entry['message'], type=entry['channel']) for entry in delivered
+        ])
+
+    db.commit()
+    return len(entries)
+
+def _worker_loop(stop: threading.Event, batch_size: int, poll_interval: float):
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            claimed = drain_once(db, batch_size)
+        except Exception as e:
+            db.rollback()
+            print(f"Notification worker error: {e}")
+            claimed = 0
+        finally:
+            db.close()
+
+        # keep draining while there is a backlog, otherwise wait for new work
+        if claimed < batch_size:
+            stop.wait(poll_interval)
+
+def start_workers(
+    workers: int,
+    batch_size: int = BATCH_SIZE,
+    poll_interval: float = POLL_INTERVAL_SECONDS
+) -> tuple[ThreadPoolExecutor, threading.Event]:
+    """Starts `workers` draining threads. Set the returned event to stop them."""
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="notification-worker")
+    for _ in range(workers):
+        pool.submit(_worker_loop, stop, batch_size, poll_interval)
+
+    return pool, stop
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver queued LINE / Email notifications.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--poll-interval", type=float, default=POLL_INTERVAL_SECONDS)
+    args = parser.parse_args()
+
+    pool, stop = start_workers(args.workers, args.batch_size, args.poll_interval)
+    print(f"Notification worker started with {args.workers} threads.")
+    try:
+        while True:
+            stop.wait(3600)
+    except KeyboardInterrupt:
+        stop.set()
+        pool.shutdown(wait=True)
+
+# python -m app.notification_worker --workers 4
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from . import db_model
+
+QUOTATION_PREFIX = "Q"
+INVOICE_PREFIX = "INV"
+RECEIPT_PREFIX = "RC"
+
+def next_number(db: Session, prefix: str) -> str:
+    """
+    Allocates the next document number for today, e.g. 'Q-20250131-007'.
+
+    The counter row is bumped with a single upsert, so concurrent creates
+    queue on that row's lock instead of racing on a read-then-write. The lock
+    is held until the caller's transaction ends, which also means a rolled
+    back create gives its number back.
+    """
+    return next_numbers(db, prefix, 1)[0]
+
+def next_numbers(db: Session, prefix: str, count: int) -> list[str]:
+    """Allocates `count` consecutive numbers with one upsert; see next_number."""
+    today = datetime.now(timezone.utc).date()
+
+    stmt = insert(db_model.DocumentSequence).values(
+        prefix=prefix, day=today, last_value=count
+    ).on_conflict_do_update(
+        index_elements=['prefix', 'day'],
+        set_={'last_value': db_model.DocumentSequence.last_value + count}
+    ).returning(db_model.DocumentSequence.last_value)
+
+    last = db.execute(stmt).scalar_one()
+
+    return [f"{prefix}-{today:%Y%m%d}-{value:03d}" for value in range(last - count + 1, last + 1)]
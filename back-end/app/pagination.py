@@ -0,0 +1,90 @@
+import base64
+import binascii
+import uuid
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import tuple_
+from starlette import status
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class PageParams:
+    """Query parameters shared by every keyset-paginated list endpoint."""
+    def __init__(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+class DocumentFilters:
+    """Server-side filters for quotation, invoice and receipt listings."""
+    def __init__(
+        self,
+        status_filter: Optional[str] = Query(None, alias="status"),
+        customer_name: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        owner_id: Optional[uuid.UUID] = None,
+    ):
+        self.status = status_filter
+        self.customer_name = customer_name
+        self.created_from = created_from
+        self.created_to = created_to
+        self.owner_id = owner_id
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor.")
+
+def apply_document_filters(query, model, filters: DocumentFilters, customer_col=None):
+    """
+    Narrows a document query with the optional filters. The columns used here
+    are the leading columns of the composite indexes declared in db_model.
+    """
+    if customer_col is None:
+        customer_col = getattr(model, "customer_name", None)
+
+    if filters.status:
+        query = query.filter(model.status == filters.status)
+    if filters.customer_name and customer_col is not None:
+        query = query.filter(customer_col == filters.customer_name)
+    if filters.created_from:
+        query = query.filter(model.created_at >= filters.created_from)
+    if filters.created_to:
+        query = query.filter(model.created_at < filters.created_to)
+    if filters.owner_id:
+        query = query.filter(model.u_id == filters.owner_id)
+
+    return query
+
+def keyset(query, page: PageParams, created_col, id_col):
+    """
+    Orders newest first on (created_at, id) and seeks past the cursor row.
+    One extra row is fetched so we know whether another page exists.
+    """
+    if page.cursor:
+        created_at, row_id = decode_cursor(page.cursor)
+        query = query.filter(tuple_(created_col, id_col) < tuple_(created_at, row_id))
+
+    return query.order_by(created_col.desc(), id_col.desc()).limit(page.limit + 1)
+
+def finish_page(rows: list, page: PageParams, id_attr: str, response: Response, created_attr: str = "created_at") -> list:
+    """Trims the look-ahead row and exposes the next cursor as a response header."""
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, created_attr), getattr(last, id_attr))
+
+    return rows
@@ -2,19 +2,30 @@ from datetime import timedelta, datetime, timezone
 from decimal import Decimal
 from typing import Annotated, List, Optional
 import uuid
-from .auth import check_user_role, get_current_user
-from .database import get_db
+from .auth import CurrentUser, UserPrincipal, check_user_role
+from .database import get_async_db
 from . import notification_service
-from fastapi import APIRouter, Depends, HTTPException 
-from pydantic import BaseModel
-from sqlalchemy.orm import Session, joinedload
+from . import metrics
+from . import loaders
+from . import numbering
+from . import items
+from . import conversions
+from . import transitions
+from . import versioning
+from .transitions import BulkTransitionRequest, BulkTransitionResponse
+from .versioning import IfMatch
+from .batch import MAX_BATCH_SIZE, BatchCreateResponse, BatchCreated, BatchError, document_totals
+from .pagination import PageParams, DocumentFilters, apply_document_filters, keyset, finish_page
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import BaseModel, Field
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from . import db_model
 
 router = APIRouter(prefix='/quotation', tags=['quotation'])
 
-DBDependency = Annotated[Session, Depends(get_db)]
-CurrentUser = Annotated[db_model.User, Depends(get_current_user)]
+DBDependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 class UserBase(BaseModel):
   u_id: uuid.UUID
@@ -37,7 +48,6 @@ class QuotationItemResponse(QuotationItemBase):
     from_attributes = True
 
 class QuotationCreate(BaseModel):
-  quotation_number: str
   customer_name: str
   customer_address: str
   customer_email: str
@@ -46,11 +56,17 @@ class QuotationCreate(BaseModel):
   class Config:
     from_attributes = True
 
+class QuotationBatchCreate(BaseModel):
+  documents: List[QuotationCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class QuotationItemUpdate(QuotationItemBase):
+  item_id: Optional[int] = None # omit for new items
+
 class QuotationUpdate(BaseModel):
   customer_name: str
   customer_address: str 
   customer_email: str
-  itemlist: List[QuotationItemBase]
+  itemlist: List[QuotationItemUpdate]
   class Config:
     from_attributes = True
 
@@ -66,7 +82,8 @@ class QuotationBase(BaseModel):
   tax: float
   preparer_name: Optional[str] = None
   approver_name: Optional[str] = None
-  approved_date: Optional[str] = None
+  approved_date: Optional[datetime] = Field(None, validation_alias='approved_at')
+  version: int
   class Config:
     from_attributes = True
 
@@ -76,43 +93,8 @@ class QuotationResponse(QuotationBase):
 
 vat = Decimal('0.07')
 
-def quoatation2invoice(quotation: db_model.Quotation, db: Session):
-
-    check_invoice = db.query(db_model.Invoice).filter(db_model.Invoice.q_id == quotation.q_id).first()
-    
-    if check_invoice:
-        print(f"Invoice for Quotation ID {quotation.q_id} already exists. No Worry")
-        return check_invoice
-
-    db_invoice = db_model.Invoice(
-      q_id = quotation.q_id, 
-      u_id = quotation.u_id,
-      invoice_number = f"INV-{quotation.quotation_number.replace('Q-', '', 1)}",
-      customer_name = quotation.customer_name,
-      customer_address = quotation.customer_address,
-      payment_term = "Net 30 Days",
-      status = 'Submitted',
-      total = quotation.total,
-      tax = quotation.tax
-      )
-    
-    db.add(db_invoice)
-    db.flush()
-    
-    for item in quotation.items: 
-        db_item = db_model.InvoiceItem(
-          i_id = db_invoice.i_id,
-          description = item.description,
-          quantity = item.quantity,
-          unit_price = item.unit_price 
-          )
-        db.add(db_item)
-        
-    print(f"Successfully created Invoice NUm {db_invoice.invoice_number}!!!")
-    return db_invoice
-
 @router.post("/", response_model=QuotationResponse, status_code=status.HTTP_201_CREATED)
-def create_quotation(quotation_data: QuotationCreate, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]):
+async def create_quotation(quotation_data: QuotationCreate, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))]):
   
   subtotal = Decimal('0.00')
     
@@ -138,7 +120,6 @@ def create_quotation(quotation_data: QuotationCreate, db: DBDependency, current_
     
   db_quotation = db_model.Quotation(
     u_id = current_user.u_id,
-    quotation_number = quotation_data.quotation_number,
     customer_name = quotation_data.customer_name,
     customer_address = quotation_data.customer_address,
     customer_email = quotation_data.customer_email,
@@ -148,8 +129,9 @@ def create_quotation(quotation_data: QuotationCreate, db: DBDependency, current_
     )
   
   try:
+    db_quotation.quotation_number = await db.run_sync(numbering.next_number, numbering.QUOTATION_PREFIX)
     db.add(db_quotation)
-    db.flush()
+    await db.flush()
     
     for item_data in quotation_data.itemlist:
       db_item = db_model.QuotationItem(
@@ -160,38 +142,110 @@ def create_quotation(quotation_data: QuotationCreate, db: DBDependency, current_
         )
       db.add(db_item)
     
-    db.commit()
-    db.refresh(db_quotation)
+    await db.commit()
   
   except Exception as e:
-    db.rollback()
+    await db.rollback()
     print(f"Error inserting quotation and items: {e}") 
     raise HTTPException(status_code=500, detail="Could not create quotation due to a database error.")
 
+  db_quotation = await loaders.get_quotation(db, db_model.Quotation.q_id == db_quotation.q_id)
 
   db_quotation.total = float(db_quotation.total)
   db_quotation.tax = float(db_quotation.tax)
     
   return db_quotation
 
+@router.post("/batch", response_model=BatchCreateResponse)
+async def create_quotations_batch(batch: QuotationBatchCreate, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))]):
+    """
+    Creates many quotations in one transaction: every header goes in with one
+    multi-row INSERT ... RETURNING q_id and every item with one more. Invalid
+    documents are reported by index and skipped; the rest are still created.
+    """
+    result = BatchCreateResponse()
+    headers, itemlists = [], []
+
+    for index, quotation_data in enumerate(batch.documents):
+        try:
+            grand_total, tax_amount = document_totals(quotation_data.itemlist, vat)
+        except ValueError as e:
+            result.errors.append(BatchError(index=index, detail=str(e)))
+            continue
+
+        headers.append(dict(
+            u_id = current_user.u_id,
+            customer_name = quotation_data.customer_name,
+            customer_address = quotation_data.customer_address,
+            customer_email = quotation_data.customer_email,
+            total = grand_total,
+            tax = tax_amount,
+            status = 'Submitted' if quotation_data.status == 'Submitted' else 'Draft'
+        ))
+        itemlists.append((index, quotation_data.itemlist))
+
+    if not headers:
+        return result
+
+    try:
+        numbers = await db.run_sync(numbering.next_numbers, numbering.QUOTATION_PREFIX, len(headers))
+        for header, number in zip(headers, numbers):
+            header['quotation_number'] = number
+
+        q_ids = (await db.execute(
+            insert(db_model.Quotation).returning(db_model.Quotation.q_id, sort_by_parameter_order=True),
+            headers
+        )).scalars().all()
+
+        await db.execute(insert(db_model.QuotationItem), [
+            dict(
+                q_id = q_id,
+                description = item_data.description,
+                quantity = item_data.quantity,
+                unit_price = Decimal(str(item_data.unit_price))
+            )
+            for q_id, (_, itemlist) in zip(q_ids, itemlists)
+            for item_data in itemlist
+        ])
+
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        print(f"Error inserting quotation batch: {e}")
+        raise HTTPException(status_code=500, detail="Could not create quotations due to a database error.")
+
+    result.created = [
+        BatchCreated(index=index, id=q_id, number=number)
+        for (index, _), q_id, number in zip(itemlists, q_ids, numbers)
+    ]
+
+    return result
+
 @router.get("/me", response_model=List[QuotationResponse])
-def get_user_quotations(db: DBDependency, current_user: CurrentUser):
-    quotations = db.query(db_model.Quotation).filter(
-        db_model.Quotation.u_id == current_user.u_id
-    ).all()
+async def get_user_quotations(response: Response, db: DBDependency, current_user: CurrentUser, page: Annotated[PageParams, Depends()], filters: Annotated[DocumentFilters, Depends()]):
+    filters.owner_id = current_user.u_id
+    query = apply_document_filters(select(db_model.Quotation), db_model.Quotation, filters)
+    quotations = (await db.execute(
+        keyset(query, page, db_model.Quotation.created_at, db_model.Quotation.q_id).options(*loaders.quotation_options())
+    )).scalars().all()
+    quotations = finish_page(quotations, page, 'q_id', response)
     
     return quotations
 
 @router.get("/", response_model=List[QuotationResponse])
-def get_all_quotations(db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('Admin'))]):
-    quotations = db.query(db_model.Quotation).all()
+async def get_all_quotations(response: Response, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('Admin'))], page: Annotated[PageParams, Depends()], filters: Annotated[DocumentFilters, Depends()]):
+    query = apply_document_filters(select(db_model.Quotation), db_model.Quotation, filters)
+    quotations = (await db.execute(
+        keyset(query, page, db_model.Quotation.created_at, db_model.Quotation.q_id).options(*loaders.quotation_options())
+    )).scalars().all()
+    quotations = finish_page(quotations, page, 'q_id', response)
     
     return quotations
 
 @router.get("/{quotation_id}", response_model=QuotationResponse, status_code=status.HTTP_200_OK)
-def get_quotation(quotation_id: int, db: DBDependency, current_user: CurrentUser):
+async def get_quotation(quotation_id: int, db: DBDependency, current_user: CurrentUser, response: Response):
 
-    quotation = db.query(db_model.Quotation).filter(db_model.Quotation.q_id == quotation_id).first()
+    quotation = await loaders.get_quotation(db, db_model.Quotation.q_id == quotation_id)
 
     if not quotation:
         raise HTTPException(status_code=404, detail="Quotation not found")
@@ -202,12 +256,13 @@ def get_quotation(quotation_id: int, db: DBDependency, current_user: CurrentUser
     quotation.total = float(quotation.total)
     quotation.tax = float(quotation.tax)
     
+    versioning.set_etag(response, quotation)
     return quotation
 
 @router.get("/number/{quotation_number}", response_model=QuotationResponse, status_code=status.HTTP_200_OK)
-def get_quotation_by_number(quotation_number: str, db: DBDependency, current_user: CurrentUser):
+async def get_quotation_by_number(quotation_number: str, db: DBDependency, current_user: CurrentUser, response: Response):
 
-    quotation = db.query(db_model.Quotation).filter(db_model.Quotation.quotation_number == quotation_number).first()
+    quotation = await loaders.get_quotation(db, db_model.Quotation.quotation_number == quotation_number)
 
     if not quotation:
         raise HTTPException(status_code=404, detail="Quotation not found")
@@ -215,37 +270,24 @@ def get_quotation_by_number(quotation_number: str, db: DBDependency, current_use
     if current_user.role != 'Admin' and quotation.u_id != current_user.u_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this quotation")
     
-    preparer_name = None
-    if quotation.user:
-        preparer_name = quotation.user.name
-
-    approver_name = None
-    approved_date = None
-    if quotation.status == 'Approved':
-        log_entry = db.query(db_model.Log)\
-            .filter(db_model.Log.document_id == quotation.q_id, db_model.Log.action == 'Approved')\
-            .order_by(db_model.Log.timestamp.desc())\
-            .first()
-        
-        if log_entry and log_entry.actor:
-            approver_name = log_entry.actor.name
-            approved_date = log_entry.timestamp
-    
     quotation.total = float(quotation.total)
     quotation.tax = float(quotation.tax)
     
+    versioning.set_etag(response, quotation)
     return quotation
 
 @router.put("/{quotation_id}", response_model=QuotationResponse, status_code=status.HTTP_200_OK)
-def quotation_edit(quotation_id: int, quotation_update: QuotationUpdate, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]):
+async def quotation_edit(quotation_id: int, quotation_update: QuotationUpdate, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))], response: Response, if_match: IfMatch = None):
     
-    quotation = db.query(db_model.Quotation).filter(db_model.Quotation.q_id == quotation_id).first()
+    quotation = await db.get(db_model.Quotation, quotation_id)
     
     if not quotation:
         raise HTTPException(status_code=404, detail="Quotation not found")
-    
+
     if quotation.u_id != current_user.u_id:
         raise HTTPException(status_code=403, detail="You do not have permission to edit this quotation.")
+
+    versioning.check_if_match(if_match, quotation, "Quotation")
     
     if quotation.status == 'Approved':
         raise HTTPException(
@@ -270,38 +312,39 @@ def quotation_edit(quotation_id: int, quotation_update: QuotationUpdate, db: DBD
 
     quotation.total = grand_total
     quotation.tax = tax_amount
+    # touch the header so the versioned UPDATE runs even for item-only edits
+    quotation.updated_at = func.now()
     
     try:
-      db.query(db_model.QuotationItem).filter(db_model.QuotationItem.q_id == quotation_id).delete(synchronize_session=False)
-      db.flush() 
-      
-      for item_data in quotation_update.itemlist:
-          db_item = db_model.QuotationItem(
-              q_id = quotation.q_id,
-              description = item_data.description,
-              quantity = item_data.quantity,
-              unit_price = Decimal(str(item_data.unit_price))
-          )
-          db.add(db_item)
-
-      db.commit()
-      db.refresh(quotation)
+      await items.sync_items(db, db_model.QuotationItem, 'item_id', 'q_id', quotation_id, quotation_update.itemlist)
+
+      await versioning.commit(db, "Quotation")
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
     
+    quotation = await loaders.get_quotation(db, db_model.Quotation.q_id == quotation_id)
     quotation.total = float(quotation.total)
     quotation.tax = float(quotation.tax)
 
+    versioning.set_etag(response, quotation)
     return quotation
 
 @router.delete("/{quotation_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_quotation(quotation_id: int, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]):
+async def delete_quotation(quotation_id: int, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))], if_match: IfMatch = None):
     
-    quotation = db.query(db_model.Quotation).filter(db_model.Quotation.q_id == quotation_id).first()
+    quotation = await db.get(db_model.Quotation, quotation_id)
     
     if not quotation:
         raise HTTPException(status_code=404, detail="Quotation not found")
+
+    if quotation.u_id != current_user.u_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to delete this quotation.")
+
+    versioning.check_if_match(if_match, quotation, "Quotation")
     
     if quotation.status == 'Approved': 
         raise HTTPException(
@@ -309,94 +352,121 @@ def delete_quotation(quotation_id: int, db: DBDependency, current_user: Annotate
         )
 
     try:
-        db.delete(quotation)
-        db.commit()
+        # items cascade and invoices are detached by the foreign keys themselves
+        deleted = await db.execute(
+            delete(db_model.Quotation).filter(db_model.Quotation.q_id == quotation_id, db_model.Quotation.version == quotation.version)
+        )
+        if deleted.rowcount == 0:
+            await db.rollback()
+            raise versioning.conflict("Quotation")
+        await db.commit()
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error during deletion: {e}")
 
     return
 
 @router.put("/{quotation_id}/submit", response_model=QuotationResponse, status_code=status.HTTP_200_OK)
-def quotation_submit(quotation_id: int, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]):
+async def quotation_submit(quotation_id: int, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))], response: Response, if_match: IfMatch = None):
     
-    quotation = db.query(db_model.Quotation).filter(db_model.Quotation.q_id == quotation_id).first()
+    quotation = await loaders.get_quotation(db, db_model.Quotation.q_id == quotation_id)
     
     if not quotation:
         raise HTTPException(status_code=404, detail="Quotation not found")
+
+    if quotation.u_id != current_user.u_id:
+        raise HTTPException(status_code=403, detail="You do not have permission to submit this quotation.")
+
+    versioning.check_if_match(if_match, quotation, "Quotation")
     
     if quotation.status != 'Draft':
         raise HTTPException(
             status_code=400, detail=f"Quotation cannot be submitted. Current status is '{quotation.status}'."
             )
         
+    message = f"Quotation: {quotation.quotation_number} (Total: {quotation.total}) has been submitted for approval by {current_user.name}."
+    subject = f"Approval Required: Quotation {quotation.quotation_number}"
+    
     try:
         quotation.status = 'Submitted'
-        db.commit()
-        db.refresh(quotation)
+        
+        # Notifications are queued in the same transaction as the status change
+        admins = (await db.execute(select(db_model.User).filter(db_model.User.role == 'Admin'))).scalars().all()
+        await db.run_sync(notification_service.enqueue_bulk_notification, admins, message, subject)
+        
+        await versioning.commit(db, "Quotation")
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
-    
-    # --- NOTIFICATION LOGIC ---
-    # This runs only if the try block succeeds
-    message = f"Quotation: {quotation.quotation_number} (Total: {quotation.total}) has been submitted for approval by {current_user.name}."
-    subject = f"Approval Required: Quotation {quotation.quotation_number}"
-    
-    # Find all admins
-    admins = db.query(db_model.User).filter(db_model.User.role == 'Admin').all()
-    for admin in admins:
-        notification_service.dispatch_notification(
-            db=db,
-            user=admin,
-            message=message,
-            subject=subject
-        )
 
+    metrics.record_transition('Quotation', 'Draft', 'Submitted')
+    versioning.set_etag(response, quotation)
     return quotation
 
-@router.put("/{quotation_id}/approve")
-def quotation_approve(quotation_id: int, status: str, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('Admin'))]):
+@router.post("/bulk-approve", response_model=BulkTransitionResponse)
+async def quotations_bulk_approve(request: BulkTransitionRequest, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('Admin'))]):
+    return await transitions.bulk_transition(
+        db, db_model.Quotation, 'q_id', 'quotation_number', 'total', 'Quotation', 'Submitted',
+        request, current_user, on_approved=conversions.quotations_to_invoices
+    )
+
+@router.put("/{quotation_id}/approve", response_model=QuotationResponse)
+async def quotation_approve(quotation_id: int, status: str, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('Admin'))], response: Response, if_match: IfMatch = None):
   
-  quotation = db.query(db_model.Quotation).filter(db_model.Quotation.q_id == quotation_id).first()
+  quotation = await loaders.get_quotation(db, db_model.Quotation.q_id == quotation_id)
   
   if not quotation:
     raise HTTPException(status_code=404, detail="Quotation not found")
+
+  versioning.check_if_match(if_match, quotation, "Quotation")
     
   if quotation.status != 'Submitted':
     raise HTTPException(
         status_code=400, detail=f"Quotation is not Summited. Current status is '{quotation.status}'."
         )
   
-  target_user = db.query(db_model.User).filter(db_model.User.u_id == quotation.u_id).first()
+  target_user = quotation.user
 
   if status == 'Approved':
     try:
-      quoatation2invoice(quotation, db)
+      await conversions.quotations_to_invoices(db, [quotation.q_id])
       quotation.status = 'Approved'
-      db.commit()
-      db.refresh(quotation)
-    except Exception as e:
-      db.rollback()
-      raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
-    finally:
+      quotation.approver_id = current_user.u_id
+      quotation.approver_name = current_user.name
+      quotation.approved_at = datetime.now(timezone.utc)
       if target_user:
         message = f"Good news bro! Your Quotation {quotation.quotation_number} (Total: {quotation.total}) has been APPROVED by admin."
         subject = f"Your Quotation Quotation {quotation.quotation_number} was Approved"
-        notification_service.dispatch_notification(db, target_user, message, subject)
-      return quotation
+        await db.run_sync(notification_service.enqueue_notification, target_user, message, subject)
+      await versioning.commit(db, "Quotation")
+    except HTTPException:
+      raise
+    except Exception as e:
+      await db.rollback()
+      raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
+    metrics.record_transition('Quotation', 'Submitted', 'Approved')
+    versioning.set_etag(response, quotation)
+    return quotation
       
   if status == 'Rejected':
     try:
       quotation.status = 'Rejected'
-      db.commit()
-      db.refresh(quotation)
-    except Exception as e:
-      db.rollback()
-      raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
-    finally:
       if target_user:
         message = f"Update: Your Quotation {quotation.quotation_number} (Total: {quotation.total}) has been REJECTED by admin."
         subject = f"Your Quotation {quotation.quotation_number} was Rejected"
-        notification_service.dispatch_notification(db, target_user, message, subject)
-      return quotation
\ No newline at end of file
+        await db.run_sync(notification_service.enqueue_notification, target_user, message, subject)
+      await versioning.commit(db, "Quotation")
+    except HTTPException:
+      raise
+    except Exception as e:
+      await db.rollback()
+      raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
+    metrics.record_transition('Quotation', 'Submitted', 'Rejected')
+    versioning.set_etag(response, quotation)
+    return quotation
+
+  raise HTTPException(status_code=400, detail="Invalid status provided. Must be 'Approved' or 'Rejected'.")
@@ -2,20 +2,26 @@ from datetime import date, timedelta, datetime, timezone
 from decimal import Decimal
 from typing import Annotated, List, Optional
 import uuid
-from .auth import check_user_role, get_current_user
-from .database import get_db
-from .notification_service import dispatch_notification
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from .auth import CurrentUser, UserPrincipal, check_user_role
+from .database import get_async_db
+from .pagination import PageParams, DocumentFilters, apply_document_filters, keyset, finish_page
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from . import db_model
 from . import notification_service
+from . import metrics
+from . import numbering
+from . import transitions
+from . import versioning
+from .transitions import BulkTransitionRequest, BulkTransitionResponse
+from .versioning import IfMatch
 
 router = APIRouter(prefix='/receipt', tags=['receipt'])
 
-DBDependency = Annotated[Session, Depends(get_db)]
-CurrentUser = Annotated[db_model.User, Depends(get_current_user)]
+DBDependency = Annotated[AsyncSession, Depends(get_async_db)]
 
 class UserBase(BaseModel):
     u_id: uuid.UUID
@@ -44,6 +50,8 @@ class ReceiptBase(BaseModel):
     u_id: uuid.UUID | None = None
     receipt_number: str | None = None 
     approver_name: Optional[str] = None
+    approved_date: Optional[datetime] = Field(None, validation_alias='approved_at')
+    version: int
 
     class Config:
         from_attributes = True
@@ -54,8 +62,8 @@ class ReceiptResponse(ReceiptBase):
 vat = Decimal('0.07')
 
 @router.post("/", response_model=ReceiptResponse, status_code=status.HTTP_201_CREATED)
-def create_receipt(receipt: ReceiptCreate, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]):
-    check_iid = db.query(db_model.Invoice).filter(db_model.Invoice.i_id == receipt.i_id).first()
+async def create_receipt(receipt: ReceiptCreate, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))]):
+    check_iid = await db.get(db_model.Invoice, receipt.i_id)
     
     if not check_iid:
         raise HTTPException(status_code=404, detail=f"Invoice ID:{receipt.i_id} not found.")
@@ -68,16 +76,16 @@ def create_receipt(receipt: ReceiptCreate, db: DBDependency, current_user: Annot
         amount = Decimal(str(receipt.amount)),
         payment_date = receipt.payment_date,
         payment_method = receipt.payment_method,
-        u_id = current_user.u_id,
-        receipt_number = f"RC-{check_iid.invoice_number}" 
+        u_id = current_user.u_id
     )
     
     try:
+        db_receipt.receipt_number = await db.run_sync(numbering.next_number, numbering.RECEIPT_PREFIX)
         db.add(db_receipt)
-        db.commit()
-        db.refresh(db_receipt)
+        await db.commit()
+        await db.refresh(db_receipt)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error inserting receipt: {e}")
         raise HTTPException(status_code=500, detail="Could not create receipt due to a database error.")
     
@@ -86,12 +94,17 @@ def create_receipt(receipt: ReceiptCreate, db: DBDependency, current_user: Annot
     return db_receipt
 
 @router.put("/{receipt_id}/submit", response_model=ReceiptResponse, status_code=status.HTTP_200_OK)
-def receipt_submit(receipt_id: int, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('User'))]):
+async def receipt_submit(receipt_id: int, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('User'))], response: Response, if_match: IfMatch = None):
     
-    receipt = db.query(db_model.Receipt).filter(db_model.Receipt.r_id == receipt_id).first()
+    receipt = await db.get(db_model.Receipt, receipt_id)
     
     if not receipt:
         raise HTTPException(status_code=404, detail="Receipt not found")
+
+    if receipt.u_id != current_user.u_id:
+        raise HTTPException(status_code=403, detail="You do not have permission to submit this receipt.")
+
+    versioning.check_if_match(if_match, receipt, "Receipt")
     
     if receipt.status != 'Pending': 
         raise HTTPException(status_code=400, detail=f"Receipt cannot be submitted. Current status is '{receipt.status}'.")
@@ -101,65 +114,101 @@ def receipt_submit(receipt_id: int, db: DBDependency, current_user: Annotated[db
 
     try:
         receipt.status = 'Submitted'
-        db.commit()
-        db.refresh(receipt)
+        await versioning.commit(db, "Receipt")
+        await db.refresh(receipt)
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database error during submission: {e}")
     
     
+    metrics.record_transition('Receipt', 'Pending', 'Submitted')
+    versioning.set_etag(response, receipt)
     return receipt
 
+@router.post("/bulk-approve", response_model=BulkTransitionResponse)
+async def receipts_bulk_approve(request: BulkTransitionRequest, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('Admin'))]):
+    return await transitions.bulk_transition(
+        db, db_model.Receipt, 'r_id', 'receipt_number', 'amount', 'Receipt', 'Pending',
+        request, current_user
+    )
+
 @router.put("/{receipt_id}/approve", response_model=ReceiptResponse)
-def receipt_approve(receipt_id: int, status: str, db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('Admin'))]):
+async def receipt_approve(receipt_id: int, status: str, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('Admin'))], response: Response, if_match: IfMatch = None):
     
-    receipt = db.query(db_model.Receipt).filter(db_model.Receipt.r_id == receipt_id).first()
+    receipt = await db.get(db_model.Receipt, receipt_id)
     
     if not receipt:
         raise HTTPException(status_code=404, detail="Receipt not found")
 
+    versioning.check_if_match(if_match, receipt, "Receipt")
+
     if receipt.status != 'Pending':
         raise HTTPException(status_code=400, detail=f"Receipt cannot be actioned. Current status is '{receipt.status}'.")
         
-    target_user = db.query(db_model.User).filter(db_model.User.u_id == receipt.u_id).first()
+    target_user = await db.get(db_model.User, receipt.u_id) if receipt.u_id else None
 
     if status == 'Approved':
         try:
             receipt.status = 'Approved'
-            db.commit()
-            db.refresh(receipt)
+            receipt.approver_id = current_user.u_id
+            receipt.approver_name = current_user.name
+            receipt.approved_at = datetime.now(timezone.utc)
+            if target_user:
+                message = f"Good news! Your Receipt {receipt.receipt_number} (Total: {receipt.amount}) has been APPROVED by admin."
+                subject = f"Your Receipt {receipt.receipt_number} was Approved"
+                await db.run_sync(notification_service.enqueue_notification, target_user, message, subject)
+            await versioning.commit(db, "Receipt")
+            await db.refresh(receipt)
+        except HTTPException:
+            raise
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=500, detail=f"Database error during approval: {e}")
         
-        if target_user:
-            message = f"Good news! Your Receipt {receipt.receipt_number} (Total: {receipt.amount}) has been APPROVED by admin."
-            subject = f"Your Receipt {receipt.receipt_number} was Approved"
-            notification_service.dispatch_notification(db, target_user, message, subject)
+        metrics.record_transition('Receipt', 'Pending', 'Approved')
+        versioning.set_etag(response, receipt)
         return receipt
             
     if status == 'Rejected':
         try:
             receipt.status = 'Rejected'
-            db.commit()
-            db.refresh(receipt)
+            if target_user:
+                message = f"Update: Your Receipt {receipt.receipt_number} (Total: {receipt.amount}) has been REJECTED by admin."
+                subject = f"Your Receipt {receipt.receipt_number} was Rejected"
+                await db.run_sync(notification_service.enqueue_notification, target_user, message, subject)
+            await versioning.commit(db, "Receipt")
+            await db.refresh(receipt)
+        except HTTPException:
+            raise
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise HTTPException(status_code=500, detail=f"Database error during rejection: {e}")
 
-        if target_user:
-            message = f"Update: Your Receipt {receipt.receipt_number} (Total: {receipt.amount}) has been REJECTED by admin."
-            subject = f"Your Receipt {receipt.receipt_number} was Rejected"
-            notification_service.dispatch_notification(db, target_user, message, subject)
+        metrics.record_transition('Receipt', 'Pending', 'Rejected')
+        versioning.set_etag(response, receipt)
         return receipt
     
 
     raise HTTPException(status_code=400, detail="Invalid status. Must be 'Approved' or 'Rejected'.")
 
+def _receipt_list_query(filters: DocumentFilters):
+    query = select(db_model.Receipt)
+    # Receipts carry no customer of their own; filter through the parent invoice
+    if filters.customer_name:
+        query = query.join(db_model.Invoice, db_model.Receipt.i_id == db_model.Invoice.i_id)
+    
+    return apply_document_filters(query, db_model.Receipt, filters, customer_col=db_model.Invoice.customer_name)
+
 @router.get("/", response_model=List[ReceiptResponse], status_code=status.HTTP_200_OK)
-def get_all_receipts(db: DBDependency, current_user: Annotated[db_model.User, Depends(check_user_role('Admin'))]):
+async def get_all_receipts(response: Response, db: DBDependency, current_user: Annotated[UserPrincipal, Depends(check_user_role('Admin'))], page: Annotated[PageParams, Depends()], filters: Annotated[DocumentFilters, Depends()]):
     
-    receipts = db.query(db_model.Receipt).all()
+    query = _receipt_list_query(filters)
+    receipts = (await db.execute(
+        keyset(query, page, db_model.Receipt.created_at, db_model.Receipt.r_id)
+    )).scalars().all()
+    receipts = finish_page(receipts, page, 'r_id', response)
     
     for receipt in receipts:
         receipt.amount = float(receipt.amount)
@@ -167,9 +216,14 @@ def get_all_receipts(db: DBDependency, current_user: Annotated[db_model.User, De
     return receipts
 
 @router.get("/me/", response_model=List[ReceiptResponse], status_code=status.HTTP_200_OK)
-def get_my_receipts(db: DBDependency, current_user: CurrentUser):
+async def get_my_receipts(response: Response, db: DBDependency, current_user: CurrentUser, page: Annotated[PageParams, Depends()], filters: Annotated[DocumentFilters, Depends()]):
     
-    receipts = db.query(db_model.Receipt).filter(db_model.Receipt.u_id == current_user.u_id).all()
+    filters.owner_id = current_user.u_id
+    query = _receipt_list_query(filters)
+    receipts = (await db.execute(
+        keyset(query, page, db_model.Receipt.created_at, db_model.Receipt.r_id)
+    )).scalars().all()
+    receipts = finish_page(receipts, page, 'r_id', response)
     
     for receipt in receipts:
         receipt.amount = float(receipt.amount)
@@ -177,9 +231,9 @@ def get_my_receipts(db: DBDependency, current_user: CurrentUser):
     return receipts
 
 @router.get("/{receipt_id}", response_model=ReceiptResponse, status_code=status.HTTP_200_OK)
-def get_receipt(receipt_id: int, db: DBDependency, current_user: CurrentUser):
+async def get_receipt(receipt_id: int, db: DBDependency, current_user: CurrentUser, response: Response):
 
-    receipt = db.query(db_model.Receipt).filter(db_model.Receipt.r_id == receipt_id).first()
+    receipt = await db.get(db_model.Receipt, receipt_id)
     
     if not receipt:
         raise HTTPException(status_code=404, detail="Receipt not found")
@@ -189,29 +243,23 @@ def get_receipt(receipt_id: int, db: DBDependency, current_user: CurrentUser):
 
     receipt.amount = float(receipt.amount)
     
+    versioning.set_etag(response, receipt)
     return receipt
 
 @router.get("/number/{receipt_number}", response_model=ReceiptResponse, status_code=status.HTTP_200_OK)
-def get_receipt_by_number(receipt_number: str, db: DBDependency, current_user: CurrentUser):
+async def get_receipt_by_number(receipt_number: str, db: DBDependency, current_user: CurrentUser, response: Response):
 
-    receipt = db.query(db_model.Receipt).filter(db_model.Receipt.receipt_number == receipt_number).first()
+    receipt = (await db.execute(
+        select(db_model.Receipt).filter(db_model.Receipt.receipt_number == receipt_number)
+    )).scalars().first()
     
     if not receipt:
         raise HTTPException(status_code=404, detail="Receipt not found")
     
     if current_user.role != 'Admin' and receipt.u_id != current_user.u_id:
         raise HTTPException(status_code=403, detail="Not authorized to view this receipt")
-    
-    approver_name = None
-    if receipt.status == 'Approved':
-        log_entry = db.query(db_model.Log)\
-            .filter(db_model.Log.document_id == receipt.r_id, db_model.Log.action == 'Approved')\
-            .order_by(db_model.Log.timestamp.desc())\
-            .first()
-        
-        if log_entry and log_entry.actor:
-            approver_name = log_entry.actor.name
 
     receipt.amount = float(receipt.amount)
     
+    versioning.set_etag(response, receipt)
     return receipt
\ No newline at end of file
@@ -0,0 +1,171 @@
+import uuid
+from datetime import date, datetime, timezone
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy import Date, Integer, func, literal, select, text, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from . import db_model
+from .auth import CurrentUser, UserPrincipal, check_user_role
+from .database import get_async_db
+
+router = APIRouter(prefix='/summary', tags=['summary'])
+
+DBDependency = Annotated[AsyncSession, Depends(get_async_db)]
+AdminUser = Annotated[UserPrincipal, Depends(check_user_role('Admin'))]
+
+class SummaryRow(BaseModel):
+    doc_type: str
+    status: str
+    count: int
+    total: float
+    tax: float
+
+class MonthlySummaryRow(SummaryRow):
+    month: date
+
+class UserSummaryRow(SummaryRow):
+    u_id: Optional[uuid.UUID] = None
+    name: Optional[str] = None
+
+class CustomerSummaryRow(SummaryRow):
+    customer_name: Optional[str] = None
+
+class AgingRow(BaseModel):
+    customer_name: Optional[str] = None
+    invoices: int
+    current: float
+    days_1_30: float
+    days_31_60: float
+    days_61_90: float
+    days_over_90: float
+    outstanding: float
+
+class SummaryFilters:
+    """Narrows the rollup to one document type and / or a day range (inclusive)."""
+    def __init__(
+        self,
+        doc_type: Optional[str] = Query(None, pattern="^(Quotation|Invoice|Receipt)$"),
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+    ):
+        self.doc_type = doc_type
+        self.date_from = date_from
+        self.date_to = date_to
+
+async def _summarize(db: AsyncSession, group_by: list, filters: SummaryFilters, current_user, join=None) -> list:
+    """
+    Sums the DailyDocumentTotals rollup per document type, status and the
+    extra `group_by` columns. Users only see their own documents.
+    """
+    totals = db_model.DailyDocumentTotal
+    query = select(
+        *group_by,
+        totals.doc_type,
+        totals.status,
+        func.sum(totals.doc_count).label("count"),
+        func.sum(totals.total).label("total"),
+        func.sum(totals.tax).label("tax"),
+    )
+    if join is not None:
+        query = query.outerjoin(*join)
+
+    if current_user.role != 'Admin':
+        query = query.filter(totals.u_id == current_user.u_id)
+    if filters.doc_type:
+        query = query.filter(totals.doc_type == filters.doc_type)
+    if filters.date_from:
+        query = query.filter(totals.day >= filters.date_from)
+    if filters.date_to:
+        query = query.filter(totals.day <= filters.date_to)
+
+    query = query.group_by(*group_by, totals.doc_type, totals.status).having(
+        func.sum(totals.doc_count) != 0
+    ).order_by(*group_by, totals.doc_type, totals.status)
+
+    return (await db.execute(query)).mappings().all()
+
+@router.get("/status", response_model=List[SummaryRow])
+async def summary_by_status(db: DBDependency, current_user: CurrentUser, filters: Annotated[SummaryFilters, Depends()]):
+    return await _summarize(db, [], filters, current_user)
+
+@router.get("/monthly", response_model=List[MonthlySummaryRow])
+async def summary_by_month(db: DBDependency, current_user: CurrentUser, filters: Annotated[SummaryFilters, Depends()]):
+    month = func.date_trunc('month', db_model.DailyDocumentTotal.day).cast(db_model.DailyDocumentTotal.day.type).label("month")
+    return await _summarize(db, [month], filters, current_user)
+
+@router.get("/customers", response_model=List[CustomerSummaryRow])
+async def summary_by_customer(db: DBDependency, current_user: CurrentUser, filters: Annotated[SummaryFilters, Depends()]):
+    return await _summarize(db, [db_model.DailyDocumentTotal.customer_name], filters, current_user)
+
+@router.get("/users", response_model=List[UserSummaryRow])
+async def summary_by_user(db: DBDependency, current_user: AdminUser, filters: Annotated[SummaryFilters, Depends()]):
+    totals = db_model.DailyDocumentTotal
+    return await _summarize(
+        db, [totals.u_id, db_model.User.name], filters, current_user,
+        join=(db_model.User, db_model.User.u_id == totals.u_id)
+    )
+
+# (label, first day overdue, last day overdue); "current" is not yet due
+AGING_BUCKETS = [
+    ("current", None, 0),
+    ("days_1_30", 1, 30),
+    ("days_31_60", 31, 60),
+    ("days_61_90", 61, 90),
+    ("days_over_90", 91, None),
+]
+
+@router.get("/aging", response_model=List[AgingRow])
+async def receivables_aging(db: DBDependency, current_user: CurrentUser, as_of: Optional[date] = None, by_customer: bool = False):
+    """
+    Accounts-receivable aging of approved invoices as of `as_of` (default
+    today, UTC). Outstanding = invoice total minus its approved receipts;
+    fully paid invoices are left out. One row overall, or one per customer.
+    """
+    as_of = as_of or datetime.now(timezone.utc).date()
+    Invoice, Receipt = db_model.Invoice, db_model.Receipt
+
+    paid = select(
+        Receipt.i_id, func.sum(Receipt.amount).label("paid")
+    ).filter(Receipt.status == 'Approved').group_by(Receipt.i_id).subquery()
+
+    # served by idx_invoice_receivable_due (partial on status = 'Approved')
+    receivable = select(
+        Invoice.customer_name,
+        (Invoice.total - func.coalesce(paid.c.paid, 0)).label("outstanding"),
+        type_coerce(literal(as_of, Date) - Invoice.due_date, Integer).label("days_overdue"),
+    ).outerjoin(paid, paid.c.i_id == Invoice.i_id).filter(Invoice.status == 'Approved')
+    if current_user.role != 'Admin':
+        receivable = receivable.filter(Invoice.u_id == current_user.u_id)
+    receivable = receivable.subquery()
+
+    buckets = []
+    for label, first, last in AGING_BUCKETS:
+        in_bucket = []
+        if first is not None:
+            in_bucket.append(receivable.c.days_overdue >= first)
+        if last is not None:
+            in_bucket.append(receivable.c.days_overdue <= last)
+        buckets.append(func.coalesce(
+            func.sum(receivable.c.outstanding).filter(*in_bucket), 0
+        ).label(label))
+
+    group_by = [receivable.c.customer_name] if by_customer else []
+    query = select(
+        *group_by,
+        func.count().label("invoices"),
+        *buckets,
+        func.coalesce(func.sum(receivable.c.outstanding), 0).label("outstanding"),
+    ).filter(receivable.c.outstanding > 0)
+    if by_customer:
+        query = query.group_by(*group_by).order_by(func.sum(receivable.c.outstanding).desc())
+
+    return (await db.execute(query)).mappings().all()
+
+@router.post("/rebuild", status_code=status.HTTP_204_NO_CONTENT)
+async def rebuild_summary(db: DBDependency, current_user: AdminUser):
+    """Recomputes the rollup from the document tables (blocks document writes while it runs)."""
+    await db.execute(text("SELECT rebuild_daily_document_totals()"))
+    await db.commit()
@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional
+from fastapi import HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from . import db_model
+from . import metrics
+from . import notification_service
+from .batch import MAX_BATCH_SIZE
+
+class BulkTransitionRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+    status: str # 'Approved' or 'Rejected'
+
+class BulkSkipped(BaseModel):
+    id: int
+    detail: str
+
+class BulkTransitionResponse(BaseModel):
+    updated: List[int] = []
+    skipped: List[BulkSkipped] = []
+
+async def bulk_transition(
+    db: AsyncSession,
+    model,
+    id_attr: str,
+    number_attr: str,
+    amount_attr: str,
+    label: str,
+    from_status: str,
+    request: BulkTransitionRequest,
+    current_user,
+    on_approved: Optional[Callable[[AsyncSession, list[int]], Awaitable]] = None,
+) -> BulkTransitionResponse:
+    """
+    Approves or rejects many documents of one type in a single transaction.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so documents that
+    another admin is actioning right now are skipped instead of waited on.
+    The status change is one UPDATE, `on_approved` runs the set-based
+    conversion for the approved ids, and each owner gets one notification
+    covering all of their documents.
+    """
+    if request.status not in ('Approved', 'Rejected'):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid status provided. Must be 'Approved' or 'Rejected'.")
+
+    id_col = getattr(model, id_attr)
+    ids = list(dict.fromkeys(request.ids))
+
+    claimed = (await db.execute(
+        select(id_col, model.u_id, getattr(model, number_attr).label("number"), getattr(model, amount_attr).label("amount"))
+        .filter(id_col.in_(ids), model.status == from_status)
+        .order_by(id_col)
+        .with_for_update(skip_locked=True)
+    )).all()
+
+    response = BulkTransitionResponse(updated=[row[0] for row in claimed])
+
+    claimed_ids = set(response.updated)
+    unclaimed = [doc_id for doc_id in ids if doc_id not in claimed_ids]
+    if unclaimed:
+        current = dict((await db.execute(
+            select(id_col, model.status).filter(id_col.in_(unclaimed))
+        )).all())
+        for doc_id in unclaimed:
+            if doc_id not in current:
+                detail = f"{label} not found"
+            elif current[doc_id] != from_status:
+                detail = f"{label} cannot be actioned. Current status is '{current[doc_id]}'."
+            else:
+                detail = f"{label} is being actioned by another request."
+            response.skipped.append(BulkSkipped(id=doc_id, detail=detail))
+
+    if not claimed:
+        return response
+
+    # bump the version as ORM writes do, so edits made against the old one conflict
+    values = dict(status=request.status, version=model.version + 1)
+    if request.status == 'Approved':
+        values.update(
+            approver_id = current_user.u_id,
+            approver_name = current_user.name,
+            approved_at = datetime.now(timezone.utc)
+        )
+
+    try:
+        await db.execute(
+            update(model).filter(id_col.in_(response.updated)).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if request.status == 'Approved' and on_approved is not None:
+            await on_approved(db, response.updated)
+
+        by_owner = {}
+        for row in claimed:
+            if row.u_id is not None:
+                by_owner.setdefault(row.u_id, []).append(row)
+
+        owners = (await db.execute(
+            select(db_model.User).filter(db_model.User.u_id.in_(by_owner))
+        )).scalars().all() if by_owner else []
+
+        verb = request.status.upper()
+        notifications = []
+        for owner in owners:
+            docs = by_owner[owner.u_id]
+            if len(docs) == 1:
+                message = f"Update: Your {label} {docs[0].number} (Total: {docs[0].amount}) has been {verb} by admin."
+                subject = f"Your {label} {docs[0].number} was {request.status}"
+            else:
+                numbers = ", ".join(doc.number for doc in docs)
+                message = f"Update: {len(docs)} of your {label}s have been {verb} by admin: {numbers}."
+                subject = f"{len(docs)} of your {label}s were {request.status}"
+            notifications.append((owner, message, subject))
+
+        await db.run_sync(notification_service.enqueue_notifications, notifications)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error during bulk update: {e}")
+
+    metrics.record_transition(label, from_status, request.status, len(response.updated))
+    return response
@@ -0,0 +1,46 @@
+from typing import Annotated, Optional
+from fastapi import Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
+from starlette import status
+
+# --- Optimistic concurrency ---
+# Quotations, invoices and receipts carry a `version` column that the ORM
+# uses as version_id_col: every UPDATE is issued as
+# "... WHERE id = ? AND version = ?" and bumps the version, so a write based
+# on a stale read matches no row and fails instead of overwriting.
+# The version is exposed as the document's ETag; clients send it back in
+# If-Match to make their change conditional on what they last saw.
+
+IfMatch = Annotated[Optional[str], Header(alias="If-Match")]
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+def set_etag(response: Response, document):
+    response.headers["ETag"] = etag(document.version)
+
+def conflict(label: str, current_version: Optional[int] = None) -> HTTPException:
+    headers = {"ETag": etag(current_version)} if current_version is not None else None
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"{label} was changed by another request. Reload it and try again.",
+        headers=headers
+    )
+
+def check_if_match(if_match: Optional[str], document, label: str):
+    """Raises 409 when the client's If-Match does not name the current version."""
+    if if_match is None or if_match.strip() == "*":
+        return
+
+    tags = [tag.strip().removeprefix("W/") for tag in if_match.split(",")]
+    if etag(document.version) not in tags:
+        raise conflict(label, document.version)
+
+async def commit(db: AsyncSession, label: str):
+    """Commits, turning a lost version race into 409 Conflict."""
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise conflict(label)
@@ -0,0 +1,127 @@
+"""
+Compares the per-row and per-statement audit triggers of DataBase/*_log_func_trigger.sql.
+
+For each document table the benchmark inserts N rows, changes the status of
+all of them with one UPDATE and deletes them again, first with the FOR EACH ROW
+trigger installed and then with the FOR EACH STATEMENT ones, and prints the
+time of each statement (best of --repeat runs) and the number of "Logs" rows
+written.
+
+Each run is a transaction that is rolled back, so no rows or triggers are left
+behind, and the table is vacuumed between runs so dead rows of one run do not
+slow down the next. The document tables are locked while it runs: point it at
+a local / development database.
+
+    python -m scripts.bench_audit_triggers --rows 10000
+"""
+import argparse
+import os
+import time
+
+from app.database import engine
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "DataBase")
+
+# table -> (trigger file name, status before / after the UPDATE, INSERT ... SELECT body)
+TABLES = {
+    "Quotations": ("quotation", "Draft", "Submitted", """
+        INSERT INTO "Quotations" (quotation_number, customer_name, customer_address, customer_email,
+                                  status, total, tax, created_at, updated_at)
+        SELECT 'BENCH-QT-' || g, 'Bench customer', 'Bench address', 'bench@example.com',
+               'Draft', 107.00, 7.00, now(), now()
+        FROM generate_series(1, %(rows)s) g
+    """),
+    "Invoices": ("invoice", "Draft", "Submitted", """
+        INSERT INTO "Invoices" (invoice_number, customer_name, customer_address, payment_term,
+                                status, total, tax, due_date, created_at, updated_at)
+        SELECT 'BENCH-INV-' || g, 'Bench customer', 'Bench address', '30 days',
+               'Draft', 107.00, 7.00, current_date + 30, now(), now()
+        FROM generate_series(1, %(rows)s) g
+    """),
+    "Receipts": ("receipt", "Pending", "Submitted", """
+        INSERT INTO "Receipts" (receipt_number, payment_date, amount, status, payment_method, created_at)
+        SELECT 'BENCH-RC-' || g, current_date, 107.00, 'Pending', 'Cash', now()
+        FROM generate_series(1, %(rows)s) g
+    """),
+}
+
+def install_triggers(cursor, name: str, table: str, mode: str):
+    with open(os.path.join(SQL_DIR, f"user_{name}_log_func_trigger.sql")) as f:
+        # creates both functions and installs the statement-level triggers
+        cursor.execute(f.read())
+
+    if mode == "row":
+        for event in ("insert", "update", "delete"):
+            cursor.execute(f'DROP TRIGGER tr_{name}_log_{event} ON "{table}"')
+        cursor.execute(
+            f'CREATE TRIGGER tr_{name}_log AFTER INSERT OR UPDATE OR DELETE ON "{table}" '
+            f'FOR EACH ROW EXECUTE FUNCTION public.fn_log_{name}_changes()'
+        )
+
+def timed(cursor, sql: str, params=None) -> float:
+    start = time.perf_counter()
+    cursor.execute(sql, params)
+    return (time.perf_counter() - start) * 1000
+
+def run(connection, table: str, mode: str, rows: int) -> dict:
+    name, before, after, insert_sql = TABLES[table]
+    id_col = {"Quotations": "q_id", "Invoices": "i_id", "Receipts": "r_id"}[table]
+
+    cursor = connection.cursor()
+    install_triggers(cursor, name, table, mode)
+    cursor.execute('SELECT count(*) FROM "Logs"')
+    logs_before = cursor.fetchone()[0]
+
+    cursor.execute(f'SELECT coalesce(max({id_col}), 0) FROM "{table}"')
+    last_id = cursor.fetchone()[0]
+
+    result = dict(table=table, mode=mode)
+    result["insert_ms"] = timed(cursor, insert_sql, {"rows": rows})
+    result["update_ms"] = timed(
+        cursor,
+        f'UPDATE "{table}" SET status = %s WHERE {id_col} > %s AND status = %s',
+        (after, last_id, before)
+    )
+    result["delete_ms"] = timed(cursor, f'DELETE FROM "{table}" WHERE {id_col} > %s', (last_id,))
+
+    cursor.execute('SELECT count(*) FROM "Logs"')
+    result["log_rows"] = cursor.fetchone()[0] - logs_before
+
+    connection.rollback()
+
+    connection.autocommit = True
+    cursor.execute(f'VACUUM "{table}", "Logs"')
+    connection.autocommit = False
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark row vs statement audit triggers.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--tables", nargs="+", choices=list(TABLES), default=list(TABLES))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per table and trigger; the fastest is reported")
+    args = parser.parse_args()
+
+    connection = engine.raw_connection()
+    try:
+        results = []
+        for table in args.tables:
+            runs = {"row": [], "statement": []}
+            # alternate the modes so neither always runs on a warmer cache
+            for _ in range(args.repeat):
+                for mode in runs:
+                    runs[mode].append(run(connection.driver_connection, table, mode, args.rows))
+            for mode_runs in runs.values():
+                best = dict(mode_runs[0])
+                for key in ("insert_ms", "update_ms", "delete_ms"):
+                    best[key] = min(r[key] for r in mode_runs)
+                results.append(best)
+    finally:
+        connection.close()
+
+    print(f"{args.rows} rows per statement")
+    print(f"{'table':<12}{'trigger':<11}{'insert ms':>11}{'update ms':>11}{'delete ms':>11}{'log rows':>10}")
+    for r in results:
+        print(f"{r['table']:<12}{r['mode']:<11}{r['insert_ms']:>11.1f}{r['update_ms']:>11.1f}{r['delete_ms']:>11.1f}{r['log_rows']:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Measures how long a fresh worker takes to become useful. Every run starts a
+new Python process, like an autoscaled worker, which records:
+
+    import         importing app.app (the routers, models, SDKs and engines)
+    startup        the lifespan startup (pool warm-up, notification workers)
+    first-request  GET /hi, the first request served
+    first-db       GET /company-profile, the first request that needs a database connection
+    process        the whole child process, interpreter start-up and shutdown included
+
+and the median / min / max of each over --runs. Importing the app must not
+touch the database (tables come from `python -m app.migrate`), so a slow or
+unreachable database only shows up in first-db. To see which imports dominate:
+
+    python -X importtime -c "import app.app" 2>&1 | sort -t'|' -k2 -n | tail -20
+
+--save and --baseline work as in scripts.benchmark, comparing medians.
+
+    python -m scripts.bench_startup --runs 10 --save startup.json
+    python -m scripts.bench_startup --baseline startup.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+METRICS = ["import", "startup", "first-request", "first-db", "process"]
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_child() -> dict:
+    """Runs in the fresh process: imports the app, starts it and serves the first requests."""
+    import httpx
+
+    start = time.perf_counter()
+    from app.app import app
+    timings = {"import": time.perf_counter() - start}
+
+    async def serve():
+        start = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            timings["startup"] = time.perf_counter() - start
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+                for name, path in [("first-request", "/hi"), ("first-db", "/company-profile")]:
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    timings[name] = time.perf_counter() - start
+                    # 404 only means no company profile has been set up yet
+                    if response.status_code >= 500:
+                        raise SystemExit(f"GET {path} failed ({response.status_code}): {response.text[:200]}")
+
+    asyncio.run(serve())
+    return {name: round(seconds * 1000, 2) for name, seconds in timings.items()}
+
+def measure(env: dict) -> dict:
+    start = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, "-m", "scripts.bench_startup", "--child"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if child.returncode != 0:
+        raise SystemExit(f"Start-up run failed:\n{child.stderr.strip() or child.stdout.strip()}")
+    # the app may print while starting; the timings are the last line
+    timings = json.loads(child.stdout.strip().splitlines()[-1])
+    timings["process"] = round(elapsed * 1000, 2)
+    return timings
+
+def summarize(runs: list[dict]) -> dict:
+    results = {}
+    for name in METRICS:
+        values = [run[name] for run in runs]
+        results[name] = {
+            "median_ms": round(statistics.median(values), 2),
+            "min_ms": min(values),
+            "max_ms": max(values),
+        }
+    return results
+
+def print_results(results: dict, runs: int):
+    print(f"{'phase':<15}{'median ms':>11}{'min ms':>10}{'max ms':>10}   ({runs} runs)")
+    for name, r in results.items():
+        print(f"{name:<15}{r['median_ms']:>11.1f}{r['min_ms']:>10.1f}{r['max_ms']:>10.1f}")
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    found = []
+    for name, r in results.items():
+        before = baseline.get("phases", {}).get(name, {}).get("median_ms")
+        if before and r["median_ms"] > before * (1 + tolerance):
+            found.append(f"{name}: median {r['median_ms']:.1f} ms vs {before:.1f} ms baseline")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and first-request latency of a fresh worker.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to start")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file of an earlier --save to compare medians with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed median slowdown against the baseline (0.2 = 20%%)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_child()))
+        return
+
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    # no outbox threads polling, and LINE / SendGrid replaced by the local stand-ins
+    env = dict(os.environ)
+    env.setdefault("NOTIFICATION_BACKEND", "local")
+    env.setdefault("NOTIFICATION_WORKERS", "0")
+
+    runs = []
+    for _ in range(args.runs):
+        runs.append(measure(env))
+    results = summarize(runs)
+    print_results(results, args.runs)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"phases": results, "runs": runs}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
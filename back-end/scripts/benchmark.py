@@ -0,0 +1,214 @@
+"""
+Load-tests the API and reports latency percentiles and throughput per flow:
+
+    list           GET /invoice/?limit=50 (admin, first page)
+    get-by-number  GET /invoice/number/<n> for random existing invoices
+    create         POST /quotation/ with three items
+    approve        PUT /quotation/<id>/approve (the create and submit before it are not timed)
+
+Run it against data from scripts.generate_data. By default the app is driven
+in-process over ASGI with NOTIFICATION_BACKEND=local, so LINE / SendGrid are
+replaced by the local stand-ins in app.notification_service and nothing
+leaves the machine. With --url it drives a running server instead; start that
+with NOTIFICATION_BACKEND=local too. Invoice numbers are sampled from the
+database configured in .env either way. Needs httpx (pip install httpx).
+
+--save writes the results as JSON; --baseline compares p95 latencies with a
+saved run and exits with status 1 when a flow got slower than --tolerance.
+
+    python -m scripts.benchmark --requests 500 --concurrency 10 --save bench.json
+    python -m scripts.benchmark --baseline bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.database import engine
+
+SCENARIOS = ["list", "get-by-number", "create", "approve"]
+
+def sample_invoice_numbers(rng: random.Random, count: int) -> list[str]:
+    """Random existing invoice numbers, picked by id so it stays cheap on large tables."""
+    with engine.connect() as conn:
+        last_id = conn.execute(text('SELECT coalesce(max(i_id), 0) FROM "Invoices"')).scalar()
+        ids = [rng.randint(1, last_id) for _ in range(count)] if last_id else []
+        return conn.execute(
+            text('SELECT invoice_number FROM "Invoices" WHERE i_id = ANY(:ids)'), {"ids": ids}
+        ).scalars().all()
+
+def quotation_body(rng: random.Random) -> dict:
+    return {
+        "customer_name": f"Customer {rng.randint(1, 5000):05d}",
+        "customer_address": "1 Bench Road",
+        "customer_email": "bench@example.com",
+        "itemlist": [
+            {"description": "Consulting hours", "quantity": rng.randint(1, 10), "unit_price": rng.randint(10, 2000)}
+            for _ in range(3)
+        ],
+    }
+
+class Flows:
+    """One coroutine per flow; each returns (seconds, response) for the timed request."""
+    def __init__(self, client: httpx.AsyncClient, admin: dict, user: dict, numbers: list[str], rng: random.Random):
+        self.client = client
+        self.admin = admin
+        self.user = user
+        self.numbers = numbers
+        self.rng = rng
+
+    async def _timed(self, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        return time.perf_counter() - start, response
+
+    async def list(self):
+        return await self._timed("GET", "/invoice/", params={"limit": 50}, headers=self.admin)
+
+    async def get_by_number(self):
+        return await self._timed("GET", f"/invoice/number/{self.rng.choice(self.numbers)}", headers=self.admin)
+
+    async def create(self):
+        return await self._timed("POST", "/quotation/", json=quotation_body(self.rng), headers=self.user)
+
+    async def approve(self):
+        created = await self.client.post("/quotation/", json=quotation_body(self.rng), headers=self.user)
+        if created.status_code >= 400:
+            return 0.0, created
+        q_id = created.json()["q_id"]
+        submitted = await self.client.put(f"/quotation/{q_id}/submit", headers=self.user)
+        if submitted.status_code >= 400:
+            return 0.0, submitted
+        return await self._timed("PUT", f"/quotation/{q_id}/approve", params={"status": "Approved"}, headers=self.admin)
+
+async def run_flow(flow, requests: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await flow()
+
+    latencies = []
+    errors = []
+    remaining = iter(range(requests)) # shared by the workers
+
+    async def worker():
+        for _ in remaining:
+            elapsed, response = await flow()
+            if response.status_code < 400:
+                latencies.append(elapsed)
+            else:
+                errors.append(f"{response.status_code} {response.text[:200]}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+
+    result = {"requests": requests, "errors": len(errors), "throughput_rps": round(requests / wall, 1)}
+    if len(latencies) >= 2:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        result.update(
+            p50_ms=round(percentiles[49] * 1000, 2),
+            p95_ms=round(percentiles[94] * 1000, 2),
+            p99_ms=round(percentiles[98] * 1000, 2),
+            mean_ms=round(statistics.fmean(latencies) * 1000, 2),
+        )
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict:
+    response = await client.post("/auth/login", data={"username": email, "password": password})
+    if response.status_code != 200:
+        raise SystemExit(f"Login as {email} failed ({response.status_code}); load data with scripts.generate_data first.")
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def make_client(args) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        return httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60)
+
+    # imported here so the stand-in notification clients are picked up
+    os.environ.setdefault("NOTIFICATION_BACKEND", "local")
+    from app.app import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", limits=limits, timeout=60)
+
+async def run(args) -> dict:
+    rng = random.Random(args.seed)
+    numbers = sample_invoice_numbers(rng, 1000) if "get-by-number" in args.flows else []
+    if "get-by-number" in args.flows and not numbers:
+        raise SystemExit("No invoices to look up; load data with scripts.generate_data first.")
+
+    async with make_client(args) as client:
+        admin = await login(client, args.admin, args.password)
+        user = await login(client, args.user, args.password)
+        flows = Flows(client, admin, user, numbers, rng)
+
+        results = {}
+        for name in args.flows:
+            flow = getattr(flows, name.replace("-", "_"))
+            results[name] = await run_flow(flow, args.requests, args.concurrency, args.warmup)
+
+    if not args.url:
+        from app.database import async_engine
+        await async_engine.dispose()
+    return results
+
+def print_results(results: dict):
+    print(f"{'flow':<15}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'req/s':>9}")
+    for name, r in results.items():
+        print(
+            f"{name:<15}{r['requests']:>9}{r['errors']:>8}{r.get('p50_ms', 0):>10.1f}{r.get('p95_ms', 0):>10.1f}"
+            f"{r.get('p99_ms', 0):>10.1f}{r.get('mean_ms', 0):>10.1f}{r['throughput_rps']:>9.1f}"
+        )
+        if "first_error" in r:
+            print(f"  first error: {r['first_error']}")
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    found = []
+    for name, r in results.items():
+        before = baseline.get("flows", {}).get(name, {}).get("p95_ms")
+        if before and r.get("p95_ms", 0) > before * (1 + tolerance):
+            found.append(f"{name}: p95 {r['p95_ms']:.1f} ms vs {before:.1f} ms baseline")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API flows and report latency percentiles.")
+    parser.add_argument("--flows", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=500, help="timed requests per flow")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per flow before measuring")
+    parser.add_argument("--url", help="drive a running server (e.g. http://127.0.0.1:8000) instead of the app in-process")
+    parser.add_argument("--admin", default="bench-admin-1@example.com")
+    parser.add_argument("--user", default="bench-user-1@example.com")
+    parser.add_argument("--password", default="bench")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file of an earlier --save to compare p95 latencies with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.requests < 1 or args.concurrency < 1:
+        parser.error("--requests and --concurrency must be at least 1")
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"flows": results, "requests": args.requests, "concurrency": args.concurrency, "url": args.url}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
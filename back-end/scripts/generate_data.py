@@ -0,0 +1,355 @@
+"""
+Bulk-loads synthetic users, quotations, invoices, receipts (with their items)
+and logs, so the API can be measured at production volumes.
+
+Rows are generated from --seed, so the same arguments always give the same
+data, and streamed into the tables with COPY ... FROM STDIN in one
+transaction. Documents are spread over the --days days before today and
+numbered like the API numbers them (INV-YYYYMMDD-NNN); DocumentSequences is
+filled in to match. Nothing is dated today, so documents created afterwards
+through the API can't collide with generated numbers.
+
+Users are bench-admin-<n>@example.com (the first --admins) and
+bench-user-<n>@example.com, all with the password --password.
+
+The audit and daily-totals triggers are switched off for the load with
+session_replication_role (needs a superuser) and the daily totals are rebuilt
+afterwards. --truncate empties every table first, real users included: point
+it at a local / development database only.
+
+    python -m scripts.generate_data --invoices 1000000 --truncate
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app import migrate
+from app.auth import get_password_hash
+from app.database import engine
+from app.log_archive import add_months, create_partition, monthly_partitions
+from app.numbering import INVOICE_PREFIX, QUOTATION_PREFIX, RECEIPT_PREFIX
+
+# Tables the generator writes; any rows in them require --truncate.
+TABLES = [
+    "Users", "Quotations", "QuotationItems", "Invoices", "InvoiceItems", "Receipts",
+    "Logs", "DocumentSequences", "DailyDocumentTotals", "NotificationOutbox", "Notifications",
+]
+
+# (value, weight) pairs
+QUOTATION_STATUSES = [("Draft", 10), ("Submitted", 10), ("Approved", 70), ("Rejected", 10)]
+INVOICE_STATUSES = [("Draft", 10), ("Submitted", 10), ("Approved", 60), ("Paid", 15), ("Rejected", 5)]
+RECEIPT_STATUSES = [("Pending", 20), ("Approved", 70), ("Rejected", 10)]
+PAYMENT_METHODS = ["Bank Transfer", "Cash", "Credit Card"]
+ITEM_DESCRIPTIONS = [
+    "Consulting hours", "Software license (annual)", "Onboarding and training", "Support plan",
+    "Hardware rental", "Custom development", "Data migration", "Cloud hosting (monthly)",
+]
+PAYMENT_TERM_DAYS = 30
+VAT_PERCENT = 7 # app.quotation.vat
+COPY_CHUNK_LINES = 2000
+
+def _weighted(statuses):
+    values = [value for value, _ in statuses]
+    cumulative = list(itertools.accumulate(weight for _, weight in statuses))
+    return lambda rng: rng.choices(values, cum_weights=cumulative)[0]
+
+def _value(value) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _line(*values) -> str:
+    """One row in COPY's text format; generated values never contain tabs or backslashes."""
+    return "\t".join(_value(value) for value in values) + "\n"
+
+def _money(cents: int) -> str:
+    return f"{cents // 100}.{cents % 100:02d}"
+
+class LineReader:
+    """File-like view of an iterator of COPY lines, read by cursor.copy_expert."""
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = ""
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            chunk = "".join(itertools.islice(self._lines, COPY_CHUNK_LINES))
+            if not chunk:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    readline = read
+
+class Generator:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.end = today - timedelta(microseconds=1)
+        self.start = today - timedelta(days=args.days)
+        self.customers = [f"Customer {n:05d}" for n in range(1, args.customers + 1)]
+        self.sequences = {} # (prefix, day) -> last number issued
+        self.admins = []
+        self.users = []
+
+    def created_at(self, index: int, count: int) -> datetime:
+        """Evenly spread, increasing timestamps, so ids and created_at agree as they do in production."""
+        span = (self.end - self.start).total_seconds()
+        return self.start + timedelta(seconds=span * (index + self.rng.random()) / count)
+
+    def number(self, prefix: str, created_at: datetime) -> str:
+        day = created_at.date()
+        value = self.sequences.get((prefix, day), 0) + 1
+        self.sequences[(prefix, day)] = value
+        return f"{prefix}-{day:%Y%m%d}-{value:03d}"
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def user_rows(self):
+        password_hash = get_password_hash(self.args.password)
+        for n in range(1, self.args.admins + self.args.users + 1):
+            u_id = self.uuid()
+            if n <= self.args.admins:
+                role, email, name = "Admin", f"bench-admin-{n}@example.com", f"Bench Admin {n}"
+                self.admins.append((u_id, name))
+            else:
+                index = n - self.args.admins
+                role, email, name = "User", f"bench-user-{index}@example.com", f"Bench User {index}"
+                self.users.append(u_id)
+            yield _line(u_id, name, email, role, password_hash, f"{n} Bench Road", None)
+
+    def items(self, items_file, id_counter, doc_id) -> int:
+        """Writes a document's items to `items_file` and returns their subtotal in cents."""
+        subtotal = 0
+        for _ in range(self.rng.randint(1, 2 * self.args.items - 1)):
+            quantity = self.rng.randint(1, 10)
+            unit_price = self.rng.randint(1000, 200000)
+            subtotal += quantity * unit_price
+            items_file.write(_line(next(id_counter), doc_id, self.rng.choice(ITEM_DESCRIPTIONS), quantity, _money(unit_price)))
+        return subtotal
+
+    def approval(self, status: str, created_at: datetime):
+        if status not in ("Approved", "Paid"):
+            return None, None, None, created_at
+        approver_id, approver_name = self.rng.choice(self.admins)
+        approved_at = min(created_at + timedelta(hours=self.rng.uniform(1, 72)), self.end)
+        return approver_id, approver_name, approved_at, approved_at
+
+    def quotation_rows(self, items_file, approved: array):
+        count = self.args.quotations
+        status_of = _weighted(QUOTATION_STATUSES)
+        item_ids = itertools.count(1)
+        for q_id in range(1, count + 1):
+            created_at = self.created_at(q_id - 1, count)
+            status = status_of(self.rng)
+            subtotal = self.items(items_file, item_ids, q_id)
+            tax = subtotal * VAT_PERCENT // 100
+            approver_id, approver_name, approved_at, updated_at = self.approval(status, created_at)
+            if status == "Approved":
+                approved.append(q_id)
+            customer = self.rng.choice(self.customers)
+            yield _line(
+                q_id, self.number(QUOTATION_PREFIX, created_at), customer, f"{q_id} Market Street",
+                f"{customer.lower().replace(' ', '.')}@example.com", self.rng.choice(self.users), status,
+                _money(subtotal + tax), _money(tax), created_at, updated_at, approver_id, approver_name, approved_at,
+            )
+
+    def invoice_rows(self, items_file, approved_quotations: array, payable: array, payable_totals: array, payable_owners: array):
+        count = self.args.invoices
+        status_of = _weighted(INVOICE_STATUSES)
+        item_ids = itertools.count(1)
+        for i_id in range(1, count + 1):
+            created_at = self.created_at(i_id - 1, count)
+            status = status_of(self.rng)
+            subtotal = self.items(items_file, item_ids, i_id)
+            tax = subtotal * VAT_PERCENT // 100
+            owner = self.rng.randrange(len(self.users))
+            approver_id, approver_name, approved_at, updated_at = self.approval(status, created_at)
+            if status in ("Approved", "Paid"):
+                payable.append(i_id)
+                payable_totals.append(subtotal + tax)
+                payable_owners.append(owner)
+            # the first invoices come from approved quotations (one each, as conversion does)
+            q_id = approved_quotations[i_id - 1] if i_id <= len(approved_quotations) else None
+            due_date = created_at.date() + timedelta(days=PAYMENT_TERM_DAYS)
+            yield _line(
+                i_id, q_id, self.number(INVOICE_PREFIX, created_at), self.rng.choice(self.customers),
+                f"{i_id} Market Street", f"{PAYMENT_TERM_DAYS} days", status, _money(subtotal + tax), _money(tax),
+                due_date, created_at, updated_at, self.users[owner], approver_id, approver_name, approved_at,
+            )
+
+    def receipt_rows(self, payable: array, payable_totals: array, payable_owners: array):
+        count = self.args.receipts if payable else 0
+        status_of = _weighted(RECEIPT_STATUSES)
+        for r_id in range(1, count + 1):
+            created_at = self.created_at(r_id - 1, count)
+            status = status_of(self.rng)
+            index = self.rng.randrange(len(payable))
+            # most receipts settle the invoice, some are part payments
+            amount = payable_totals[index] if self.rng.random() < 0.8 else payable_totals[index] // 2
+            approver_id, approver_name, approved_at, _ = self.approval(status, created_at)
+            yield _line(
+                r_id, payable[index], self.number(RECEIPT_PREFIX, created_at), created_at.date(), _money(amount),
+                status, self.users[payable_owners[index]], self.rng.choice(PAYMENT_METHODS), created_at,
+                approver_id, approver_name, approved_at, False,
+            )
+
+    def log_rows(self):
+        count = self.args.logs
+        documents = [("Quotation", self.args.quotations), ("Invoice", self.args.invoices), ("Receipt", self.args.receipts)]
+        documents = [(label, total) for label, total in documents if total]
+        if not documents:
+            return
+        for l_id in range(1, count + 1):
+            label, total = self.rng.choice(documents)
+            document_id = self.rng.randint(1, total)
+            action = f"{label} {document_id} status changed to {self.rng.choice(['Submitted', 'Approved', 'Rejected'])}"
+            yield _line(l_id, action, self.rng.choice(self.users), document_id, self.created_at(l_id - 1, count))
+
+    def sequence_rows(self):
+        for (prefix, day), value in sorted(self.sequences.items()):
+            yield _line(prefix, day, value)
+
+def copy(cursor, table: str, columns: list[str], lines) -> float:
+    start = time.perf_counter()
+    column_list = ", ".join(columns)
+    cursor.copy_expert(f'COPY "{table}" ({column_list}) FROM STDIN', LineReader(lines))
+    elapsed = time.perf_counter() - start
+    print(f"{table:<20}{cursor.rowcount:>12} rows {elapsed:>9.1f} s")
+    return elapsed
+
+def copy_file(cursor, table: str, columns: list[str], path: str) -> float:
+    with open(path) as f:
+        return copy(cursor, table, columns, f)
+
+def prepare(args):
+    """Checks the target tables are empty (or empties them) and creates the Logs partitions the load needs."""
+    migrate.run()
+    with engine.connect() as conn:
+        if args.truncate:
+            tables = ", ".join(f'"{table}"' for table in TABLES)
+            conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+            conn.commit()
+        else:
+            for table in TABLES:
+                if conn.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{table}")')).scalar():
+                    raise SystemExit(f'"{table}" already holds rows; rerun with --truncate to replace them.')
+
+        # monthly partitions for the whole range, instead of filling "Logs_default"
+        partitions = monthly_partitions(conn)
+        today = datetime.now(timezone.utc).date()
+        month = (today - timedelta(days=args.days)).replace(day=1)
+        while month <= today:
+            if month not in partitions:
+                create_partition(conn, month)
+            month = add_months(month, 1)
+
+        if not conn.execute(text('SELECT EXISTS (SELECT 1 FROM "CompanyProfile")')).scalar():
+            conn.execute(text("""
+                INSERT INTO "CompanyProfile" (company_name, company_address, tax_id, phone, email)
+                VALUES ('Bench Company', '1 Bench Road', '0000000000000', '+66-2-000-0000', 'bench@example.com')
+            """))
+            conn.execute(text("""
+                INSERT INTO "CompanyBankAccount" (bank_name, account_name, account_number, swift_code, is_default)
+                VALUES ('Bench Bank', 'Bench Company', '000-0-00000-0', 'BENCHXXX', TRUE)
+            """))
+            conn.commit()
+
+def load(args):
+    generator = Generator(args)
+    connection = engine.raw_connection()
+    started = time.perf_counter()
+    try:
+        cursor = connection.driver_connection.cursor()
+        # skips the audit / daily-totals triggers (and FK checks) for this session
+        cursor.execute("SET session_replication_role = replica")
+
+        copy(cursor, "Users", ["u_id", "name", "email", "role", "password_hash", "address", "line_user_id"], generator.user_rows())
+
+        approved_quotations = array("i")
+        with tempfile.TemporaryDirectory() as directory:
+            quotation_items = os.path.join(directory, "quotation_items.tsv")
+            with open(quotation_items, "w") as items_file:
+                copy(cursor, "Quotations", [
+                    "q_id", "quotation_number", "customer_name", "customer_address", "customer_email", "u_id", "status",
+                    "total", "tax", "created_at", "updated_at", "approver_id", "approver_name", "approved_at",
+                ], generator.quotation_rows(items_file, approved_quotations))
+            copy_file(cursor, "QuotationItems", ["item_id", "q_id", "description", "quantity", "unit_price"], quotation_items)
+
+            payable, payable_totals, payable_owners = array("i"), array("q"), array("i")
+            invoice_items = os.path.join(directory, "invoice_items.tsv")
+            with open(invoice_items, "w") as items_file:
+                copy(cursor, "Invoices", [
+                    "i_id", "q_id", "invoice_number", "customer_name", "customer_address", "payment_term", "status",
+                    "total", "tax", "due_date", "created_at", "updated_at", "u_id", "approver_id", "approver_name", "approved_at",
+                ], generator.invoice_rows(items_file, approved_quotations, payable, payable_totals, payable_owners))
+            copy_file(cursor, "InvoiceItems", ["inv_item_id", "i_id", "description", "quantity", "unit_price"], invoice_items)
+
+        copy(cursor, "Receipts", [
+            "r_id", "i_id", "receipt_number", "payment_date", "amount", "status", "u_id", "payment_method",
+            "created_at", "approver_id", "approver_name", "approved_at", "from_conversion",
+        ], generator.receipt_rows(payable, payable_totals, payable_owners))
+        copy(cursor, "Logs", ["l_id", "action", "actor_id", "document_id", "timestamp"], generator.log_rows())
+        copy(cursor, "DocumentSequences", ["prefix", "day", "last_value"], generator.sequence_rows())
+
+        cursor.execute("SET session_replication_role = DEFAULT")
+        # ids were supplied explicitly, so move the serial sequences past them
+        for table, column in [("Quotations", "q_id"), ("QuotationItems", "item_id"), ("Invoices", "i_id"),
+                              ("InvoiceItems", "inv_item_id"), ("Receipts", "r_id"), ("Logs", "l_id")]:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('\"{table}\"', '{column}'), "
+                f'coalesce((SELECT max({column}) FROM "{table}"), 0) + 1, false)'
+            )
+
+        cursor.execute("SELECT to_regproc('public.rebuild_daily_document_totals') IS NOT NULL")
+        if cursor.fetchone()[0]:
+            cursor.execute("SELECT rebuild_daily_document_totals()")
+        connection.driver_connection.commit()
+
+        connection.driver_connection.autocommit = True
+        cursor.execute("ANALYZE")
+        connection.driver_connection.autocommit = False
+    finally:
+        connection.close()
+
+    print(f"Loaded in {time.perf_counter() - started:.1f} s (seed {args.seed}, password '{args.password}')")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic data for load tests.")
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--quotations", type=int, default=100000)
+    parser.add_argument("--invoices", type=int, default=100000)
+    parser.add_argument("--receipts", type=int, default=60000)
+    parser.add_argument("--items", type=int, default=3, help="average items per quotation / invoice")
+    parser.add_argument("--logs", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=365, help="documents are spread over this many days before today")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--password", default="bench")
+    parser.add_argument("--truncate", action="store_true", help="empty the tables first (deletes real data)")
+    args = parser.parse_args()
+
+    if args.admins < 1 or args.users < 1 or args.customers < 1 or args.items < 1 or args.days < 1:
+        parser.error("--admins, --users, --customers, --items and --days must be at least 1")
+
+    prepare(args)
+    load(args)
+
+if __name__ == "__main__":
+    main()
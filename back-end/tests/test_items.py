@@ -0,0 +1,173 @@
+"""
+Checks that editing a document only writes the item rows that changed.
+
+Runs against the database configured in .env (a local / development one:
+it adds a user with two invoices and deletes them again) after
+`python -m app.migrate`:
+
+    pytest tests
+"""
+import asyncio
+import os
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import delete, event, insert, select, text
+from sqlalchemy.exc import OperationalError
+
+# keep LINE / SendGrid out of it; read by notification_service at import
+os.environ.setdefault("NOTIFICATION_BACKEND", "local")
+
+from app import db_model, invoice, items
+from app.auth import UserPrincipal
+from app.database import AsyncSessionLocal, SessionLocal, async_engine
+
+ITEMS = [("Design", 1, 500), ("Hosting", 12, 20), ("Support", 3, 100)]
+
+@pytest.fixture
+def invoices():
+    """Two Draft invoices of one owner; yields the owner and the invoices' (i_id, invoice_number, item ids)."""
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    except OperationalError as e:
+        db.close()
+        pytest.skip(f"database not reachable: {e}")
+
+    user = db_model.User(name="Item Sync", email=f"item-sync-{uuid.uuid4()}@example.com", role="User", password_hash="-")
+    db.add(user)
+    db.flush()
+    documents = []
+    for n in range(2):
+        number = f"IS-{user.u_id.hex[:8]}-{n}"
+        i_id = db.execute(
+            insert(db_model.Invoice).returning(db_model.Invoice.i_id),
+            dict(invoice_number=number, customer_name="Customer", customer_address="1 Test Road",
+                 payment_term="30 days", u_id=user.u_id, total=1284, tax=84),
+        ).scalar_one()
+        item_ids = db.execute(
+            insert(db_model.InvoiceItem).returning(db_model.InvoiceItem.inv_item_id, sort_by_parameter_order=True),
+            [dict(i_id=i_id, description=d, quantity=q, unit_price=p) for d, q, p in ITEMS],
+        ).scalars().all()
+        documents.append((i_id, number, item_ids))
+    db.commit()
+    owner = UserPrincipal.model_validate(user)
+
+    yield owner, documents
+
+    # invoices first: their delete trigger logs the owner as actor
+    db.execute(delete(db_model.Invoice).where(db_model.Invoice.u_id == owner.u_id))
+    db.execute(delete(db_model.Log).where(db_model.Log.actor_id == owner.u_id))
+    db.execute(delete(db_model.User).where(db_model.User.u_id == owner.u_id))
+    db.commit()
+    db.close()
+
+def run(fn):
+    """Runs fn(db) with an async session and returns its result."""
+    async def main():
+        try:
+            async with AsyncSessionLocal() as db:
+                return await fn(db)
+        finally:
+            # the pool's connections belong to this event loop
+            await async_engine.dispose()
+
+    return asyncio.run(main())
+
+@contextmanager
+def item_writes():
+    """Collects the INSERT / UPDATE / DELETE statements sent for InvoiceItems."""
+    writes = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if '"InvoiceItems"' in statement and statement.lstrip().split(None, 1)[0].upper() in ("INSERT", "UPDATE", "DELETE"):
+            writes.append(statement.lstrip().split(None, 1)[0].upper())
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield writes
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+def stored_items(i_id: int) -> dict:
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(db_model.InvoiceItem.inv_item_id, db_model.InvoiceItem.description,
+                   db_model.InvoiceItem.quantity, db_model.InvoiceItem.unit_price)
+            .where(db_model.InvoiceItem.i_id == i_id)
+        ).all()
+    return {row.inv_item_id: (row.description, row.quantity, float(row.unit_price)) for row in rows}
+
+def sync(i_id: int, itemlist: list):
+    async def fn(db):
+        await items.sync_items(db, db_model.InvoiceItem, 'inv_item_id', 'i_id', i_id, itemlist)
+        await db.commit()
+
+    with item_writes() as writes:
+        run(fn)
+    return writes
+
+def test_edit_keeps_changes_and_drops_items(invoices):
+    _, [(i_id, _, (design, hosting, support)), _] = invoices
+
+    writes = sync(i_id, [
+        invoice.InvoiceItemUpdate(item_id=design, description="Design", quantity=1, unit_price=500),
+        invoice.InvoiceItemUpdate(item_id=hosting, description="Hosting", quantity=24, unit_price=20),
+        invoice.InvoiceItemUpdate(description="Training", quantity=2, unit_price=150),
+    ])
+
+    after = stored_items(i_id)
+    assert after.pop(design) == ("Design", 1, 500)
+    assert after.pop(hosting) == ("Hosting", 24, 20)
+    assert support not in after
+    assert list(after.values()) == [("Training", 2, 150)]
+    # the unchanged item is not in the UPDATE: one statement per kind of change
+    assert sorted(writes) == ["DELETE", "INSERT", "UPDATE"]
+
+def test_item_of_another_document_is_rejected(invoices):
+    _, [(i_id, _, (design, _, _)), (other_id, _, (foreign, _, _))] = invoices
+    before = stored_items(other_id)
+
+    with pytest.raises(HTTPException) as e:
+        sync(i_id, [
+            invoice.InvoiceItemUpdate(item_id=design, description="Design", quantity=1, unit_price=500),
+            invoice.InvoiceItemUpdate(item_id=foreign, description="Taken over", quantity=9, unit_price=1),
+        ])
+
+    assert e.value.status_code == 400
+    assert stored_items(other_id) == before
+
+def test_unchanged_payload_writes_nothing(invoices):
+    _, [(i_id, _, item_ids), _] = invoices
+
+    writes = sync(i_id, [
+        invoice.InvoiceItemUpdate(item_id=item_id, description=d, quantity=q, unit_price=p)
+        for item_id, (d, q, p) in zip(item_ids, ITEMS)
+    ])
+
+    assert writes == []
+
+def test_saving_an_unchanged_invoice_rewrites_no_items(invoices):
+    owner, [(i_id, number, item_ids), _] = invoices
+
+    async def fn(db):
+        shown = await invoice.get_invoice_by_number(number, db, owner, Response())
+        # the JSON the edit page gets, and the PUT body it builds from it
+        body = invoice.InvoiceResponse.model_validate(shown).model_dump(mode="json", by_alias=True)
+        update = invoice.InvoiceUpdate.model_validate(dict(
+            customer_name=body["customer_name"], customer_address=body["customer_address"],
+            payment_term=body["payment_term"],
+            itemlist=[
+                dict(item_id=item["item_id"], description=item["description"],
+                     quantity=item["quantity"], unit_price=item["unit_price"])
+                for item in body["items"]
+            ],
+        ))
+        with item_writes() as writes:
+            await invoice.invoice_edit_by_number(number, update, db, owner, Response())
+        return writes
+
+    assert run(fn) == []
+    assert sorted(stored_items(i_id)) == sorted(item_ids)
@@ -0,0 +1,110 @@
+"""
+Checks that the outbox worker calls LINE / SendGrid without holding row
+locks or an open transaction, and records the results afterwards.
+
+Runs against the database configured in .env after `python -m app.migrate`:
+
+    pytest tests
+"""
+import os
+import uuid
+
+import pytest
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.exc import OperationalError
+
+# keep LINE / SendGrid out of it; read by notification_service at import
+os.environ.setdefault("NOTIFICATION_BACKEND", "local")
+
+from app import db_model, notification_service, notification_worker
+from app.database import SessionLocal, engine
+
+ENTRIES = 3
+# other entries due in the database are drained too; the tests only look at theirs
+MESSAGE = f"Worker test {uuid.uuid4()}"
+
+@pytest.fixture
+def outbox():
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    except OperationalError as e:
+        db.close()
+        pytest.skip(f"database not reachable: {e}")
+
+    user = db_model.User(name="Outbox", email=f"outbox-{uuid.uuid4()}@example.com", role="User", password_hash="-")
+    db.add(user)
+    db.flush()
+    o_ids = db.execute(
+        insert(db_model.NotificationOutbox).returning(db_model.NotificationOutbox.o_id),
+        [
+            dict(u_id=user.u_id, channel="Email", recipient=f"r{n}@example.com", subject="Hi", message=MESSAGE)
+            for n in range(ENTRIES)
+        ],
+    ).scalars().all()
+    db.commit()
+    u_id = user.u_id
+
+    yield db, o_ids
+
+    db.rollback()
+    db.execute(delete(db_model.NotificationOutbox).where(db_model.NotificationOutbox.u_id == u_id))
+    db.execute(delete(db_model.Notification).where(db_model.Notification.u_id == u_id))
+    db.execute(delete(db_model.User).where(db_model.User.u_id == u_id))
+    db.commit()
+    db.close()
+
+def entries(o_ids: list) -> list:
+    with SessionLocal() as db:
+        return db.execute(
+            select(db_model.NotificationOutbox).where(db_model.NotificationOutbox.o_id.in_(o_ids))
+        ).scalars().all()
+
+def test_sends_without_holding_row_locks(outbox, monkeypatch):
+    db, o_ids = outbox
+    seen = []
+
+    def deliver_batch(channel, subject, message, recipients):
+        if message != MESSAGE:
+            return
+        assert not db.in_transaction(), "the worker's transaction is still open while sending"
+        # another worker must be able to lock the claimed rows right away...
+        with engine.connect() as other:
+            locked = other.execute(
+                text('SELECT o_id FROM "NotificationOutbox" WHERE o_id = ANY(:ids) FOR UPDATE NOWAIT'),
+                {"ids": o_ids},
+            ).scalars().all()
+            other.rollback()
+        assert len(locked) == ENTRIES
+        # ...yet will not pick them up again while the claim lasts
+        with engine.connect() as other:
+            due = other.execute(
+                text('SELECT count(*) FROM "NotificationOutbox" WHERE o_id = ANY(:ids) AND next_attempt_at <= now()'),
+                {"ids": o_ids},
+            ).scalar()
+            other.rollback()
+        assert due == 0
+        seen.extend(recipients)
+
+    monkeypatch.setattr(notification_service, "deliver_batch", deliver_batch)
+    notification_worker.drain_once(db)
+
+    assert len(seen) == ENTRIES
+    rows = entries(o_ids)
+    assert all(row.status == "Sent" and row.sent_at is not None and row.attempts == 1 for row in rows)
+
+def test_records_failures_for_retry(outbox, monkeypatch):
+    db, o_ids = outbox
+
+    def deliver_batch(channel, subject, message, recipients):
+        raise RuntimeError("provider down")
+
+    monkeypatch.setattr(notification_service, "deliver_batch", deliver_batch)
+    notification_worker.drain_once(db)
+
+    rows = entries(o_ids)
+    assert all(row.status == "Pending" and row.attempts == 1 and row.last_error == "provider down" for row in rows)
+    assert not db.execute(
+        select(db_model.Notification).where(db_model.Notification.message == MESSAGE,
+                                            db_model.Notification.u_id == rows[0].u_id)
+    ).first()
@@ -0,0 +1,94 @@
+"""
+Guards the list endpoints against N+1 queries coming back.
+
+Runs against the database configured in .env (a local / development one:
+it adds a user with 500 quotations and deletes them again) after
+`python -m app.migrate`:
+
+    pytest tests
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+from fastapi import Response
+from sqlalchemy import delete, insert, text
+from sqlalchemy.exc import OperationalError
+
+# keep LINE / SendGrid out of it; read by notification_service at import
+os.environ.setdefault("NOTIFICATION_BACKEND", "local")
+
+from app import db_model, quotation
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, count_queries
+from app.pagination import DocumentFilters, PageParams
+
+QUOTATIONS = 500
+ITEMS_PER_QUOTATION = 3
+# the page, its items and its preparers: one SELECT each
+MAX_LIST_QUERIES = 4
+
+@pytest.fixture(scope="module")
+def owner():
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    except OperationalError as e:
+        db.close()
+        pytest.skip(f"database not reachable: {e}")
+
+    user = db_model.User(name="Query Count", email=f"query-count-{uuid.uuid4()}@example.com", role="User", password_hash="-")
+    db.add(user)
+    db.flush()
+    q_ids = db.execute(
+        insert(db_model.Quotation).returning(db_model.Quotation.q_id),
+        [
+            dict(quotation_number=f"QC-{user.u_id.hex[:8]}-{n:04d}", customer_name=f"Customer {n}",
+                 customer_address="1 Test Road", customer_email="customer@example.com",
+                 u_id=user.u_id, total=300, tax=21)
+            for n in range(QUOTATIONS)
+        ],
+    ).scalars().all()
+    db.execute(insert(db_model.QuotationItem), [
+        dict(q_id=q_id, description=f"Item {n}", quantity=1, unit_price=100)
+        for q_id in q_ids for n in range(ITEMS_PER_QUOTATION)
+    ])
+    db.commit()
+    db.refresh(user)
+    db.expunge(user)
+
+    yield user
+
+    # quotations first: their delete trigger logs the owner as actor
+    db.execute(delete(db_model.Quotation).where(db_model.Quotation.u_id == user.u_id))
+    db.execute(delete(db_model.Log).where(db_model.Log.actor_id == user.u_id))
+    db.execute(delete(db_model.User).where(db_model.User.u_id == user.u_id))
+    db.commit()
+    db.close()
+
+def list_quotations(owner: db_model.User) -> tuple[list, int]:
+    """Lists the owner's quotations like GET /quotation/me and serializes them; returns them with the statement count."""
+    async def run():
+        try:
+            async with AsyncSessionLocal() as db:
+                with count_queries() as stats:
+                    rows = await quotation.get_user_quotations(
+                        Response(), db, owner,
+                        PageParams(cursor=None, limit=QUOTATIONS),
+                        DocumentFilters(status_filter=None, customer_name=None, created_from=None, created_to=None, owner_id=None),
+                    )
+                    # serializing must not lazy-load anything either
+                    body = [quotation.QuotationResponse.model_validate(row) for row in rows]
+                return body, stats.count
+        finally:
+            # the pool's connections belong to this event loop
+            await async_engine.dispose()
+
+    return asyncio.run(run())
+
+def test_listing_quotations_takes_a_fixed_number_of_queries(owner):
+    body, count = list_quotations(owner)
+
+    assert len(body) == QUOTATIONS
+    assert all(len(q.items) == ITEMS_PER_QUOTATION for q in body)
+    assert count <= MAX_LIST_QUERIES, f"{count} queries to list {QUOTATIONS} quotations"